@@ -1,36 +1,58 @@
 # Standard library imports
 import json
 import logging
+import os
 import re
+import time
 from datetime import datetime
-from functools import wraps
 from pathlib import Path
 
 # Third-party imports
-import yaml
-from flask import Flask, render_template, request, redirect, url_for, abort, flash, send_file, send_from_directory
+from flask import Flask, jsonify, render_template, request, redirect, url_for, flash
 from sqlalchemy.exc import IntegrityError
+from werkzeug.security import safe_join
 
 # Local imports
-from .config import Config, create_database_engine, create_session_factory, get_payment_config, configure_logging
-from .models import Base, Participant
-from .forms import RegisterForm
+from .config import Config, get_payment_config, configure_logging
+from .models import Participant
 from .utils.content_loader import load_json
-from .utils.markdown_loader import list_lessons, render_lesson, course_dir, rewrite_relative_urls
+from .utils.document import parse_document
+from .utils.markdown_loader import (
+    DURCHFUEHRUNGEN_DIR, list_lessons, load_asset_page, load_lesson,
+)
 from .email_service import send_registration_emails
 from .error_handlers import register_error_handlers
 from .security import register_security_features, rate_limit, sanitize_input
-from .database import get_db_session, set_session_factory
+from .auth import register_admin_auth, require_admin
+from .database import SessionLocal
 from .monitoring import register_monitoring_endpoints
-from .cache import cached, cache_courses_key
+from .cache import cached, cache_courses_key, content_cache_ttl
+from .timing import phase, register_server_timing, timed
+from .profiler import register_profiler
+from .memory_diagnostics import register_memory_diagnostics
+from .startup import register_startup_report, timeline
+from .file_serving import send_cached_file
+from .assets import register_assets
+from .compression import compress_once, register_compression
+from .html_optimizer import page_fingerprint, register_html_optimizer
+from .templating import data_version, register_templating
+from .images import find_derivative, register_images
+from .content_build import register_content_build
+from .content_watcher import register_content_watcher
+from .search import register_search, search_service
+from .offline import SERVICE_WORKER, course_manifest
+from .metrics import SEARCH_LATENCY
 
 # Configure logging
 configure_logging()
 logger = logging.getLogger(__name__)
 
+FLYER_PATH = Path(__file__).resolve().parent / "static" / "docs" / "promo" / "Flyer-IT-Kurs-Dietikon.pdf"
+
 
 # --- Helper: Kurse laden (einheitliche Quelle) ---
-@cached(key_func=cache_courses_key, ttl=600)  # Cache for 10 minutes
+@timed("load_courses")
+@cached(key_func=cache_courses_key, ttl=content_cache_ttl)  # 10 Minuten, mit Watcher unbegrenzt
 def load_courses():
     """
     Bevorzugt meta/courses.json, fallback auf content/alle_kurse.json (über load_json).
@@ -67,17 +89,8 @@ def _split_front_matter(md_text: str):
     Returns:
         tuple: (meta_dict, body_text)
     """
-    if md_text.startswith("---"):
-        parts = md_text.split("\n---", 1)
-        if len(parts) == 2:
-            fm = parts[0][3:]  # ohne führendes ---
-            body = parts[1].lstrip("\n")
-            try:
-                meta = yaml.safe_load(fm) or {}
-            except Exception:
-                meta = {}
-            return meta, body
-    return {}, md_text
+    doc = parse_document(md_text)
+    return doc.meta, doc.body
 
 def _rewrite_relative_links(md_text: str, content_slug: str, lesson_id: str):
     """
@@ -101,71 +114,67 @@ def _rewrite_relative_links(md_text: str, content_slug: str, lesson_id: str):
 
     return md_text
 
-# --- App / Config ---
-app = Flask(__name__)
-app.secret_key = Config.SECRET_KEY
+# --- Routen-Tabelle ---
+class RouteTable:
+    """
+    Sammelt Routen auf Modulebene und registriert sie später in ``create_app``.
 
-# Database setup
-engine = create_database_engine()
-if engine:
-    Base.metadata.create_all(bind=engine)
-SessionLocal = create_session_factory(engine)
+    Gleiche Aufrufform wie ``app.get``/``app.post``/``app.route``; Endpunkte
+    heissen wie die View-Funktionen (wie bei Flask).
+    """
 
-# Set global session factory for database module
-set_session_factory(SessionLocal)
+    def __init__(self):
+        self.rules = []
 
+    def route(self, rule: str, **options):
+        def decorator(view_func):
+            self.rules.append((rule, view_func, options))
+            return view_func
+        return decorator
 
-@app.context_processor
-def inject_admin_flag():
-    is_admin = (
-        request.args.get("admin") == Config.ADMIN_TOKEN
-        or request.headers.get("X-Admin-Token") == Config.ADMIN_TOKEN
-    )
-    return dict(is_admin=is_admin, token=(Config.ADMIN_TOKEN if is_admin else None))
+    def get(self, rule: str, **options):
+        return self.route(rule, methods=["GET"], **options)
 
+    def post(self, rule: str, **options):
+        return self.route(rule, methods=["POST"], **options)
 
-# --- Admin Decorator ---
-def require_admin(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.args.get("admin") or request.headers.get("X-Admin-Token")
-        if token != Config.ADMIN_TOKEN:
-            abort(403)
-        return f(*args, **kwargs)
-    return decorated
+    def register(self, app: Flask) -> None:
+        for rule, view_func, options in self.rules:
+            app.add_url_rule(rule, view_func=view_func, **options)
 
 
+routes = RouteTable()
 
 
 # --- Routen: Public ---
-@app.get("/")
+@routes.get("/")
 def index():
     # Neue Landing / primäre Startseite (privater IT‑Support)
     # Rendert template 'landing.html' (muss neu angelegt werden)
     return render_template("landing.html")
 
 # Neue Route für das bestehende Portal (frühere Startseite)
-@app.get("/portal", endpoint="portal")
+@routes.get("/portal", endpoint="portal")
 def portal():
     # Benutzt dieselbe Kursquelle wie vorher
     courses = [c for c in load_courses() if c.get("visible", False)]
     return render_template("index.html", courses=courses)
 
 # Direct PDF serving for flyer
-@app.get("/flyer")
+@routes.get("/flyer")
 def flyer():
-    return send_file("static/docs/promo/Flyer-IT-Kurs-Dietikon.pdf", mimetype="application/pdf")
+    return send_cached_file(FLYER_PATH, mimetype="application/pdf")
 
 
 # Kurs-Übersicht (Info-Liste)
-@app.get("/kursliste", endpoint="kursliste")
+@routes.get("/kursliste", endpoint="kursliste")
 def kursliste():
     courses = [c for c in load_courses() if c.get("visible", False)]
     return render_template("kursliste.html", courses=courses)
 
 
 # Kurs-Onepager (Beschreibung) – Daten aus meta/<slug>.json, 
-@app.get("/kurs/<slug>", endpoint="kursbeschreibung")
+@routes.get("/kurs/<slug>", endpoint="kursbeschreibung")
 def kursbeschreibung_view(slug):
     """
     Kurs-Onepager (Beschreibung):
@@ -202,14 +211,17 @@ def kursbeschreibung_view(slug):
     kurs = {**basis, **detail}
     return render_template("kursbeschreibung.html", kurs=kurs)
 
-@app.get("/kursleitung")
+@routes.get("/kursleitung")
 def kursleitung():
     return render_template("kursleitung.html")
 
 
-@app.route("/anmeldung", methods=["GET", "POST"])
+@routes.route("/anmeldung", methods=["GET", "POST"])
 @rate_limit(limit=5, window=300)  # 5 registrations per 5 minutes
 def anmeldung():
+    # WTForms erst hier laden: Start und andere Routen brauchen es nicht
+    from .forms import RegisterForm
+
     courses = load_courses()
     form = RegisterForm(course_loader_func=load_courses)
 
@@ -240,6 +252,11 @@ def anmeldung():
                 phone="076 497 42 62"
             )
 
+        # Vermuteter Tippfehler: einmal nachfragen, beim erneuten Absenden gilt die Adresse
+        suggestion = getattr(form.email, "suggestion", None)
+        if suggestion and request.form.get("email_checked", "").strip().lower() != email:
+            return render_template("register.html", form=form, email_suggestion=suggestion)
+
         # Speichern in Datenbank
         try:
             with SessionLocal() as s:
@@ -272,14 +289,14 @@ def anmeldung():
     return render_template("register.html", form=form)
 
 
-@app.get("/zahlung")
+@routes.get("/zahlung")
 def payment_info():
     payment = get_payment_config()
     return render_template("payment.html", payment=payment)
 
 
 # --- Routen: Admin / Teilnehmende ---
-@app.get("/teilnehmende/count")
+@routes.get("/teilnehmende/count")
 def count_participants():
     if not SessionLocal:
         return {"error": "DB nicht konfiguriert"}, 500
@@ -288,13 +305,13 @@ def count_participants():
     return {"participants": n}
 
 
-@app.get("/teilnehmende/new")
+@routes.get("/teilnehmende/new")
 @require_admin
 def new_participant_form():
     return render_template("add_participant.html")
 
 
-@app.get("/teilnehmende/<int:pid>/edit")
+@routes.get("/teilnehmende/<int:pid>/edit")
 @require_admin
 def edit_participant(pid: int):
     if not SessionLocal:
@@ -307,7 +324,7 @@ def edit_participant(pid: int):
     return render_template("edit_participant.html", p=p)
 
 
-@app.post("/teilnehmende/<int:pid>/edit")
+@routes.post("/teilnehmende/<int:pid>/edit")
 @require_admin
 def update_participant(pid: int):
     if not SessionLocal:
@@ -342,17 +359,17 @@ def update_participant(pid: int):
     return redirect(url_for("list_participants"))
 
 
-@app.get("/teilnehmende")
+@routes.get("/teilnehmende")
 @require_admin
 def list_participants():
     if not SessionLocal:
         return {"error": "DB nicht konfiguriert"}, 500
     with SessionLocal() as s:
         participants = s.query(Participant).order_by(Participant.created_at.desc()).all()
-    return render_template("list_participants.html", participants=participants, token=Config.ADMIN_TOKEN)
+    return render_template("list_participants.html", participants=participants)
 
 
-@app.post("/teilnehmende/<int:pid>/paid")
+@routes.post("/teilnehmende/<int:pid>/paid")
 @require_admin
 def set_paid(pid: int):
     if not SessionLocal:
@@ -370,10 +387,10 @@ def set_paid(pid: int):
         p.payment_date = (now if set_flag else None)
         s.commit()
 
-    return redirect(url_for("list_participants") + f"?admin={Config.ADMIN_TOKEN}")
+    return redirect(url_for("list_participants"))
 
 
-@app.post("/teilnehmende/new")
+@routes.post("/teilnehmende/new")
 @require_admin
 def create_participant():
     if not SessionLocal:
@@ -401,7 +418,7 @@ def create_participant():
             "<a href='/teilnehmende/count'>Anzahl ansehen</a></p>")
 
 
-@app.post("/teilnehmende/<int:pid>/delete")
+@routes.post("/teilnehmende/<int:pid>/delete")
 @require_admin
 def delete_participant(pid: int):
     if not SessionLocal:
@@ -420,13 +437,13 @@ def delete_participant(pid: int):
     return redirect(url_for("list_participants"))
 
 
-@app.get("/_admin")
+@routes.get("/_admin")
 @require_admin
 def admin_home():
-    return render_template("admin_home.html", token=Config.ADMIN_TOKEN)
+    return render_template("admin_home.html")
 
 
-@app.get("/api/participants/stats")
+@routes.get("/api/participants/stats")
 @require_admin
 def participants_stats():
     """API endpoint for participant statistics"""
@@ -445,7 +462,7 @@ def participants_stats():
     }
 
 
-@app.get("/teilnehmende/export/csv")
+@routes.get("/teilnehmende/export/csv")
 @require_admin
 def export_participants_csv():
     """Export participants as CSV file"""
@@ -494,7 +511,7 @@ def export_participants_csv():
     return response
 
 
-@app.post("/api/participants/<int:pid>/update")
+@routes.post("/api/participants/<int:pid>/update")
 @require_admin
 def update_participant_field():
     """API endpoint for inline editing of participant fields"""
@@ -548,14 +565,15 @@ def update_participant_field():
 
 
 # --- Unterlagen (Einstieg) ---
-@app.get("/unterlagen", endpoint="unterlagen")
+@routes.get("/unterlagen", endpoint="unterlagen")
 def unterlagen():
     courses = load_courses()
     visible = [c for c in courses if c.get("visible", False)]
+    compress_once(page_fingerprint(courses))
     return render_template("unterlagen.html", courses=visible)
 
 # Kurs-Unterlagen: Lektionsliste
-@app.get("/unterlagen/<slug>", endpoint="unterlagen_kurs")
+@routes.get("/unterlagen/<slug>", endpoint="unterlagen_kurs")
 def unterlagen_kurs(slug):
     # nur Kurse zeigen, die es wirklich gibt (und sichtbar sind)
     kurs = next((c for c in load_courses() if c.get("visible", False) and c["id"] == slug), None)
@@ -563,27 +581,72 @@ def unterlagen_kurs(slug):
         return ("<p>Kurs nicht gefunden.</p><p><a href='/unterlagen'>Zur Übersicht</a></p>"), 404
 
     lessons = list_lessons(slug)
+    compress_once(page_fingerprint(kurs, lessons))
     return render_template("unterlagen_kurs.html", kurs=kurs, lessons=lessons)
 
 
+# Offline-Lesen: Service Worker (Scope /unterlagen/) und Precache-Manifest pro Kurs
+@routes.get("/unterlagen/sw.js", endpoint="unterlagen_service_worker")
+def unterlagen_service_worker():
+    if not Config.OFFLINE_READER:
+        return "Offline-Modus deaktiviert", 404
+    # Feste URL ohne Fingerprint: der Browser prüft sie selbst auf Updates
+    return send_cached_file(SERVICE_WORKER, mimetype="text/javascript")
+
+
+@routes.get("/unterlagen/<slug>/offline.json", endpoint="unterlagen_offline_manifest")
+def unterlagen_offline_manifest(slug):
+    kurs = next((c for c in load_courses() if c.get("visible", False) and c["id"] == slug), None)
+    if not kurs or not Config.OFFLINE_READER:
+        return {"error": "Kurs nicht gefunden"}, 404
+
+    manifest = course_manifest(slug)
+    response = jsonify(manifest)
+    response.set_etag(manifest["version"])
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+# Volltextsuche in Lektionen und Kurs-Assets
+@routes.get("/unterlagen/<slug>/suche", endpoint="unterlagen_suche")
+def unterlagen_suche(slug):
+    kurs = next((c for c in load_courses() if c.get("visible", False) and c["id"] == slug), None)
+    if not kurs:
+        return ("<p>Kurs nicht gefunden.</p><p><a href='/unterlagen'>Zur Übersicht</a></p>"), 404
+
+    query = request.args.get("q", "").strip()[:200]
+    results = []
+    if query:
+        started = time.perf_counter()
+        with phase("search"):
+            results = search_service.search(query, slug=slug, limit=Config.SEARCH_MAX_RESULTS)
+        SEARCH_LATENCY.observe(time.perf_counter() - started)
+    if results is None:
+        # Index wird noch im Hintergrund aufgebaut: nicht warten lassen
+        page = render_template("unterlagen_suche.html", kurs=kurs, query=query, results=[], building=True)
+        return page, 503, {"Retry-After": "5"}
+    return render_template("unterlagen_suche.html", kurs=kurs, query=query, results=results)
+
+
 # Lektionsdetail: Markdown rendern
-@app.get("/unterlagen/<slug>/<lesson_id>", endpoint="unterlagen_lektion")
+@routes.get("/unterlagen/<slug>/<lesson_id>", endpoint="unterlagen_lektion")
 def unterlagen_lektion(slug, lesson_id):
     kurs = next((c for c in load_courses() if c.get("visible", False) and c["id"] == slug), None)
     if not kurs:
         return ("<p>Kurs nicht gefunden.</p><p><a href='/unterlagen'>Zur Übersicht</a></p>"), 404
 
-    meta, html, folder = render_lesson(slug, lesson_id)
-    if not meta:
+    lesson = load_lesson(slug, lesson_id)
+    if lesson is None:
         return (f"<p>Lektion nicht gefunden.</p><p><a href='/unterlagen/{slug}'>Zurück</a></p>"), 404
 
-    # relative Links/Bilder auf Media-Route umschreiben
-    html = rewrite_relative_urls(html, slug, lesson_id )
+    # HTML mit umgeschriebenen relativen Links/Bildern aus dem Render-Cache
+    meta, html = lesson
+    compress_once(page_fingerprint(kurs, lesson))
     return render_template("unterlagen_lektion.html", kurs=kurs, meta=meta, html=html)
 
 
 # Markdown-Datei aus assets-Ordner rendern
-@app.get("/unterlagen/<slug>/assets/<path:filename>")
+@routes.get("/unterlagen/<slug>/assets/<path:filename>")
 def unterlagen_assets_markdown(slug, filename):
     """
     Rendert Markdown-Dateien aus dem assets-Ordner eines Kurses.
@@ -597,71 +660,128 @@ def unterlagen_assets_markdown(slug, filename):
     if not filename.endswith('.md'):
         return "Nur Markdown-Dateien erlaubt", 400
     
-    # Pfad zur Markdown-Datei
-    md_path = course_dir(slug) / "assets" / filename
-    if not md_path.exists() or not md_path.is_file():
-        return (f"<p>Datei nicht gefunden.</p><p><a href='/unterlagen/{slug}'>Zurück</a></p>"), 404
-    
     try:
-        # Markdown-Datei lesen und parsen
-        import markdown
-        raw = md_path.read_text(encoding="utf-8")
-        
-        # Front-Matter extrahieren (falls vorhanden)
-        meta = {}
-        body = raw
-        if raw.startswith("---"):
-            head, _, rest = raw.partition("\n---")
-            try:
-                import yaml
-                meta = yaml.safe_load(head.replace("---", "", 1)) or {}
-            except Exception:
-                meta = {}
-            body = rest.lstrip("\n")
-        
-        # Markdown zu HTML konvertieren
-        html = markdown.markdown(body, extensions=["extra", "fenced_code", "tables"])
-        
-        # Relative URLs umschreiben für assets-Kontext
-        html = rewrite_relative_urls(html, slug, "assets")
-        
-        # Titel aus Meta oder Dateiname
-        title = meta.get("title", filename.replace(".md", "").replace("_", " ").title())
-        
-        return render_template("unterlagen_lektion.html", 
-                             kurs=kurs, 
-                             meta={"title": title, **meta}, 
-                             html=html)
-    
+        page = load_asset_page(slug, filename)
     except Exception as e:
         return (f"Fehler beim Rendern der Datei: {e}", 500)
+    if page is None:
+        return (f"<p>Datei nicht gefunden.</p><p><a href='/unterlagen/{slug}'>Zurück</a></p>"), 404
+
+    meta, html = page
+    compress_once(page_fingerprint(kurs, page))
+    return render_template("unterlagen_lektion.html", kurs=kurs, meta=meta, html=html)
 
 # Media-Auslieferung für Kurs-Unterlagen (sicher)
-@app.get("/unterlagen/<slug>/media/<path:relpath>")
+@routes.get("/unterlagen/<slug>/media/<path:relpath>")
 def unterlagen_media(slug, relpath):
     """
     Liefert Dateien relativ zum Kursordner content/unterlagen/<slug>/...
     Verhindert Ausbruch aus dem Kursordner.
+
+    Mit ETag/Range/Revalidierung; mit ``?v=<fingerprint>`` ein Jahr cachebar.
+    """
+    # safe_join lehnt "..", absolute Pfade und fremde Laufwerke ab, prüft aber
+    # nur den String: Symlinks aus dem Kursordner hinaus fängt erst resolve() ab
+    target = safe_join(str(DURCHFUEHRUNGEN_DIR), slug, relpath)
+    if target is None:
+        return "Pfad nicht erlaubt", 403
+    if not os.path.isfile(target):
+        return "Datei nicht gefunden", 404
+    if not Path(target).resolve().is_relative_to((DURCHFUEHRUNGEN_DIR / slug).resolve()):
+        return "Pfad nicht erlaubt", 403
+    try:
+        return send_cached_file(target)
+    except OSError as e:
+        return (f"Fehler beim Laden der Datei: {e}", 500)
+
+# Verkleinerte Bildvarianten (srcset) für Kurs-Unterlagen
+@routes.get("/unterlagen/<slug>/bild/<int:width>/<path:relpath>")
+def unterlagen_bild(slug, width, relpath):
     """
-    base = course_dir(slug)
-    target = (base / relpath).resolve()
+    Liefert ein Bild-Derivat (Breite ``width``; ``.webp`` angehängt = WebP).
 
+    Wird beim ersten Abruf erzeugt, falls ``flask build-images`` es nicht schon getan hat.
+    """
+    derivative = find_derivative(slug, width, relpath)
+    if derivative is None:
+        return "Datei nicht gefunden", 404
+    path, source_fingerprint = derivative
     try:
-        # Sicherheitscheck: target muss innerhalb von base liegen
-        base_resolved = base.resolve()
-        if not str(target).startswith(str(base_resolved)):
-            return "Pfad nicht erlaubt", 403
-        if not target.exists() or not target.is_file():
-            return "Datei nicht gefunden", 404
-        return send_file(target)
-    except Exception as e:
+        return send_cached_file(path, version=source_fingerprint)
+    except OSError as e:
         return (f"Fehler beim Laden der Datei: {e}", 500)
 
-# Register additional modules
-register_error_handlers(app)
-register_security_features(app)
-register_monitoring_endpoints(app)
+# --- App-Factory ---
+def create_app(config: dict | None = None) -> Flask:
+    """
+    Erstellt die Flask-App.
+
+    Die Datenbank wird nur konfiguriert, nicht verbunden: Engine, Pool und
+    Tabellen entstehen beim ersten Zugriff im jeweiligen Prozess (siehe
+    ``database.LazySessionFactory``).
+
+    Args:
+        config: Optionale Überschreibungen für ``app.config``
+            (z.B. ``{"TESTING": True, "DATABASE_URL": "sqlite://"}``).
+            Von den Einstellungen aus ``Config`` werden nur ``DATABASE_URL``
+            und ``SECRET_KEY`` übernommen; die übrigen Module lesen
+            ``Config.*`` beim Import (Umgebungsvariablen setzen oder
+            ``Config`` patchen). Flask-eigene Schlüssel (``TESTING``,
+            ``TEMPLATES_AUTO_RELOAD``, ...) wirken wie gewohnt.
+
+    Returns:
+        Flask: Konfigurierte Anwendung
+    """
+    with timeline.phase("create_app"):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        if config:
+            app.config.update(config)
+        app.secret_key = app.config["SECRET_KEY"]
+
+        SessionLocal.configure(app.config["DATABASE_URL"])
+
+        routes.register(app)
+        for register in (
+            register_monitoring_endpoints,  # zuerst: misst auch die übrigen Hooks
+            register_server_timing,
+            register_compression,  # after_request läuft nach allen späteren Hooks
+            register_html_optimizer,  # läuft direkt vor der Kompression
+            register_error_handlers,
+            register_security_features,
+            register_admin_auth,
+            register_profiler,
+            register_memory_diagnostics,
+            register_startup_report,
+            register_assets,
+            register_images,
+            register_content_build,
+            register_content_watcher,
+            register_search,
+            register_templating,
+        ):
+            with timeline.phase(register.__name__):
+                register(app)
+        # Version der Kursliste für Fragment-Cache-Keys ({% cache %})
+        app.add_template_global(lambda: data_version(load_courses()), "course_registry_version")
+
+    timeline.finish()
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # Kompatibilität: ``from app.app import app`` erzeugt die App beim ersten Zugriff
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # --- Debug local ---
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,166 @@
+"""
+Asset manifest: content-fingerprinted URLs for static files and lesson media.
+
+Every file under ``static/`` and under the course folders
+(``content/unterlagen/durchfuehrungen/<slug>/...``) is mapped to a content
+fingerprint. Templates keep using ``url_for('static', filename=...)`` (and
+``url_for('unterlagen_media', ...)``): a ``url_defaults`` hook appends
+``?v=<fingerprint>``, and ``rewrite_relative_urls`` does the same for lesson HTML.
+Such URLs are served with ``Cache-Control: immutable`` for a year (see
+``file_serving.send_cached_file``); a changed file gets a new URL.
+
+The manifest is built at build time (``flask build-assets``, written to
+``ASSET_MANIFEST``) or otherwise on first use in each process. In debug mode
+every lookup re-checks the file, so edits show up immediately.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from flask import abort
+from werkzeug.security import safe_join
+
+from .config import Config
+from .file_serving import FINGERPRINT_ARG, content_hash, send_cached_file
+from .utils.markdown_loader import DURCHFUEHRUNGEN_DIR
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+
+# Namensraum -> Wurzelverzeichnis
+ROOTS = {
+    "static": STATIC_DIR,
+    "media": DURCHFUEHRUNGEN_DIR,
+}
+
+
+class AssetManifest:
+    """
+    Mapping ``(namespace, relative path) -> fingerprint``.
+
+    Args:
+        roots: Namespace -> directory to scan
+        path: Optional JSON file written by ``flask build-assets``
+    """
+
+    def __init__(self, roots: dict[str, Path], path: str | None = None):
+        self.roots = roots
+        self.path = path
+        self.verify = False
+        self._entries: dict[str, str] | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(namespace: str, relpath: str) -> str:
+        return f"{namespace}:{relpath}"
+
+    def build(self) -> dict[str, str]:
+        """Hash all files below the roots (hidden files are skipped)."""
+        entries = {}
+        for namespace, root in self.roots.items():
+            for directory, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for filename in filenames:
+                    if filename.startswith("."):
+                        continue
+                    full = os.path.join(directory, filename)
+                    relpath = os.path.relpath(full, root).replace(os.sep, "/")
+                    entries[self._key(namespace, relpath)] = content_hash(full)
+        return entries
+
+    def write(self, path: str) -> int:
+        """Build and store the manifest as JSON; returns the number of files."""
+        entries = self.build()
+        Path(path).write_text(json.dumps(entries, indent=1, sort_keys=True), encoding="utf-8")
+        return len(entries)
+
+    def _load(self) -> dict[str, str]:
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Asset-Manifest {self.path} unlesbar, baue neu: {e}")
+        return self.build()
+
+    @property
+    def entries(self) -> dict[str, str]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._load()
+        return self._entries
+
+    def reload(self) -> None:
+        with self._lock:
+            self._entries = None
+
+    def discard(self, namespace: str, relpath: str) -> None:
+        """Forget one entry (file changed); it is re-hashed on the next lookup."""
+        if self._entries is not None:
+            self._entries.pop(self._key(namespace, relpath), None)
+
+    def fingerprint(self, namespace: str, relpath: str) -> str | None:
+        """
+        Fingerprint of a file, or None if it does not exist below the root.
+        """
+        key = self._key(namespace, relpath)
+        fingerprint = self.entries.get(key)
+        if fingerprint is not None and not self.verify:
+            return fingerprint
+
+        # Unbekannt (z.B. nach dem Build hinzugefügt) oder Debug: Datei prüfen
+        target = safe_join(str(self.roots[namespace]), relpath)
+        if target is None or not os.path.isfile(target):
+            return None
+        fingerprint = content_hash(target)
+        self.entries[key] = fingerprint
+        return fingerprint
+
+    def url_suffix(self, namespace: str, relpath: str) -> str:
+        """``"?v=<fingerprint>"`` or ``""`` for unknown files."""
+        fingerprint = self.fingerprint(namespace, relpath)
+        return f"?{FINGERPRINT_ARG}={fingerprint}" if fingerprint else ""
+
+
+manifest = AssetManifest(ROOTS, Config.ASSET_MANIFEST or None)
+
+
+def register_assets(app):
+    """Fingerprint static/media URLs and serve /static with immutable caching."""
+
+    manifest.verify = app.debug or Config.FLASK_DEBUG
+
+    @app.url_defaults
+    def add_asset_fingerprint(endpoint, values):
+        if FINGERPRINT_ARG in values:
+            return
+        if endpoint == "static" and "filename" in values:
+            fingerprint = manifest.fingerprint("static", values["filename"])
+        elif endpoint == "unterlagen_media" and "slug" in values and "relpath" in values:
+            fingerprint = manifest.fingerprint("media", f"{values['slug']}/{values['relpath']}")
+        else:
+            return
+        if fingerprint:
+            values[FINGERPRINT_ARG] = fingerprint
+
+    def serve_static(filename):
+        target = safe_join(str(STATIC_DIR), filename)
+        if target is None or not os.path.isfile(target):
+            abort(404)
+        return send_cached_file(target)
+
+    # Flask-Standardroute behalten, nur die Auslieferung ersetzen
+    app.view_functions["static"] = serve_static
+
+    @app.cli.command("build-assets")
+    def build_assets():
+        """Write the asset manifest to ASSET_MANIFEST."""
+        if not manifest.path:
+            raise SystemExit("ASSET_MANIFEST ist nicht gesetzt")
+        count = manifest.write(manifest.path)
+        print(f"{count} Dateien -> {manifest.path}")
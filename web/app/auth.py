@@ -0,0 +1,198 @@
+"""
+Admin authentication for the IT-Kurs application.
+
+The admin token is exchanged once for a signed, HttpOnly session cookie
+(``/_admin/login``). Public pages therefore no longer depend on query
+parameters or headers, only on the session cookie, and can be cached by
+a proxy for anonymous visitors.
+
+State-changing requests (anything but GET/HEAD/OPTIONS) authenticated by
+the session cookie must come from this site: their ``Origin`` (or, without
+it, ``Referer``) has to name the requested host. ``SameSite=Lax`` alone
+does not cover same-site subdomains or older browsers. Scripts using the
+``X-Admin-Token`` header are not affected.
+"""
+
+import hmac
+import logging
+from functools import wraps
+from urllib.parse import urlsplit
+
+from flask import (
+    abort, current_app, g, redirect, render_template, request, session, url_for,
+)
+
+from .config import Config
+from .security import rate_limit
+
+logger = logging.getLogger(__name__)
+
+ADMIN_SESSION_KEY = "is_admin"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _token_matches(candidate: str | None) -> bool:
+    """Constant-time comparison against the configured admin token."""
+    if not Config.ADMIN_TOKEN or not candidate:
+        return False
+    return hmac.compare_digest(candidate.encode(), Config.ADMIN_TOKEN.encode())
+
+
+def _has_session_cookie() -> bool:
+    return current_app.config["SESSION_COOKIE_NAME"] in request.cookies
+
+
+def is_admin_session() -> bool:
+    """
+    Prüft, ob die aktuelle Session als Admin angemeldet ist.
+
+    Die Session wird nur gelesen, wenn überhaupt ein Session-Cookie
+    mitgeschickt wurde – anonyme Requests bleiben so frei von Session-Zugriffen.
+    Die Antwort wird in jedem Fall als cookie-abhängig markiert.
+    """
+    g.varies_on_session = True
+    if not _has_session_cookie():
+        return False
+    return session.get(ADMIN_SESSION_KEY) is True
+
+
+def is_admin_request() -> bool:
+    """Admin-Session oder gültiger ``X-Admin-Token`` Header."""
+    return is_admin_session() or _token_matches(request.headers.get("X-Admin-Token"))
+
+
+def is_same_origin_request() -> bool:
+    """``Origin`` bzw. ``Referer`` zeigt auf den angefragten Host (CSRF-Schutz)."""
+    source = request.headers.get("Origin") or request.headers.get("Referer")
+    if not source or source == "null":
+        return False
+    parts = urlsplit(source)
+    # Schema nicht vergleichen: hinter dem Proxy kommt https als http an
+    return parts.scheme in ("http", "https") and parts.netloc == request.host
+
+
+def _check_cookie_csrf() -> None:
+    if request.method not in SAFE_METHODS and not is_same_origin_request():
+        logger.warning(f"Admin-{request.method} ohne passenden Origin von {request.remote_addr}: "
+                       f"{request.headers.get('Origin') or request.headers.get('Referer')!r}")
+        abort(403)
+
+
+def _login_session() -> None:
+    session.clear()
+    session[ADMIN_SESSION_KEY] = True
+    session.permanent = True
+
+
+def _safe_next(target: str | None) -> str:
+    """Nur lokale Weiterleitungen zulassen (kein Open Redirect)."""
+    if not target:
+        return url_for("admin_home")
+    parts = urlsplit(target)
+    if parts.scheme or parts.netloc or not target.startswith("/"):
+        return url_for("admin_home")
+    return target
+
+
+def require_admin(f):
+    """
+    Decorator für Admin-Routen.
+
+    Akzeptiert die Admin-Session (ändernde Requests nur vom selben Origin)
+    oder – für Skripte – den Header ``X-Admin-Token``. Ein veralteter
+    ``?admin=<token>`` Link wird nur bei GET einmalig gegen eine Session
+    getauscht und ohne Token weitergeleitet.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        legacy_token = request.args.get("admin")
+        if legacy_token is not None:
+            if request.method != "GET" or not _token_matches(legacy_token):
+                abort(403)
+            _login_session()
+            args_without_token = {k: v for k, v in request.args.items() if k != "admin"}
+            return redirect(url_for(request.endpoint, **request.view_args, **args_without_token))
+        if not _token_matches(request.headers.get("X-Admin-Token")):
+            if not is_admin_session():
+                abort(403)
+            _check_cookie_csrf()
+
+        g.is_admin_response = True
+        return f(*args, **kwargs)
+    return decorated
+
+
+def apply_cache_headers(response):
+    """
+    Setzt Cache-Header abhängig davon, ob die Antwort personalisiert ist.
+
+    - Admin-Antworten: nie cachen
+    - Seiten, die vom Session-Cookie abhängen: ``Vary: Cookie``; für anonyme
+      Besucher optional ``Cache-Control: public`` (PUBLIC_CACHE_MAX_AGE)
+    - Alles andere bleibt unverändert (kein unnötiges ``Vary``)
+    """
+    if g.get("is_admin_response"):
+        response.headers["Cache-Control"] = "private, no-store"
+        response.vary.add("Cookie")
+        return response
+
+    if not g.get("varies_on_session"):
+        return response
+
+    response.vary.add("Cookie")
+
+    if (
+        Config.PUBLIC_CACHE_MAX_AGE > 0
+        and request.method == "GET"
+        and response.status_code == 200
+        and "Cache-Control" not in response.headers
+    ):
+        if _has_session_cookie() or session.modified:
+            response.headers["Cache-Control"] = "private, no-cache"
+        else:
+            response.headers["Cache-Control"] = f"public, max-age={Config.PUBLIC_CACHE_MAX_AGE}"
+    return response
+
+
+def register_admin_auth(app):
+    """Register admin login/logout routes and session handling."""
+
+    app.config.update(
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE="Lax",
+        SESSION_COOKIE_SECURE=Config.SESSION_COOKIE_SECURE,
+        PERMANENT_SESSION_LIFETIME=Config.ADMIN_SESSION_LIFETIME,
+    )
+
+    @app.before_request
+    def reset_admin_flags():
+        # g kann bei verschachtelten App-Kontexten (Tests, CLI) überleben
+        g.varies_on_session = False
+        g.is_admin_response = False
+
+    @app.context_processor
+    def inject_admin_flag():
+        return dict(is_admin=is_admin_session())
+
+    @app.after_request
+    def admin_cache_headers(response):
+        return apply_cache_headers(response)
+
+    @app.route("/_admin/login", methods=["GET", "POST"], endpoint="admin_login")
+    @rate_limit(limit=10, window=300)
+    def admin_login():
+        next_url = request.values.get("next")
+        if request.method == "POST":
+            if _token_matches(request.form.get("token")):
+                _login_session()
+                logger.info(f"Admin login from {request.remote_addr}")
+                return redirect(_safe_next(next_url))
+            logger.warning(f"Failed admin login from {request.remote_addr}")
+            return render_template("admin_login.html", next=next_url, error=True), 403
+        return render_template("admin_login.html", next=next_url, error=False)
+
+    @app.post("/_admin/logout", endpoint="admin_logout")
+    def admin_logout():
+        _check_cookie_csrf()
+        session.pop(ADMIN_SESSION_KEY, None)
+        return redirect(url_for("index"))
@@ -5,11 +5,15 @@ This module provides a lightweight caching layer for frequently accessed
 data like courses and content to improve performance.
 """
 
+import math
 import time
 import logging
-from typing import Any, Optional, Callable
+from typing import Any, Optional, Callable, Union
 from functools import wraps
 
+from .config import Config
+from .metrics import CACHE_REQUESTS
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +23,8 @@ class SimpleCache:
     def __init__(self):
         self._cache = {}
         self._timestamps = {}
+        self.hits = 0
+        self.misses = 0
     
     def get(self, key: str, default_ttl: int = 300) -> Optional[Any]:
         """
@@ -32,15 +38,27 @@ class SimpleCache:
             Cached value or None if expired/not found
         """
         if key not in self._cache:
+            self._record(hit=False)
             return None
             
         # Check if expired
         if time.time() - self._timestamps[key] > default_ttl:
             self.delete(key)
+            self._record(hit=False)
             return None
             
+        self._record(hit=True)
         return self._cache[key]
     
+    def _record(self, hit: bool) -> None:
+        """Count hits/misses locally and for Prometheus."""
+        if hit:
+            self.hits += 1
+            CACHE_REQUESTS.inc(result="hit")
+        else:
+            self.misses += 1
+            CACHE_REQUESTS.inc(result="miss")
+    
     def set(self, key: str, value: Any) -> None:
         """
         Set item in cache.
@@ -75,13 +93,14 @@ class SimpleCache:
 cache = SimpleCache()
 
 
-def cached(key_func: Optional[Callable] = None, ttl: int = 300):
+def cached(key_func: Optional[Callable] = None, ttl: Union[int, Callable[[], float]] = 300):
     """
     Decorator for caching function results.
     
     Args:
         key_func: Function to generate cache key from args
-        ttl: Time to live in seconds
+        ttl: Time to live in seconds, or a function returning it per lookup
+            (0: call ``func`` every time)
     """
     def decorator(func):
         @wraps(func)
@@ -92,8 +111,12 @@ def cached(key_func: Optional[Callable] = None, ttl: int = 300):
             else:
                 cache_key = f"{func.__name__}:{hash(str(args) + str(kwargs))}"
             
+            lifetime = ttl() if callable(ttl) else ttl
+            if lifetime <= 0:
+                return func(*args, **kwargs)  # TTL 0: nicht cachen
+
             # Try to get from cache
-            cached_result = cache.get(cache_key, ttl)
+            cached_result = cache.get(cache_key, lifetime)
             if cached_result is not None:
                 logger.debug(f"Cache hit for {cache_key}")
                 return cached_result
@@ -108,6 +131,32 @@ def cached(key_func: Optional[Callable] = None, ttl: int = 300):
     return decorator
 
 
+_content_watched = False
+
+
+def set_content_watched(watched: bool) -> None:
+    """Called by the content watcher when it starts or stops."""
+    global _content_watched
+    _content_watched = watched
+
+
+def content_cache_ttl() -> float:
+    """
+    TTL for content entries (courses, lessons): unlimited while a content
+    watcher invalidates them on change, else ``CONTENT_CACHE_TTL``.
+    """
+    return math.inf if _content_watched else Config.CONTENT_CACHE_TTL
+
+
+def rendered_content_ttl() -> float:
+    """
+    TTL for rendered pages (lesson lists, lessons, ``assets/*.md``):
+    unlimited while a content watcher invalidates them, else
+    ``RENDER_CACHE_TTL`` (default 0: rendered per request, edits show at once).
+    """
+    return math.inf if _content_watched else Config.RENDER_CACHE_TTL
+
+
 def cache_courses_key(*args, **kwargs):
     """Generate cache key for courses."""
     return "courses:all"
@@ -123,10 +172,23 @@ def cache_lessons_key(course_slug, *args, **kwargs):
     return f"lessons:{course_slug}"
 
 
+def cache_lesson_key(course_slug, lesson_id, *args, **kwargs):
+    """Generate cache key for a rendered lesson."""
+    return f"lesson:{course_slug}:{lesson_id}"
+
+
+def cache_asset_page_key(course_slug, filename, *args, **kwargs):
+    """Generate cache key for a rendered assets/*.md page."""
+    return f"asset_page:{course_slug}:{filename}"
+
+
 def get_cache_stats() -> dict:
     """Get cache statistics."""
+    total = cache.hits + cache.misses
     return {
         "size": cache.size(),
         "keys": cache.keys(),
-        "hit_rate": "Not implemented in simple cache"
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_rate": cache.hits / total if total else 0.0
     }
@@ -0,0 +1,241 @@
+"""
+Response compression for the IT-Kurs application.
+
+The encoding is negotiated from ``Accept-Encoding``: brotli when the
+optional ``brotli`` package is installed, otherwise gzip. Responses carry
+``Vary: Accept-Encoding``.
+
+- Static files and lesson media (``file_serving.send_cached_file``) and
+  pages whose view calls :func:`compress_once` (lesson pages) are compressed
+  once per content fingerprint at the highest level and kept in
+  :data:`variants`. Those pages also get an ETag and answer 304s.
+- Other dynamic text responses are compressed per request at a moderate
+  level, buffered ones only from ``COMPRESSION_MIN_SIZE`` bytes on; streamed
+  responses go through an incremental compressor chunk by chunk.
+
+In offload mode (``FILE_OFFLOAD``) files are not compressed here; the proxy
+does that (nginx ``gzip_static``/``gzip on``).
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator
+
+from flask import request
+
+from .config import Config
+from .timing import phase
+
+try:
+    import brotli
+except ImportError:  # optional: ohne brotli nur gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+_CACHE_MARK = "compression.once"
+
+
+def available_encodings() -> list[str]:
+    """Supported encodings in server preference order."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def is_compressible(mimetype: str | None) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate(accept_encodings) -> str | None:
+    """
+    Pick the encoding for a request.
+
+    Args:
+        accept_encodings: ``request.accept_encodings`` (Werkzeug ``Accept``)
+
+    Returns:
+        str | None: ``"br"``, ``"gzip"`` or None (send uncompressed)
+    """
+    if not Config.COMPRESSION_ENABLED:
+        return None
+    # Höchste Qualität gewinnt, bei Gleichstand die Server-Reihenfolge
+    best = max(available_encodings(), key=lambda encoding: accept_encodings[encoding])
+    return best if accept_encodings[best] > 0 else None
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    Compress ``data`` in one go.
+
+    Args:
+        data: Body to compress
+        encoding: ``"br"`` or ``"gzip"``
+        best: Highest level (for variants that are compressed only once)
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else Config.BROTLI_QUALITY)
+    # mtime=0: gleiche Eingabe -> gleiche Bytes
+    return gzip.compress(data, compresslevel=9 if best else Config.GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a streamed body; every chunk is flushed so the client gets it right away."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=Config.BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(Config.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield process(chunk) + flush()
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+class VariantCache:
+    """
+    Compressed variants by content fingerprint, least recently used evicted.
+
+    Args:
+        max_entries: Maximum number of (fingerprint, encoding) entries
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str, encoding: str, load: Callable[[], bytes]) -> bytes:
+        """
+        Compressed body for ``fingerprint``; compresses ``load()`` on a miss.
+        """
+        key = (fingerprint, encoding)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        # Ausserhalb des Locks: brotli-11 auf einer grossen Seite dauert
+        with phase("compress"):
+            body = compress(load(), encoding, best=True)
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(len(body) for body in self._entries.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+variants = VariantCache(Config.COMPRESSION_CACHE_SIZE)
+
+
+def file_encoding(path: str, mimetype: str | None, size: int) -> str | None:
+    """Encoding for a file response, or None to send it as is."""
+    if size < Config.COMPRESSION_MIN_SIZE or not is_compressible(mimetype):
+        return None
+    return negotiate(request.accept_encodings)
+
+
+def compress_once(fingerprint: str | None = None) -> None:
+    """
+    Mark the current response as the same for every request with the same content.
+
+    It is then compressed once per content hash (see :data:`variants`) and
+    gets an ETag, so unchanged pages are answered with 304.
+
+    Args:
+        fingerprint: Version of everything the page is rendered from (see
+            :func:`~app.html_optimizer.page_fingerprint`); used as cache key
+            and ETag instead of a hash of the body. None: hash the body.
+    """
+    request.environ[_CACHE_MARK] = fingerprint or True
+
+
+def once_marked() -> bool:
+    """Whether the current view called :func:`compress_once`."""
+    return bool(request.environ.get(_CACHE_MARK))
+
+
+def once_fingerprint() -> str | None:
+    """The fingerprint passed to :func:`compress_once`, if any."""
+    value = request.environ.get(_CACHE_MARK)
+    return value if isinstance(value, str) else None
+
+
+def register_compression(app):
+    """Compress text responses according to ``Accept-Encoding``."""
+
+    @app.after_request
+    def compress_response(response):
+        if (not Config.COMPRESSION_ENABLED or response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or not is_compressible(response.mimetype)):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        if response.status_code != 200:
+            return response
+        encoding = negotiate(request.accept_encodings)
+
+        if response.is_streamed:
+            if encoding is not None:
+                response.response = compress_stream(response.response, encoding)
+                response.headers["Content-Encoding"] = encoding
+                response.headers.pop("Content-Length", None)
+            return response
+
+        data = response.get_data()
+        if once_marked():
+            if len(data) < Config.COMPRESSION_MIN_SIZE:
+                encoding = None
+            fingerprint = once_fingerprint() or hashlib.sha256(data).hexdigest()[:16]
+            # Jede Kodierung ist eine eigene Repräsentation mit eigenem ETag
+            response.set_etag(f"{fingerprint}-{encoding}" if encoding else fingerprint)
+            response.make_conditional(request)
+            if response.status_code == 304 or encoding is None:
+                return response
+            response.set_data(variants.get(fingerprint, encoding, lambda: data))
+            response.headers["Content-Encoding"] = encoding
+            return response
+
+        if encoding is None or len(data) < Config.COMPRESSION_MIN_SIZE:
+            return response
+        with phase("compress"):
+            response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -7,6 +7,8 @@ environment variables, database setup, and application settings.
 
 import os
 import logging
+import tempfile
+from datetime import timedelta
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -28,6 +30,11 @@ class Config:
     
     # Admin configuration
     ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+    ADMIN_SESSION_LIFETIME = timedelta(hours=int(os.getenv("ADMIN_SESSION_HOURS", "12")))
+    SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "0") == "1"
+
+    # Cache-Control für öffentliche Seiten anonymer Besucher (0 = aus)
+    PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", "0"))
     
     # Database configuration
     DATABASE_URL = os.getenv("DATABASE_URL")
@@ -36,6 +43,9 @@ class Config:
     EMAIL_PROVIDER = os.getenv("EMAIL_PROVIDER")
     RESEND_API_KEY = os.getenv("RESEND_API_KEY")
     EMAIL_FROM = os.getenv("EMAIL_FROM", "info@dieti-it.ch")
+    # MX-Prüfung der Anmelde-Adresse (Zeitbudget in Sekunden)
+    EMAIL_CHECK_DELIVERABILITY = os.getenv("EMAIL_CHECK_DELIVERABILITY", "0") == "1"
+    EMAIL_DNS_TIMEOUT = float(os.getenv("EMAIL_DNS_TIMEOUT", "0.5"))
     
     # Payment configuration
     PAYEE_DISPLAY_NAME = os.getenv("PAYEE_DISPLAY_NAME", "IT-Kurs Dietikon")
@@ -46,18 +56,93 @@ class Config:
     PAYMENT_PURPOSE_PREFIX = os.getenv("PAYMENT_PURPOSE_PREFIX", "Kursgebühr")
     PAYMENT_EMAIL = os.getenv("PAYMENT_EMAIL", "")
     
+    # Rate limiting: memory:// (pro Prozess), sqlite:///pfad.db (pro Host)
+    # oder redis://host:6379/0 (mehrere Hosts)
+    RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "memory://")
+    RATE_LIMIT_TIMEOUT = float(os.getenv("RATE_LIMIT_TIMEOUT", "0.05"))
+
+    # Prometheus-Metriken: Verzeichnis für die Aggregation über mehrere
+    # gunicorn-Worker (leer = nur aktueller Prozess)
+    METRICS_DIR = os.getenv("METRICS_DIR", "")
+
+    # Server-Timing-Header und Log für langsame Requests
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+    # Asset-Manifest (von `flask build-assets` geschrieben; leer = beim Start bauen)
+    ASSET_MANIFEST = os.getenv("ASSET_MANIFEST", "")
+
+    # Datei-Auslieferung über den Reverse Proxy: "" (in-process), "x-accel-redirect"
+    # (nginx) oder "x-sendfile" (Apache/lighttpd). ROOT wird auf PREFIX abgebildet.
+    FILE_OFFLOAD = os.getenv("FILE_OFFLOAD", "")
+    FILE_OFFLOAD_ROOT = os.getenv("FILE_OFFLOAD_ROOT") or os.path.dirname(os.path.abspath(__file__))
+    FILE_OFFLOAD_PREFIX = os.getenv("FILE_OFFLOAD_PREFIX", "/_protected")
+
+    # Antwort-Kompression (gzip; brotli falls installiert)
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Bytes
+    COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", "256"))  # Varianten
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))  # pro Request komprimierte Antworten
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+    # Templates: Fragment-Cache ({% cache %}), Bytecode-Cache ("" = aus), Reload nur im Debug
+    FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", "3600"))
+    JINJA_BYTECODE_DIR = os.getenv("JINJA_BYTECODE_DIR") or os.path.join(tempfile.gettempdir(), "it-kurs-jinja")
+    TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "0") == "1"
+
+    # Gecachte Seiten: kritisches CSS inline, Rest verzögert, HTML minifiziert (einmal pro Inhalt)
+    HTML_OPTIMIZE = os.getenv("HTML_OPTIMIZE", "1") == "1"
+    HTML_OPTIMIZE_CACHE_SIZE = int(os.getenv("HTML_OPTIMIZE_CACHE_SIZE", "128"))
+
+    # Responsive Bilder: Derivate (Pillow) im Cache-Verzeichnis, nach Quell-Hash benannt
+    IMAGE_DERIVATIVES = os.getenv("IMAGE_DERIVATIVES", "1") == "1"
+    IMAGE_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_WIDTHS", "480,960,1600").split(",") if w.strip())
+    IMAGE_SIZES = os.getenv("IMAGE_SIZES", "(max-width: 1000px) 100vw, 1000px")
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+    IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "it-kurs-images")
+    IMAGE_BUILD_WORKERS = int(os.getenv("IMAGE_BUILD_WORKERS", "0"))  # 0 = CPUs
+
+    # Inhalte: Render-Cache und inkrementeller Build (flask build-content)
+    CONTENT_CACHE_TTL = int(os.getenv("CONTENT_CACHE_TTL", "600"))  # Sekunden
+    # Gerenderte Lektionen/Seiten ohne Watcher: 0 = pro Anfrage neu rendern
+    RENDER_CACHE_TTL = int(os.getenv("RENDER_CACHE_TTL", "0"))
+    CONTENT_BUILD_STATE = os.getenv("CONTENT_BUILD_STATE") or os.path.join(
+        tempfile.gettempdir(), "it-kurs-content-build.json")
+    CONTENT_STATE_CHECK_INTERVAL = float(os.getenv("CONTENT_STATE_CHECK_INTERVAL", "2"))
+    # Content-Watcher: "" (aus), "auto" (inotify, sonst Polling), "inotify" oder "poll"
+    CONTENT_WATCH = os.getenv("CONTENT_WATCH", "")
+    CONTENT_WATCH_INTERVAL = float(os.getenv("CONTENT_WATCH_INTERVAL", "1"))
+    # Offline-Lesen: Service Worker + Precache-Manifest pro Kurs
+    OFFLINE_READER = os.getenv("OFFLINE_READER", "1") == "1"
+    OFFLINE_MAX_FILE_BYTES = int(os.getenv("OFFLINE_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+    # Volltextsuche: persistierter Index (nicht im Content-Volume)
+    SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH") or os.path.join(
+        tempfile.gettempdir(), "it-kurs-search-index.json")
+    SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "20"))
+
+    # Health-Checks: Hintergrund-Prüfung statt DB-Abfrage pro Probe
+    HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+    HEALTH_MAX_AGE = float(os.getenv("HEALTH_MAX_AGE", "0"))  # 0 = 3 Intervalle
+
+    # Sampling-Profiler für Admins (standardmässig aus)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+    PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "30"))
+
     # Application settings
     TIMEZONE = TZ
 
 
-def create_database_engine():
+def create_database_engine(db_url: str | None = None):
     """
     Erstellt und konfiguriert die SQLAlchemy Database Engine.
     
+    Args:
+        db_url: Datenbank-URL (Default: Config.DATABASE_URL)
+    
     Returns:
         Engine | None: Database engine oder None falls nicht konfiguriert
     """
-    db_url = Config.DATABASE_URL
+    db_url = db_url or Config.DATABASE_URL
     if not db_url:
         logger.warning("DATABASE_URL nicht gesetzt - Datenbank nicht verfügbar")
         return None
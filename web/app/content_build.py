@@ -0,0 +1,307 @@
+"""
+Incremental content build for the course materials.
+
+Every render-cache entry depends on a set of files below ``content/``:
+
+- ``courses:all``: ``meta/courses.json``
+- ``lessons:<slug>``: all ``L*/index.md`` of the course (titles, order)
+- ``lesson:<slug>:<Lxx>``: the lesson's ``index.md`` and every local file it
+  embeds or links to (images, ``assets/*.md``, PDFs; their fingerprints end
+  up in the HTML)
+- ``asset_page:<slug>:<file>``: an ``assets/*.md`` page and its local links
+
+Only courses listed in ``courses.json`` take part, so removing a course
+drops its entries.
+
+``flask build-content`` hashes all inputs, compares them with the build
+state (``CONTENT_BUILD_STATE``), re-renders only the entries whose inputs
+changed (for their output hash) and writes the new state. Running workers
+notice a new state file (one ``stat`` every ``CONTENT_STATE_CHECK_INTERVAL``
+seconds) and drop exactly the cache entries whose rendered output changed,
+plus the asset fingerprints of the changed files.
+
+The build does not hand rendered pages to the workers: it only decides
+what to invalidate, and each worker renders an entry on its next request.
+Without a watcher (``CONTENT_WATCH``) rendered pages are kept only for
+``RENDER_CACHE_TTL`` (default 0), so edits show up without a build.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote
+
+import click
+from werkzeug.security import safe_join
+
+from .assets import manifest
+from .cache import (
+    cache, cache_asset_page_key, cache_courses_key, cache_lesson_key, cache_lessons_key,
+)
+from .config import Config
+from .file_serving import content_hash
+from .utils.content_loader import CONTENT_DIR, META_DIR
+from .utils.markdown_loader import DURCHFUEHRUNGEN_DIR, list_lessons, load_asset_page, load_lesson
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+# Markdown-Links/Bilder ](ziel) sowie src=/href= in eingebettetem HTML
+_LINK = re.compile(r"""(?:\]\(\s*<?|\b(?:src|href)=["'])(?P<url>[^)"'\s>]+)""")
+_EXTERNAL = ("http://", "https://", "/", "#", "mailto:", "tel:", "data:")
+
+
+@dataclass
+class BuildResult:
+    """Outcome of one incremental build."""
+
+    changed_files: list[str] = field(default_factory=list)
+    rendered: list[str] = field(default_factory=list)
+    invalidated: list[str] = field(default_factory=list)
+
+
+def _output_hash(value) -> str:
+    data = value if isinstance(value, bytes) else json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def local_links(md_path: Path, course: Path, lesson_id: str) -> list[Path]:
+    """
+    Local files a Markdown page refers to, resolved like ``rewrite_relative_urls``.
+
+    Args:
+        md_path: The Markdown file
+        course: Course folder (``durchfuehrungen/<slug>``)
+        lesson_id: Folder of the page (``Lxx`` or ``assets``)
+    """
+    links = []
+    for m in _LINK.finditer(md_path.read_text(encoding="utf-8")):
+        url = m.group("url")
+        if url.startswith(_EXTERNAL):
+            continue
+        url = unquote(url.partition("#")[0].partition("?")[0])
+        while url.startswith("./"):
+            url = url[2:]
+        while url.startswith("../"):
+            url = url[3:]
+        if not url.startswith(("assets/", "docs/", "static/")):
+            url = f"{lesson_id}/{url}"
+        target = safe_join(str(course), url)
+        if target is not None and Path(target) != md_path and not os.path.isdir(target):
+            links.append(Path(target))
+    return list(dict.fromkeys(links))
+
+
+class ContentBuild:
+    """
+    Dependency graph, build state and cache invalidation for the content.
+
+    Args:
+        state_path: JSON file with input hashes and output hashes per entry
+        content_dir: Root for the relative paths stored in the state
+    """
+
+    def __init__(self, state_path: str, content_dir: Path = CONTENT_DIR):
+        self.state_path = state_path
+        self.content_dir = content_dir
+        self._seen_mtime = None
+        self._seen_state: dict = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _rel(self, path: Path) -> str:
+        return path.relative_to(self.content_dir).as_posix()
+
+    def graph(self) -> dict[str, list[Path]]:
+        """Cache key -> input files (existing or not)."""
+        courses_json = META_DIR / "courses.json"
+        graph = {cache_courses_key(): [courses_json]}
+        try:
+            slugs = [c["id"] for c in json.loads(courses_json.read_text(encoding="utf-8")) if "id" in c]
+        except (OSError, ValueError) as e:
+            logger.warning(f"courses.json nicht lesbar: {e}")
+            return graph
+
+        for slug in slugs:
+            course = DURCHFUEHRUNGEN_DIR / slug
+            if not course.is_dir():
+                continue
+            lessons = sorted(course.glob("L*/index.md"))
+            graph[cache_lessons_key(slug)] = lessons
+            for md in lessons:
+                lesson_id = md.parent.name
+                graph[cache_lesson_key(slug, lesson_id)] = [md, *local_links(md, course, lesson_id)]
+            assets = course / "assets"
+            for md in sorted(assets.rglob("*.md")):
+                key = cache_asset_page_key(slug, md.relative_to(assets).as_posix())
+                graph[key] = [md, *local_links(md, course, "assets")]
+        return graph
+
+    def render(self, key: str):
+        """Render one entry without the cache (for its output hash)."""
+        kind, _, rest = key.partition(":")
+        if kind == "courses":
+            return (META_DIR / "courses.json").read_bytes()
+        if kind == "lessons":
+            return list_lessons.__wrapped__(rest)
+        slug, _, name = rest.partition(":")
+        if kind == "lesson":
+            return load_lesson.__wrapped__(slug, name)
+        if kind == "asset_page":
+            return load_asset_page.__wrapped__(slug, name)
+        raise ValueError(f"Unbekannter Inhalt: {key}")
+
+    def load_state(self) -> dict:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if state.get("version") == STATE_VERSION else {}
+
+    def _write_state(self, state: dict) -> None:
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)  # Worker lesen nie eine halbe Datei
+
+    def build(self, force: bool = False) -> BuildResult:
+        """
+        Re-render what changed since the last build and write the new state.
+
+        Args:
+            force: Re-render every entry
+
+        Returns:
+            BuildResult: Changed input files, re-rendered and invalidated keys
+        """
+        # Fingerprints frisch berechnen, nicht aus einem alten Manifest
+        verify, manifest.verify = manifest.verify, True
+        try:
+            return self._build(force)
+        finally:
+            manifest.verify = verify
+
+    def _build(self, force: bool) -> BuildResult:
+        previous = self.load_state()
+        old_files = previous.get("files", {})
+        old_entries = previous.get("entries", {})
+
+        graph = self.graph()
+        files = {}
+        for deps in graph.values():
+            for path in deps:
+                rel = self._rel(path)
+                if rel not in files:
+                    files[rel] = content_hash(path) if path.is_file() else None
+        changed_files = sorted(f for f in files.keys() | old_files.keys()
+                               if files.get(f) != old_files.get(f))
+
+        result = BuildResult(changed_files=changed_files)
+        changed = set(changed_files)
+        entries = {}
+        for key, deps in graph.items():
+            names = [self._rel(path) for path in deps]
+            old = old_entries.get(key)
+            if not force and old is not None and old["deps"] == names and changed.isdisjoint(names):
+                entries[key] = old
+                continue
+            output = _output_hash(self.render(key))
+            result.rendered.append(key)
+            if old is None or old["output"] != output:
+                result.invalidated.append(key)
+            entries[key] = {"deps": names, "output": output}
+        result.invalidated += sorted(old_entries.keys() - entries.keys())
+
+        if previous and not changed_files and not result.invalidated:
+            return result
+        self._write_state({
+            "version": STATE_VERSION,
+            "generation": previous.get("generation", 0) + 1,
+            "files": files,
+            "entries": entries,
+        })
+        return result
+
+    def invalidate(self, old: dict, new: dict) -> list[str]:
+        """
+        Drop the cache entries whose output differs between two states.
+
+        Returns:
+            list[str]: The invalidated keys
+        """
+        old_entries, new_entries = old.get("entries", {}), new.get("entries", {})
+        keys = sorted(key for key in old_entries.keys() | new_entries.keys()
+                      if old_entries.get(key, {}).get("output") != new_entries.get(key, {}).get("output"))
+        for key in keys:
+            cache.delete(key)
+
+        # Geänderte Medien: Fingerprint neu berechnen (neue URL im HTML)
+        media_root = DURCHFUEHRUNGEN_DIR.relative_to(self.content_dir).as_posix() + "/"
+        old_files, new_files = old.get("files", {}), new.get("files", {})
+        for rel in old_files.keys() | new_files.keys():
+            if rel.startswith(media_root) and old_files.get(rel) != new_files.get(rel):
+                manifest.discard("media", rel[len(media_root):])
+        return keys
+
+    def refresh(self, force: bool = False) -> list[str]:
+        """
+        Pick up a new state file written by another process (throttled).
+
+        Args:
+            force: Check now, regardless of ``CONTENT_STATE_CHECK_INTERVAL``
+
+        Returns:
+            list[str]: Cache keys dropped in this process
+        """
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return []
+        if not self._lock.acquire(blocking=not force):
+            return []
+        try:
+            self._next_check = now + Config.CONTENT_STATE_CHECK_INTERVAL
+            try:
+                mtime = os.stat(self.state_path).st_mtime_ns
+            except OSError:
+                return []
+            if mtime == self._seen_mtime:
+                return []
+            state = self.load_state()
+            keys = self.invalidate(self._seen_state, state)
+            self._seen_mtime, self._seen_state = mtime, state
+            if keys:
+                logger.info(f"Content-Build {state.get('generation')}: {len(keys)} Cache-Einträge verworfen")
+            return keys
+        finally:
+            self._lock.release()
+
+
+content_build = ContentBuild(Config.CONTENT_BUILD_STATE)
+
+
+def register_content_build(app):
+    """Pick up content builds in every worker and register ``flask build-content``."""
+
+    @app.before_request
+    def pick_up_content_build():
+        content_build.refresh()
+
+    @app.cli.command("build-content")
+    @click.option("--force", is_flag=True, help="Alle Einträge neu rendern")
+    def build_content(force):
+        """Find changed content entries and update CONTENT_BUILD_STATE."""
+        started = time.perf_counter()
+        result = content_build.build(force=force)
+        print(f"{len(result.changed_files)} Dateien geändert, {len(result.rendered)} neu gerendert, "
+              f"{len(result.invalidated)} Cache-Einträge ungültig "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms) -> {content_build.state_path}")
+        for key in result.invalidated:
+            print(f"  {key}")
@@ -0,0 +1,332 @@
+"""
+Filesystem watcher for the course content (hot reload without stale caches).
+
+With ``CONTENT_WATCH`` set, a background thread watches ``content/meta`` and
+``content/unterlagen`` via inotify (Linux, through libc; no extra package)
+or, as fallback, by polling mtimes every ``CONTENT_WATCH_INTERVAL`` seconds.
+Docker Desktop bind mounts on macOS/Windows deliver no inotify events; use
+``CONTENT_WATCH=poll`` there.
+
+On a change, the incremental build (``content_build``) runs and writes the
+new build state. Every worker drops exactly the affected course, lesson
+and asset-page entries when it sees that state. With several workers one of
+them watches: the one holding the lock file next to ``CONTENT_BUILD_STATE``.
+The others retry periodically and take over if that worker exits. While it
+watches, the leader keeps its pid in the lock file; the others rely on the
+watcher only if that pid is set and alive.
+
+While a watcher runs, content cache entries never expire on their own
+(``cache.content_cache_ttl``, ``cache.rendered_content_ttl``).
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import fcntl
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .cache import set_content_watched
+from .config import Config
+from .content_build import content_build
+from .utils.content_loader import CONTENT_DIR, META_DIR
+
+logger = logging.getLogger(__name__)
+
+WATCH_ROOTS = (META_DIR, CONTENT_DIR / "unterlagen")
+DEBOUNCE_SECONDS = 0.2
+LEADER_RETRY_SECONDS = 5.0
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyBackend:
+    """Recursive inotify watch on directory trees (new subdirectories included)."""
+
+    def __init__(self, roots: Iterable[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fehlgeschlagen")
+        self._dirs: dict[int, str] = {}
+        for root in roots:
+            self._watch_tree(str(root))
+
+    def _watch_tree(self, top: str) -> None:
+        for directory, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "fs.inotify.max_user_watches erreicht")
+                continue
+            self._dirs[wd] = directory
+
+    def wait(self, timeout: float) -> set[str]:
+        """Changed paths within ``timeout`` seconds (empty set if none)."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Compares (mtime, size) of all files every ``interval`` seconds."""
+
+    def __init__(self, roots: Iterable[Path], interval: float):
+        self.roots = [str(root) for root in roots]
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for directory, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> set[str]:
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                   if snapshot.get(path) != self._snapshot.get(path)}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def create_backend(mode: str, roots: Iterable[Path], interval: float):
+    """
+    Watcher backend for ``CONTENT_WATCH`` (``auto``, ``inotify`` or ``poll``).
+    """
+    roots = [root for root in roots if os.path.isdir(root)]
+    if mode in ("auto", "inotify", "1"):
+        try:
+            return InotifyBackend(roots)
+        except (OSError, AttributeError) as e:  # kein Linux, Limit erreicht, ...
+            if mode == "inotify":
+                raise
+            logger.info(f"inotify nicht verfügbar ({e}) – Polling alle {interval}s")
+    return PollingBackend(roots, interval)
+
+
+class ContentWatcher:
+    """
+    Background thread: watch the content and run ``on_change`` for each batch.
+
+    Args:
+        on_change: Called with the changed paths (debounced)
+        roots: Directories to watch
+        mode: ``auto``, ``inotify`` or ``poll``
+        interval: Polling interval in seconds
+        lock_path: Lock file electing one watching process; None = always watch
+    """
+
+    def __init__(self, on_change: Callable[[set[str]], None], roots: Iterable[Path] = WATCH_ROOTS,
+                 mode: str = "auto", interval: float = 1.0, lock_path: str | None = None):
+        self.on_change = on_change
+        self.roots = list(roots)
+        self.mode = mode
+        self.interval = interval
+        self.lock_path = lock_path
+        self.leader = False
+        self.active = False
+        self.backend_name = None
+        self._lock_file = None
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _try_lead(self) -> bool:
+        if self.lock_path is None:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _mark_leader(self, pid: int | None) -> None:
+        # pid im Lock-File: die anderen Prozesse sehen, dass wirklich beobachtet wird
+        if self._lock_file is not None:
+            self._lock_file.truncate(0)
+            self._lock_file.write(str(pid) if pid else "")
+            self._lock_file.flush()
+
+    def _leader_running(self) -> bool:
+        """Whether the process holding the lock is watching (its pid is marked and alive)."""
+        try:
+            with open(self.lock_path) as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return False
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass  # existiert, gehört einem anderen Benutzer
+        return True
+
+    def _release(self) -> None:
+        if self._lock_file is not None:
+            self._mark_leader(None)
+            self._lock_file.close()
+            self._lock_file = None
+        self.leader = False
+
+    def _run(self) -> None:
+        while not self._try_lead():
+            # Lock anderswo: Caches dürfen nur unbegrenzt leben, wenn dort wirklich beobachtet wird
+            self._set_active(self._leader_running())
+            if self._stop.wait(LEADER_RETRY_SECONDS):
+                return
+
+        try:
+            backend = create_backend(self.mode, self.roots, self.interval)
+        except OSError as e:
+            logger.error(f"Content-Watcher nicht gestartet: {e}")
+            # Lock freigeben, sonst warten die anderen auf einen Watcher, den es nicht gibt
+            with self._lock:
+                self._release()
+            self._set_active(False)
+            return
+        self.backend_name = type(backend).__name__
+        self._mark_leader(os.getpid())
+        self.leader = True
+        self._set_active(True)
+        logger.info(f"Content-Watcher aktiv ({self.backend_name}, pid {os.getpid()})")
+        try:
+            # Änderungen aus der Zeit ohne Watcher nachholen
+            self._notify(set())
+            while not self._stop.is_set():
+                changed = backend.wait(self.interval)
+                if not changed:
+                    continue
+                # Entprellen: Editoren schreiben oft mehrmals hintereinander
+                while True:
+                    more = backend.wait(DEBOUNCE_SECONDS)
+                    if not more:
+                        break
+                    changed |= more
+                self._notify(changed)
+        finally:
+            backend.close()
+            self._set_active(False)
+
+    def _notify(self, changed: set[str]) -> None:
+        try:
+            self.on_change(changed)
+        except Exception:
+            logger.exception("Content-Watcher: Verarbeitung der Änderungen fehlgeschlagen")
+
+    def _set_active(self, active: bool) -> None:
+        self.active = active
+        set_content_watched(active)
+
+    def ensure_running(self) -> None:
+        """Start the thread in this process (again after ``fork()``)."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="content-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and wait for it (at most one polling interval)."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self._pid = None
+        with self._lock:
+            self._release()
+
+
+def rebuild_content(changed: set[str]) -> None:
+    """Incremental build after a change; this process invalidates right away."""
+    result = content_build.build()
+    if result.invalidated:
+        logger.info(f"Inhalte geändert: {', '.join(result.invalidated)}")
+    content_build.refresh(force=True)
+
+
+watcher = ContentWatcher(
+    rebuild_content,
+    mode=Config.CONTENT_WATCH,
+    interval=Config.CONTENT_WATCH_INTERVAL,
+    lock_path=f"{Config.CONTENT_BUILD_STATE}.lock",
+)
+
+
+def register_content_watcher(app):
+    """Start the content watcher in each worker if ``CONTENT_WATCH`` is set."""
+    if not Config.CONTENT_WATCH:
+        return
+
+    @app.before_request
+    def start_content_watcher():
+        watcher.ensure_running()
@@ -6,15 +6,102 @@ connection handling, and utility functions.
 """
 
 import logging
+import os
+import threading
+import time
 from contextlib import contextmanager
 from typing import Optional, Generator
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from .metrics import DB_QUERY_DURATION
+from . import timing
 
 logger = logging.getLogger(__name__)
 
-# Global session factory - will be set by app.py
-SessionLocal = None
+class LazySessionFactory:
+    """
+    Engine and session factory, created on first use.
+
+    Neither importing the app nor ``create_app()`` opens a connection; the
+    engine is built (and the tables created) when the first session is
+    requested. After ``fork()`` the child discards the pool inherited from
+    the parent (``engine.dispose(close=False)``), so every gunicorn worker
+    opens its own connections even with ``preload_app``.
+
+    Usable like a ``sessionmaker``: ``with SessionLocal() as s: ...``;
+    ``bool(SessionLocal)`` is False when no database is configured.
+    """
+
+    def __init__(self):
+        self._url = None
+        self._create_tables = True
+        self._engine = None
+        self._factory = None
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def configure(self, url: Optional[str], create_tables: bool = True) -> None:
+        """Set the database URL; the engine is created on first use."""
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+            self._url = url
+            self._create_tables = create_tables
+            self._engine = None
+            self._factory = None
+
+    def use(self, session_factory) -> None:
+        """Use an existing sessionmaker (e.g. in tests) instead of a lazy one."""
+        with self._lock:
+            self._factory = session_factory
+            self._engine = session_factory.kw.get("bind") if session_factory else None
+
+    def _build(self) -> None:
+        from .config import create_database_engine, create_session_factory
+        from .models import Base
+
+        engine = create_database_engine(self._url)
+        if engine is None:
+            return
+        instrument_engine(engine)
+        if self._create_tables:
+            Base.metadata.create_all(bind=engine)
+        self._engine = engine
+        self._factory = create_session_factory(engine)
+
+    @property
+    def session_factory(self):
+        if self._factory is None and self._url:
+            with self._lock:
+                if self._factory is None:
+                    self._build()
+        return self._factory
+
+    @property
+    def engine(self):
+        self.session_factory
+        return self._engine
+
+    def _after_fork(self) -> None:
+        # Der Pool gehört dem Elternprozess: verwerfen, ohne dessen Sockets zu schliessen
+        self._lock = threading.Lock()
+        if self._engine is not None:
+            self._engine.dispose(close=False)
+
+    def __bool__(self) -> bool:
+        return self.session_factory is not None
+
+    def __call__(self, **kwargs) -> Session:
+        factory = self.session_factory
+        if factory is None:
+            raise RuntimeError("Database not configured")
+        return factory(**kwargs)
+
+
+# Global session factory - configured by create_app()
+SessionLocal = LazySessionFactory()
 
 
 def set_session_factory(session_factory):
@@ -24,8 +111,32 @@ def set_session_factory(session_factory):
     Args:
         session_factory: SQLAlchemy session factory
     """
-    global SessionLocal
-    SessionLocal = session_factory
+    SessionLocal.use(session_factory)
+
+
+def instrument_engine(engine) -> None:
+    """
+    Misst die Dauer aller SQL-Statements einer Engine (Prometheus-Histogramm
+    und Server-Timing-Phase ``db``).
+
+    Args:
+        engine: SQLAlchemy Engine
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_DURATION.observe(duration)
+        timing.record("db", duration)
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_query_timer(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
 
 
 @contextmanager
@@ -0,0 +1,297 @@
+"""
+E-mail domain checks for the IT-Kurs application.
+
+Provides two things for the registration form:
+
+- ``suggest_domain``: typo suggestions via edit distance against a list of
+  popular mail providers (replaces the old hard-coded typo table); the form
+  shows them as a hint, they never reject an address
+- ``DeliverabilityChecker``: MX lookups through a pluggable resolver with a
+  TTL cache (positive and negative answers) and a strict time budget, so a
+  slow DNS server can never stall a form submit
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+POPULAR_DOMAINS = (
+    # Schweiz
+    "bluewin.ch", "gmx.ch", "hispeed.ch", "sunrise.ch", "swissonline.ch",
+    "bluemail.ch", "protonmail.ch", "proton.me", "hotmail.ch", "yahoo.ch",
+    # International
+    "gmail.com", "googlemail.com", "hotmail.com", "outlook.com", "live.com",
+    "msn.com", "yahoo.com", "icloud.com", "me.com", "aol.com",
+    "gmx.net", "gmx.de", "gmx.at", "web.de", "t-online.de", "freenet.de",
+    "yahoo.de", "hotmail.de", "outlook.de",
+)
+# Echte Anbieter, die nur wenige Zeichen von einem populären entfernt sind
+# (ymail.com ~ gmail.com, online.de ~ t-online.de): nie "korrigieren"
+OTHER_PROVIDERS = (
+    "ymail.com", "rocketmail.com", "mail.com", "email.com", "gmx.com", "gmx.li",
+    "mail.ch", "mail.de", "email.de", "online.de", "posteo.de", "posteo.ch",
+    "mailbox.org", "live.de", "live.ch", "aol.de", "outlook.at", "hotmail.at",
+)
+_KNOWN_SET = frozenset(POPULAR_DOMAINS + OTHER_PROVIDERS)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein distance (optimal string alignment) with early exit.
+
+    Args:
+        a, b: Strings to compare
+        limit: Stop as soon as the distance must exceed this value
+
+    Returns:
+        int: Distance, or ``limit + 1`` if it is larger than ``limit``
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and ca == b[j - 2] and a[i - 2] == cb):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def suggest_domain(domain: str) -> Optional[str]:
+    """
+    Schlägt einen bekannten Anbieter vor, wenn ``domain`` wie ein Tippfehler aussieht.
+
+    Kurze Domains (< 8 Zeichen) erlauben 1 Abweichung, längere 2. Bei 2
+    Abweichungen muss die Top-Level-Domain übereinstimmen, damit z.B.
+    ``yahoo.fr`` nicht zu ``yahoo.ch`` "korrigiert" wird. Bekannte Anbieter
+    (``POPULAR_DOMAINS``, ``OTHER_PROVIDERS``) bekommen nie einen Vorschlag.
+
+    Returns:
+        str | None: Vorgeschlagene Domain oder None
+    """
+    domain = domain.lower()
+    if domain in _KNOWN_SET:
+        return None
+
+    limit = 1 if len(domain) < 8 else 2
+    tld = domain.rpartition(".")[2]
+    best, best_distance = None, limit + 1
+    for candidate in POPULAR_DOMAINS:
+        distance = edit_distance(domain, candidate, min(limit, best_distance))
+        if distance == 2 and candidate.rpartition(".")[2] != tld:
+            continue
+        if distance < best_distance:
+            best, best_distance = candidate, distance
+    return best
+
+
+# --- MX-Lookups ---
+
+class DomainNotFound(Exception):
+    """The domain does not exist or does not accept mail (cacheable answer)."""
+
+
+class StaticResolver:
+    """
+    In-memory resolver stand-in for tests and offline development.
+
+    Args:
+        records: Mapping domain -> list of MX hosts; missing domains and
+            empty lists are treated as undeliverable
+        delay: Artificial lookup latency in seconds
+    """
+
+    def __init__(self, records: dict[str, list[str]] | None = None, delay: float = 0.0):
+        self.records = dict(records or {})
+        self.delay = delay
+        self.lookups = 0
+
+    def __call__(self, domain: str) -> list[str]:
+        self.lookups += 1
+        if self.delay:
+            time.sleep(self.delay)
+        hosts = self.records.get(domain)
+        if not hosts:
+            raise DomainNotFound(domain)
+        return list(hosts)
+
+
+class DnsPythonResolver:
+    """Resolver based on dnspython (installed together with email_validator)."""
+
+    def __init__(self, lifetime: float = 1.0):
+        import dns.resolver
+
+        self._dns = dns
+        self._resolver = dns.resolver.Resolver()
+        self._resolver.lifetime = lifetime
+
+    def __call__(self, domain: str) -> list[str]:
+        resolver = self._dns.resolver
+        try:
+            answer = self._resolver.resolve(domain, "MX")
+            hosts = [str(r.exchange).rstrip(".") for r in answer]
+            # RFC 7505 "Null MX": Domain nimmt explizit keine Mails an
+            if not any(hosts):
+                raise DomainNotFound(domain)
+            return hosts
+        except resolver.NXDOMAIN:
+            raise DomainNotFound(domain)
+        except resolver.NoAnswer:
+            pass
+
+        # Kein MX: laut RFC 5321 gilt der A/AAAA-Record als implizites MX
+        for rdtype in ("A", "AAAA"):
+            try:
+                self._resolver.resolve(domain, rdtype)
+                return [domain]
+            except (resolver.NoAnswer, resolver.NXDOMAIN):
+                continue
+        raise DomainNotFound(domain)
+
+
+class MXCache:
+    """Thread-safe LRU cache with separate TTLs for positive and negative answers."""
+
+    def __init__(self, ttl: float = 86400, negative_ttl: float = 3600, max_entries: int = 4096):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, domain: str) -> Optional[bool]:
+        """Cached answer (True/False) or None if unknown or expired."""
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None:
+                return None
+            deliverable, expires = entry
+            if time.monotonic() >= expires:
+                del self._entries[domain]
+                return None
+            self._entries.move_to_end(domain)
+            return deliverable
+
+    def set(self, domain: str, deliverable: bool) -> None:
+        ttl = self.ttl if deliverable else self.negative_ttl
+        with self._lock:
+            self._entries[domain] = (deliverable, time.monotonic() + ttl)
+            self._entries.move_to_end(domain)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DeliverabilityChecker:
+    """
+    Prüft, ob eine Domain E-Mails empfangen kann – mit festem Zeitbudget.
+
+    Lookups laufen in einem kleinen Thread-Pool. Ist das Budget erschöpft,
+    wird ``None`` (unbekannt) zurückgegeben und der Lookup läuft im
+    Hintergrund weiter, damit der nächste Versuch die Antwort im Cache findet.
+    """
+
+    def __init__(self, resolver: Callable[[str], list[str]], timeout: float = 0.5,
+                 cache: Optional[MXCache] = None, max_workers: int = 4):
+        self.resolver = resolver
+        self.timeout = timeout
+        self.cache = cache or MXCache()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mx-lookup")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, domain: str) -> Optional[bool]:
+        try:
+            try:
+                self.resolver(domain)
+                result = True
+            except DomainNotFound:
+                result = False
+            except Exception as e:
+                # Netzwerk-/Resolverfehler sind keine Aussage über die Domain
+                logger.info(f"MX lookup for {domain} failed: {e}")
+                return None
+            self.cache.set(domain, result)
+            return result
+        finally:
+            with self._lock:
+                self._pending.pop(domain, None)
+
+    def check(self, domain: str) -> Optional[bool]:
+        """
+        Args:
+            domain: Domain-Teil der E-Mail-Adresse
+
+        Returns:
+            bool | None: True (zustellbar), False (nicht zustellbar) oder
+            None (unbekannt, z.B. Zeitbudget überschritten)
+        """
+        domain = domain.lower().rstrip(".")
+        cached = self.cache.get(domain)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._pending.get(domain)
+            if future is None:
+                future = self._pool.submit(self._lookup, domain)
+                self._pending[domain] = future
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            logger.info(f"MX lookup for {domain} exceeded {self.timeout}s budget")
+            return None
+
+
+_default_checker: Optional[DeliverabilityChecker] = None
+_default_lock = threading.Lock()
+
+
+def get_deliverability_checker() -> Optional[DeliverabilityChecker]:
+    """
+    Globaler Checker mit dnspython-Resolver (None, falls dnspython fehlt).
+    """
+    global _default_checker
+    if _default_checker is None:
+        with _default_lock:
+            if _default_checker is None:
+                try:
+                    resolver = DnsPythonResolver(lifetime=Config.EMAIL_DNS_TIMEOUT)
+                except ImportError:
+                    logger.warning("dnspython nicht installiert – MX-Prüfung deaktiviert")
+                    return None
+                _default_checker = DeliverabilityChecker(resolver, timeout=Config.EMAIL_DNS_TIMEOUT)
+    return _default_checker
+
+
+def set_deliverability_checker(checker: Optional[DeliverabilityChecker]) -> None:
+    """Replace the global checker (e.g. with a StaticResolver in tests)."""
+    global _default_checker
+    _default_checker = checker
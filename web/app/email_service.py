@@ -9,14 +9,15 @@ import logging
 from datetime import datetime
 from typing import Optional
 
-import requests
-
 from .config import Config
+from .metrics import EMAIL_SENDS
+from .timing import timed
 
 
 logger = logging.getLogger(__name__)
 
 
+@timed("send_email_api")
 def send_email_api(to_email: str, subject: str, html: str, text: str = "") -> None:
     """
     Versendet E‑Mails über Resend HTTP-API.
@@ -38,10 +39,12 @@ def send_email_api(to_email: str, subject: str, html: str, text: str = "") -> No
     """
     if Config.EMAIL_PROVIDER != "resend":
         logger.warning("EMAIL_PROVIDER != 'resend' – Versand übersprungen")
+        EMAIL_SENDS.inc(outcome="skipped")
         return
         
     if not Config.RESEND_API_KEY:
         logger.warning("RESEND_API_KEY fehlt – Versand übersprungen")
+        EMAIL_SENDS.inc(outcome="skipped")
         return
 
     payload = {
@@ -53,13 +56,20 @@ def send_email_api(to_email: str, subject: str, html: str, text: str = "") -> No
     if text:
         payload["text"] = text
 
-    r = requests.post(
-        "https://api.resend.com/emails",
-        headers={"Authorization": f"Bearer {Config.RESEND_API_KEY}", "Content-Type": "application/json"},
-        json=payload, 
-        timeout=15
-    )
-    r.raise_for_status()
+    import requests  # erst beim ersten Versand laden (Startzeit)
+
+    try:
+        r = requests.post(
+            "https://api.resend.com/emails",
+            headers={"Authorization": f"Bearer {Config.RESEND_API_KEY}", "Content-Type": "application/json"},
+            json=payload, 
+            timeout=15
+        )
+        r.raise_for_status()
+    except requests.exceptions.RequestException:
+        EMAIL_SENDS.inc(outcome="failed")
+        raise
+    EMAIL_SENDS.inc(outcome="sent")
 
 
 def create_registration_confirmation_email(first_name: str, last_name: str) -> str:
@@ -0,0 +1,237 @@
+"""
+File delivery for the IT-Kurs application.
+
+Lesson media and downloads are sent with:
+
+- strong ETags from a content hash, computed once per path and
+  (mtime, size) and then cached in the process
+- conditional GET (``If-None-Match`` / ``If-Modified-Since``) and byte
+  ranges (large PDFs), handled by Werkzeug
+- ``Cache-Control: immutable`` for a year when the URL carries the current
+  content fingerprint (``?v=<hash>``); plain URLs must revalidate
+- gzip/brotli for text files (CSS, JS, SVG), compressed once per content
+  fingerprint (see ``compression.py``)
+
+Offload mode (``FILE_OFFLOAD``): after validation the app only answers with
+an ``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (Apache, lighttpd) header
+and the reverse proxy sends the bytes, so a class downloading the same PDF
+does not tie up the Python workers. Files outside ``FILE_OFFLOAD_ROOT`` and
+deployments without a proxy fall back to in-process serving.
+``OffloadProxy`` is a small stand-in for the proxy (tests, local checks).
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from datetime import datetime, timezone
+
+from flask import current_app, request, send_file
+
+from . import compression
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+FINGERPRINT_ARG = "v"
+OFFLOAD_HEADERS = {
+    "x-accel-redirect": "X-Accel-Redirect",
+    "x-sendfile": "X-Sendfile",
+}
+_CHUNK_SIZE = 1024 * 1024
+
+# path -> (mtime_ns, size, digest); begrenzt durch die Anzahl Dateien im Content
+_hashes: dict[str, tuple[int, int, str]] = {}
+_hashes_lock = threading.Lock()
+
+
+def content_hash(path: str | os.PathLike) -> str:
+    """
+    Content fingerprint of a file (first 16 hex digits of SHA-256).
+
+    Re-hashes only when the file's mtime or size changed.
+
+    Raises:
+        OSError: If the file does not exist or cannot be read
+    """
+    path = os.fspath(path)
+    stat = os.stat(path)
+    cached = _hashes.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()[:16]
+
+    with _hashes_lock:
+        _hashes[path] = (stat.st_mtime_ns, stat.st_size, fingerprint)
+    return fingerprint
+
+
+def clear_hash_cache() -> None:
+    with _hashes_lock:
+        _hashes.clear()
+
+
+def _offload_target(path: str) -> tuple[str, str] | None:
+    """
+    Header name and value for the proxy, or None to serve in-process.
+    """
+    header = OFFLOAD_HEADERS.get(Config.FILE_OFFLOAD.lower())
+    if header is None:
+        return None
+    root = os.path.abspath(Config.FILE_OFFLOAD_ROOT)
+    relpath = os.path.relpath(os.path.abspath(path), root)
+    if relpath == os.pardir or relpath.startswith(os.pardir + os.sep):
+        return None
+    prefix = Config.FILE_OFFLOAD_PREFIX.rstrip("/")
+    return header, f"{prefix}/{relpath.replace(os.sep, '/')}"
+
+
+def _file_response(path: str, etag: str, *, mimetype: str | None = None,
+                   as_attachment: bool = False, download_name: str | None = None):
+    """Response with the file's headers (type, disposition, validators) but no body."""
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(download_name or path)[0] or "application/octet-stream"
+    response = current_app.response_class(mimetype=mimetype)
+    if as_attachment or download_name:
+        response.headers.set(
+            "Content-Disposition", "attachment" if as_attachment else "inline",
+            filename=download_name or os.path.basename(path),
+        )
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(os.stat(path).st_mtime, timezone.utc)
+    return response
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def send_cached_file(path: str | os.PathLike, version: str | None = None, **options):
+    """
+    ``send_file`` with content-hash ETag, conditional GET, ranges and caching.
+
+    Args:
+        path: Already validated path of an existing file
+        version: Expected ``?v=`` value if it is not the file's own fingerprint
+            (derived files such as image derivatives use their source's)
+        **options: Passed on to ``flask.send_file`` (mimetype, download_name, ...)
+
+    Returns:
+        Response: 200, 206 (range) or 304 (not modified); in offload mode a
+        header-only response for the proxy; compressible files are sent
+        gzip/brotli-encoded when the client accepts it
+    """
+    path = os.fspath(path)
+    fingerprint = content_hash(path)
+    target = _offload_target(path)
+    mimetype = options.get("mimetype") or mimetypes.guess_type(options.get("download_name") or path)[0]
+    encoding = None if target is not None else compression.file_encoding(
+        path, mimetype, os.path.getsize(path))
+
+    if target is not None:
+        response = _file_response(path, fingerprint, **options)
+        header, value = target
+        response.headers[header] = value
+        # 304 beantwortet die App selbst; Ranges übernimmt der Proxy
+        response.make_conditional(request)
+    elif encoding is not None:
+        # Einmal komprimiert pro Inhalt; Ranges nur auf der unkomprimierten Variante
+        response = _file_response(path, f"{fingerprint}-{encoding}", **options)
+        response.vary.add("Accept-Encoding")
+        response.make_conditional(request)
+        if response.status_code != 304:
+            response.set_data(compression.variants.get(fingerprint, encoding,
+                                                       lambda: _read_file(path)))
+            response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_file(path, etag=fingerprint, conditional=True, **options)
+        if compression.is_compressible(response.mimetype):
+            response.vary.add("Accept-Encoding")
+
+    cache_control = response.cache_control
+    if request.args.get(FINGERPRINT_ARG) == (version or fingerprint):
+        # URL ändert sich mit dem Inhalt: darf ein Jahr ungeprüft gecacht werden
+        cache_control.no_cache = None
+        cache_control.public = True
+        cache_control.max_age = IMMUTABLE_MAX_AGE
+        cache_control.immutable = True
+    else:
+        # Ohne (aktuellen) Fingerprint: cachen, aber per ETag revalidieren
+        cache_control.public = True
+        cache_control.no_cache = True
+        cache_control.max_age = None
+    return response
+
+
+class OffloadProxy:
+    """
+    WSGI stand-in for nginx/Apache in front of the app.
+
+    Replaces header-only offload responses by the file's bytes (with a
+    simple single-range implementation), like the real proxy would.
+
+    Args:
+        wsgi_app: The application
+        root: Directory the internal prefix maps to (``FILE_OFFLOAD_ROOT``)
+        prefix: Internal location prefix (``FILE_OFFLOAD_PREFIX``)
+    """
+
+    def __init__(self, wsgi_app, root: str, prefix: str = ""):
+        self.wsgi_app = wsgi_app
+        self.root = os.path.abspath(root)
+        self.prefix = prefix.rstrip("/")
+        self.offloaded = 0
+
+    def _resolve(self, value: str) -> str | None:
+        if not value.startswith(self.prefix + "/"):
+            return None
+        path = os.path.abspath(os.path.join(self.root, value[len(self.prefix) + 1:]))
+        return path if path.startswith(self.root + os.sep) and os.path.isfile(path) else None
+
+    def __call__(self, environ, start_response):
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers)
+            return lambda data: None
+
+        body = self.wsgi_app(environ, capture)
+        headers = captured["headers"]
+        names = {name.lower(): value for name, value in headers}
+        value = names.get("x-accel-redirect") or names.get("x-sendfile")
+        if value is None or not captured["status"].startswith("200"):
+            start_response(captured["status"], headers)
+            return body
+        if hasattr(body, "close"):
+            body.close()
+
+        self.offloaded += 1
+        path = self._resolve(value)
+        if path is None:
+            start_response("404 NOT FOUND", [("Content-Type", "text/plain")])
+            return [b"not found"]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        status = "200 OK"
+        headers = [(n, v) for n, v in headers
+                   if n.lower() not in ("x-accel-redirect", "x-sendfile", "content-length")]
+        byte_range = environ.get("HTTP_RANGE", "")
+        if byte_range.startswith("bytes=") and "," not in byte_range:
+            start, _, end = byte_range[6:].partition("-")
+            if start:
+                first, last = int(start), min(int(end or len(data) - 1), len(data) - 1)
+                headers.append(("Content-Range", f"bytes {first}-{last}/{len(data)}"))
+                data = data[first:last + 1]
+                status = "206 PARTIAL CONTENT"
+        headers += [("Content-Length", str(len(data))), ("Accept-Ranges", "bytes")]
+        start_response(status, headers)
+        return [data]
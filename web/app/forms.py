@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, EmailField, SelectField
 from wtforms.validators import DataRequired, Optional, Length
+from .config import Config
 from .validators import SwissPhoneValidator, EnhancedEmailValidator, NameValidator, CourseSelectionValidator
 
 class RegisterForm(FlaskForm):
@@ -22,7 +23,7 @@ class RegisterForm(FlaskForm):
         "E-Mail", 
         validators=[
             Optional(), 
-            EnhancedEmailValidator()
+            EnhancedEmailValidator(check_deliverability=Config.EMAIL_CHECK_DELIVERABILITY)
         ]
     )
     phone = StringField(
@@ -72,5 +73,6 @@ class RegisterForm(FlaskForm):
     def __init__(self, course_loader_func=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if course_loader_func:
-            # Add course validation after initialization
-            self.course_id.validators.append(CourseSelectionValidator(course_loader_func))
+            # Eigene Liste pro Instanz: die Validatoren-Liste des Felds teilen
+            # sich sonst alle Formulare (append würde sie bei jedem Request verlängern)
+            self.course_id.validators = [*self.course_id.validators, CourseSelectionValidator(course_loader_func)]
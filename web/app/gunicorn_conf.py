@@ -0,0 +1,99 @@
+"""
+Gunicorn configuration for the IT-Kurs application.
+
+    gunicorn -c python:app.gunicorn_conf app.wsgi:application
+
+Everything can be overridden via environment variables:
+
+- ``GUNICORN_WORKER_CLASS``: ``gthread`` (default), ``sync`` or ``gevent``
+- ``GUNICORN_WORKERS`` / ``GUNICORN_THREADS``: defaults derived from the
+  CPUs available to the container
+- ``GUNICORN_PRELOAD``: import the app once in the master (default on);
+  each worker builds its own DB pool (see ``database.LazySessionFactory``)
+- ``GUNICORN_MAX_REQUESTS``: recycle workers after N requests (with jitter)
+- ``GUNICORN_TIMEOUT`` / ``GUNICORN_GRACEFUL_TIMEOUT``
+
+With ``METRICS_DIR`` set, ``child_exit`` folds the metrics files of exited
+workers into one aggregate (see ``metrics.Registry.merge_dead_processes``).
+"""
+
+import logging
+import os
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def _cpu_count() -> int:
+    # Berücksichtigt CPU-Limits per Affinity (z.B. docker --cpuset-cpus)
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _worker_class() -> str:
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+    if worker_class == "gevent":
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            logger.warning("gevent nicht installiert – verwende gthread")
+            return "gthread"
+    if worker_class not in ("sync", "gthread", "gevent"):
+        raise ValueError(f"Unbekannte GUNICORN_WORKER_CLASS: {worker_class}")
+    return worker_class
+
+
+cpus = _cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = _worker_class()
+
+if worker_class == "sync":
+    # Ein Request pro Prozess: klassische Faustregel 2 x CPU + 1
+    _default_workers, _default_threads = 2 * cpus + 1, 1
+elif worker_class == "gthread":
+    # Requests warten v.a. auf DB und Resend-API: wenige Prozesse, mehrere Threads
+    _default_workers, _default_threads = cpus + 1, 4
+else:
+    _default_workers, _default_threads = cpus, 1
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))
+
+workers = int(os.getenv("GUNICORN_WORKERS", _default_workers))
+threads = int(os.getenv("GUNICORN_THREADS", _default_threads))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Worker regelmässig recyceln (begrenzt schleichendes Speicherwachstum);
+# Jitter verhindert, dass alle Worker gleichzeitig neu starten
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Heartbeat-Dateien im RAM statt auf dem (evtl. langsamen) Container-FS
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+errorlog = "-"
+
+
+def when_ready(server):
+    server.log.info(
+        f"Gunicorn bereit: {workers} Worker ({worker_class}, {threads} Threads), "
+        f"preload={preload_app}, max_requests={max_requests}±{max_requests_jitter}"
+    )
+
+
+def child_exit(server, worker):
+    # Metrik-Dateien beendeter Worker (max_requests) ins Aggregat übernehmen
+    from app.config import Config
+
+    if Config.METRICS_DIR:
+        from app.metrics import registry
+
+        registry.enable_multiprocess(Config.METRICS_DIR)
+        registry.merge_dead_processes()
@@ -0,0 +1,183 @@
+"""
+Health checks for the IT-Kurs application.
+
+Orchestrator probes hit ``/health/ready`` every few seconds in every worker.
+Instead of opening a DB session per probe, a background thread per worker
+(``HealthProber``) refreshes the dependency status every
+``HEALTH_CHECK_INTERVAL`` seconds, and the probe endpoints only read that
+snapshot.
+
+The endpoints are served by a small WSGI middleware in front of Flask, so
+probes skip the before/after-request hooks (security headers, session,
+metrics) entirely.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """
+    Periodically runs health checks in a background thread and keeps the result.
+
+    Args:
+        checks: Mapping name -> callable returning a dict with at least
+            ``available`` (bool), e.g. ``check_database_health``
+        interval: Seconds between two probe rounds
+        max_age: A snapshot older than this counts as stale (not ready);
+            defaults to three intervals
+    """
+
+    def __init__(self, checks: dict[str, Callable[[], dict]] | None = None,
+                 interval: float = 10.0, max_age: float | None = None):
+        self.checks = dict(checks or {})
+        self.interval = interval
+        self.max_age = max_age if max_age is not None else 3 * interval
+        self._results: dict[str, dict] = {}
+        self._checked_at = None
+        self._checked_at_monotonic = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid = None
+
+    def add_check(self, name: str, check: Callable[[], dict]) -> None:
+        self.checks[name] = check
+
+    def probe_once(self) -> None:
+        """Run all checks now and store the result."""
+        results = {}
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            try:
+                result = dict(check())
+            except Exception as e:
+                logger.error(f"Health check {name} failed: {e}")
+                result = {"status": "unhealthy", "message": str(e), "available": False}
+            result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            results[name] = result
+        with self._lock:
+            self._results = results
+            self._checked_at = time.time()
+            self._checked_at_monotonic = time.monotonic()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.probe_once()
+
+    def ensure_running(self) -> None:
+        """
+        Start the background thread in this process.
+
+        Threads do not survive ``fork()``: a gunicorn worker started from a
+        preloaded master gets its own thread on its first probe.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stop.clear()
+            threading.Thread(target=self._run, name="health-prober", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._pid = None
+
+    def snapshot(self) -> dict:
+        """
+        Latest result with its age.
+
+        Returns:
+            dict: ``ready``, ``stale``, ``checked_at``, ``age_seconds`` and ``checks``
+        """
+        self.ensure_running()
+        if self._checked_at is None:
+            # Erster Probe dieses Workers: einmal synchron prüfen
+            self.probe_once()
+
+        with self._lock:
+            results = self._results
+            checked_at = self._checked_at
+            age = time.monotonic() - self._checked_at_monotonic
+
+        stale = age > self.max_age
+        return {
+            "ready": not stale and all(r.get("available") for r in results.values()),
+            "stale": stale,
+            "checked_at": checked_at,
+            "age_seconds": round(age, 3),
+            "checks": results,
+        }
+
+
+class HealthCheckMiddleware:
+    """
+    WSGI middleware answering ``/health``, ``/health/live`` and ``/health/ready``
+    before the request reaches Flask.
+    """
+
+    def __init__(self, wsgi_app, prober: HealthProber):
+        self.wsgi_app = wsgi_app
+        self.prober = prober
+        self._routes = {
+            "/health": self._health,
+            "/health/live": self._live,
+            "/health/ready": self._ready,
+        }
+
+    def _health(self):
+        return 200, {"status": "healthy", "timestamp": time.time(), "service": "it-kurs-webapp"}
+
+    def _live(self):
+        return 200, {"status": "alive", "timestamp": time.time()}
+
+    def _ready(self):
+        snapshot = self.prober.snapshot()
+        ready = snapshot["ready"]
+        return (200 if ready else 503), {
+            "status": "ready" if ready else "not_ready",
+            "timestamp": time.time(),
+            "checked_at": snapshot["checked_at"],
+            "age_seconds": snapshot["age_seconds"],
+            "stale": snapshot["stale"],
+            "checks": snapshot["checks"],
+        }
+
+    def __call__(self, environ, start_response):
+        handler = self._routes.get(environ.get("PATH_INFO", ""))
+        if handler is None:
+            return self.wsgi_app(environ, start_response)
+
+        method = environ.get("REQUEST_METHOD", "GET")
+        if method not in ("GET", "HEAD"):
+            status, payload = 405, {"error": "Method not allowed"}
+        else:
+            status, payload = handler()
+
+        body = json.dumps(payload).encode()
+        reason = {200: "OK", 405: "METHOD NOT ALLOWED", 503: "SERVICE UNAVAILABLE"}[status]
+        start_response(f"{status} {reason}", [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("Cache-Control", "no-store"),
+        ])
+        return [b""] if method == "HEAD" else [body]
+
+
+def register_health_checks(app, checks: dict[str, Callable[[], dict]]) -> HealthProber:
+    """Wrap ``app.wsgi_app`` with the health middleware and return the prober."""
+    prober = HealthProber(checks, interval=Config.HEALTH_CHECK_INTERVAL,
+                          max_age=Config.HEALTH_MAX_AGE or None)
+    app.wsgi_app = HealthCheckMiddleware(app.wsgi_app, prober)
+    app.extensions["health_prober"] = prober
+    return prober
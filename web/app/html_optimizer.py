@@ -0,0 +1,331 @@
+"""
+Post-render stage for cached pages: critical CSS inline, the rest deferred,
+HTML whitespace minified.
+
+Applies to HTML responses whose view calls ``compress_once()`` (lesson,
+asset and course pages): their body is the same for every request with the
+same content, so the optimized page is computed once per content and kept
+in :data:`pages` (LRU, ``HTML_OPTIMIZE_CACHE_SIZE``); compression, ETag and
+304 then work on the optimized body. The views pass a
+:func:`page_fingerprint` of their template data to ``compress_once()``:
+on a hit neither stage hashes the body.
+
+- Critical CSS: the rules of the page's stylesheets whose selectors can match
+  the page (tags, classes and ids that occur in it), minified into a
+  ``<style>`` in ``<head>``. Media queries and ``@font-face``/``@keyframes``
+  are kept as blocks.
+- The stylesheet itself is preloaded in ``<head>`` and linked at the end of
+  ``<body>``: it no longer blocks the first paint. (The usual
+  ``media="print" onload=...`` trick needs an inline handler, which the CSP
+  ``script-src 'self'`` forbids.)
+- Whitespace runs collapse to one character and comments disappear, except
+  inside ``<pre>``, ``<textarea>``, ``<script>`` and ``<style>``.
+
+``python -m benchmarks.bench_critical_css`` compares bytes and render-blocking
+requests before and after per page.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+from flask import current_app, request
+from werkzeug.security import safe_join
+
+from .assets import STATIC_DIR, manifest
+from .auth import is_admin_session
+from .compression import once_fingerprint, once_marked
+from .config import Config
+from .file_serving import content_hash
+from .templating import data_version
+from .timing import phase
+
+logger = logging.getLogger(__name__)
+
+_STYLESHEET = re.compile(
+    r"""<link\b(?=[^>]*\brel=["']stylesheet["'])[^>]*\bhref=["'](?P<href>/static/[^"']+)["'][^>]*>\s*""",
+    re.IGNORECASE,
+)
+_HEAD_END = re.compile(r"</head\s*>", re.IGNORECASE)
+_BODY_END = re.compile(r"</body\s*>", re.IGNORECASE)
+_PROTECTED = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.IGNORECASE | re.DOTALL)
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_SPACE = re.compile(r"\s+")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+_CSS_DECLARATION = re.compile(r"\s*([:;])\s*")
+_TAG = re.compile(r"<([a-zA-Z][\w-]*)")
+_CLASS_ATTR = re.compile(r"""\bclass=["']([^"']*)["']""")
+_ID_ATTR = re.compile(r"""\bid=["']([^"']*)["']""")
+_PSEUDO = re.compile(r"::?[\w-]+(?:\([^)]*\))?|\[[^\]]*\]")
+_SELECTOR_TAG = re.compile(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)")
+_SELECTOR_CLASS = re.compile(r"\.([\w-]+)")
+_SELECTOR_ID = re.compile(r"#([\w-]+)")
+# Blöcke, die unabhängig von Selektoren gebraucht werden
+_KEEP_AT_RULES = ("@font-face", "@keyframes", "@-webkit-keyframes", "@charset", "@property")
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+# Statische Dateien, die base.html und die Unterlagen-Seiten per url_for einbinden
+PAGE_ASSETS = ("css/style.css", "js/offline.js")
+
+
+def parse_css(css: str) -> list[tuple[str, str | list]]:
+    """
+    Top-level rules of a stylesheet.
+
+    Returns:
+        list: ``(prelude, declarations)`` for style rules, ``(prelude, [rules])``
+        for ``@media``/``@supports``, ``(statement, "")`` for ``@import``-like
+        statements
+    """
+    css = _CSS_COMMENT.sub("", css)
+    rules, position, length = [], 0, len(css)
+    while position < length:
+        brace = css.find("{", position)
+        semicolon = css.find(";", position)
+        if brace < 0:
+            break
+        if 0 <= semicolon < brace and css[position:semicolon].strip().startswith("@"):
+            rules.append((css[position:semicolon + 1].strip(), ""))
+            position = semicolon + 1
+            continue
+        prelude = css[position:brace].strip()
+        depth, end = 1, brace + 1
+        while end < length and depth:
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+            end += 1
+        block = css[brace + 1:end - 1]
+        if prelude.startswith(("@media", "@supports")):
+            rules.append((prelude, parse_css(block)))
+        else:
+            rules.append((prelude, block.strip()))
+        position = end
+    return rules
+
+
+def minify_css(css: str) -> str:
+    css = _SPACE.sub(" ", _CSS_COMMENT.sub("", css))
+    return _CSS_PUNCTUATION.sub(r"\1", css).replace(";}", "}").strip()
+
+
+def _minify_declarations(body: str) -> str:
+    # Nur in Deklarationen: im Selektor trennt " :" Nachfahre und Pseudoklasse
+    return _CSS_DECLARATION.sub(r"\1", body)
+
+
+def page_tokens(html: str) -> tuple[set[str], set[str], set[str]]:
+    """Tags, classes and ids occurring in a page."""
+    tags = {tag.lower() for tag in _TAG.findall(html)}
+    classes = {name for value in _CLASS_ATTR.findall(html) for name in value.split()}
+    ids = set(_ID_ATTR.findall(html))
+    return tags, classes, ids
+
+
+def selector_matches(selector: str, tags: set[str], classes: set[str], ids: set[str]) -> bool:
+    """
+    Whether a selector can match the page (every tag, class and id in it occurs).
+
+    Over-approximates: structure and pseudo-classes are ignored.
+    """
+    simple = _PSEUDO.sub("", selector).strip()
+    if not simple:
+        return True  # z.B. ":root", "::selection"
+    return (all(tag.lower() in tags for tag in _SELECTOR_TAG.findall(simple))
+            and all(name in classes for name in _SELECTOR_CLASS.findall(simple))
+            and all(name in ids for name in _SELECTOR_ID.findall(simple)))
+
+
+def _critical_rules(rules: list, tokens: tuple[set[str], set[str], set[str]]) -> list[str]:
+    kept = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            inner = _critical_rules(body, tokens)
+            if inner:
+                kept.append(f"{prelude}{{{''.join(inner)}}}")
+        elif prelude.startswith("@"):
+            if prelude.startswith(_KEEP_AT_RULES):
+                kept.append(f"{prelude}{{{_minify_declarations(body)}}}" if body else prelude)
+        elif any(selector_matches(s, *tokens) for s in prelude.split(",")):
+            kept.append(f"{prelude}{{{_minify_declarations(body)}}}")
+    return kept
+
+
+def critical_css(css: str, html: str) -> str:
+    """Minified subset of ``css`` that the page ``html`` can use."""
+    return minify_css("".join(_critical_rules(parse_css(css), page_tokens(html))))
+
+
+_stylesheets: dict[str, tuple[str, list]] = {}
+_stylesheets_lock = threading.Lock()
+
+
+def _stylesheet_rules(path: str) -> list | None:
+    # Geparste Regeln pro Datei, neu nur bei geändertem Inhalt
+    try:
+        fingerprint = content_hash(path)
+    except OSError:
+        return None
+    with _stylesheets_lock:
+        cached = _stylesheets.get(path)
+    if cached is None or cached[0] != fingerprint:
+        with open(path, encoding="utf-8") as f:
+            cached = (fingerprint, parse_css(f.read()))
+        with _stylesheets_lock:
+            _stylesheets[path] = cached
+    return cached[1]
+
+
+def minify_html(html: str) -> str:
+    """Collapse whitespace and drop comments outside pre/textarea/script/style."""
+    parts = _PROTECTED.split(html)
+    out = []
+    # split() mit zwei Gruppen: Text, geschützter Block, Tag-Name, Text, ...
+    for i in range(0, len(parts), 3):
+        text = _COMMENT.sub("", parts[i])
+        out.append(_SPACE.sub(lambda m: "\n" if "\n" in m.group() else " ", text))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip()
+
+
+def optimize_html(html: str) -> str:
+    """
+    Inline critical CSS, defer the page's stylesheets and minify.
+
+    Stylesheets outside ``/static`` or missing files are left untouched.
+    """
+    head_end = _HEAD_END.search(html)
+    body_end = _BODY_END.search(html)
+    links, critical = [], []
+    if head_end and body_end:
+        tokens = page_tokens(html[head_end.end():])
+        for m in _STYLESHEET.finditer(html, 0, head_end.start()):
+            path = safe_join(str(STATIC_DIR), m.group("href").partition("?")[0][len("/static/"):])
+            rules = _stylesheet_rules(path) if path else None
+            if rules is None:
+                continue
+            links.append(m)
+            critical.append(minify_css("".join(_critical_rules(rules, tokens))))
+
+    if links:
+        head, rest = [], 0
+        for m, css in zip(links, critical):
+            href = m.group("href")
+            head.append(html[rest:m.start()])
+            head.append(f'<style>{css}</style>\n<link rel="preload" as="style" href="{href}">\n')
+            rest = m.end()
+        deferred = "".join(f'<link rel="stylesheet" href="{m.group("href")}">\n' for m in links)
+        html = ("".join(head) + html[rest:body_end.start()] + deferred + html[body_end.start():])
+    return minify_html(html)
+
+
+class PageCache:
+    """
+    Optimized pages by content fingerprint, least recently used evicted.
+
+    Args:
+        max_entries: Maximum number of pages
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str, load: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            body = self._entries.get(fingerprint)
+            if body is not None:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        with phase("optimize_html"):
+            body = load()
+        with self._lock:
+            self._entries[fingerprint] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+pages = PageCache(Config.HTML_OPTIMIZE_CACHE_SIZE)
+
+
+@lru_cache(maxsize=1)
+def _templates_version() -> str:
+    # Ohne Auto-Reload ändern sich die Templates erst mit einem Neustart
+    digest = hashlib.sha256()
+    for root, dirs, files in sorted(os.walk(TEMPLATES_DIR)):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, TEMPLATES_DIR).encode())
+            digest.update(content_hash(path).encode())
+    return digest.hexdigest()[:12]
+
+
+def page_fingerprint(*parts) -> str | None:
+    """
+    Fingerprint of a ``compress_once()`` page from what it is rendered from.
+
+    Args:
+        *parts: The view's template data; cached objects, so their
+            :func:`data_version` is computed once per content version
+
+    Returns:
+        str | None: Hash of the parts, the URL, the templates, the admin flag
+        of ``base.html`` and the linked static files. None with template
+        auto-reload (debug): then the body is hashed.
+    """
+    if current_app.jinja_env.auto_reload:
+        return None
+    versions = [request.path, _templates_version(), str(is_admin_session()),
+                str(Config.HTML_OPTIMIZE), str(Config.OFFLINE_READER),
+                *(manifest.fingerprint("static", path) or "" for path in PAGE_ASSETS),
+                *(data_version(part) for part in parts)]
+    return hashlib.sha256("\0".join(versions).encode()).hexdigest()[:16]
+
+
+def _optimize(data: bytes) -> bytes:
+    try:
+        return optimize_html(data.decode("utf-8")).encode("utf-8")
+    except Exception:
+        # Lieber die unveränderte Seite als ein 500
+        logger.exception("HTML-Optimierung fehlgeschlagen")
+        return data
+
+
+def register_html_optimizer(app):
+    """Optimize pages marked with ``compress_once()`` (before they are compressed)."""
+
+    @app.after_request
+    def optimize_page(response):
+        if (not Config.HTML_OPTIMIZE or response.status_code != 200 or response.is_streamed
+                or response.mimetype != "text/html" or "Content-Encoding" in response.headers
+                or not once_marked()):
+            return response
+        # Mit Fingerprint der View: bei einem Treffer wird der Body nicht gehasht
+        fingerprint = once_fingerprint() or hashlib.sha256(response.get_data()).hexdigest()[:16]
+        response.set_data(pages.get(fingerprint, lambda: _optimize(response.get_data())))
+        return response
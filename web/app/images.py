@@ -0,0 +1,346 @@
+"""
+Responsive lesson images.
+
+Photos in the lessons are several megabytes large. For every raster image
+(JPEG, PNG, WebP) below a course folder:
+
+- ``responsive_images`` adds ``width``/``height`` (no layout shift),
+  ``loading="lazy"`` and ``decoding="async"`` to the ``<img>`` tag, and, when
+  derivatives are available, a ``srcset`` with smaller versions plus a WebP
+  ``<source>`` in a ``<picture>`` element
+- derivatives (``IMAGE_WIDTHS`` in the source format, and WebP) are stored in
+  ``IMAGE_CACHE_DIR`` named by the source's content hash, so an edited image
+  gets new files and URLs
+- ``flask build-images`` generates all of them in a process pool (Docker
+  build); missing ones are generated on first request
+
+Resizing needs Pillow. Without it only the attributes are added (sizes are
+read from the file headers) and the originals are served.
+"""
+
+import logging
+import os
+import re
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import unquote
+
+from werkzeug.security import safe_join
+
+from .config import Config
+from .file_serving import FINGERPRINT_ARG, content_hash
+from .timing import timed
+from .utils.markdown_loader import DURCHFUEHRUNGEN_DIR
+
+logger = logging.getLogger(__name__)
+
+# Dateiendung -> Pillow-Format
+RASTER_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+WEBP_SUFFIX = ".webp"
+
+_IMG_TAG = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"""\b([\w-]+)=("[^"]*"|'[^']*')""")
+
+_pil = None
+
+# fingerprint -> (Breite, Höhe) oder None
+_sizes: dict[str, tuple[int, int] | None] = {}
+_sizes_lock = threading.Lock()
+
+
+def pillow():
+    """
+    ``(Image, ImageOps)`` from Pillow, or None if it is not installed.
+
+    Imported on first use, not at boot (startup time).
+    """
+    global _pil
+    if _pil is None:
+        try:
+            from PIL import Image, ImageOps
+            _pil = (Image, ImageOps)
+        except ImportError:  # optional: ohne Pillow keine Derivate
+            _pil = ()
+    return _pil or None
+
+
+def derivatives_enabled() -> bool:
+    return Config.IMAGE_DERIVATIVES and pillow() is not None
+
+
+def _header_size(path: str) -> tuple[int, int] | None:
+    """Pixel size from the PNG, GIF, WebP or JPEG header (no decoding)."""
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+            return None
+        if head[:2] != b"\xff\xd8":
+            return None
+
+        # JPEG: Segmente bis zum Start-of-Frame überspringen
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            while marker[1] == 0xFF:  # Füllbytes
+                marker = marker[1:] + f.read(1)
+            code = marker[1]
+            length = f.read(2)
+            if len(length) < 2:
+                return None
+            if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", f.read(5)[1:5])
+                return width, height
+            f.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
+
+
+def _pillow_size(path: str) -> tuple[int, int]:
+    """Displayed size (EXIF orientation applied)."""
+    Image, _ = pillow()
+    with Image.open(path) as im:
+        width, height = im.size
+        if im.getexif().get(0x0112, 1) in (5, 6, 7, 8):  # um 90° gedreht
+            width, height = height, width
+    return width, height
+
+
+def image_size(path: str, fingerprint: str | None = None) -> tuple[int, int] | None:
+    """
+    Width and height of an image, cached per content fingerprint.
+
+    Returns:
+        tuple | None: ``(width, height)`` or None if the format is unknown
+    """
+    fingerprint = fingerprint or content_hash(path)
+    if fingerprint in _sizes:
+        return _sizes[fingerprint]
+    try:
+        size = _pillow_size(path) if pillow() is not None else _header_size(path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Bildgrösse von {path} nicht lesbar: {e}")
+        size = None
+    with _sizes_lock:
+        _sizes[fingerprint] = size
+    return size
+
+
+def derivative_widths(width: int) -> list[int]:
+    """Configured widths smaller than the original."""
+    return sorted(w for w in Config.IMAGE_WIDTHS if w < width)
+
+
+def derivative_path(fingerprint: str, width: int, ext: str) -> str:
+    """Cache file of one derivative (``ext`` with dot, e.g. ``".webp"``)."""
+    return os.path.join(Config.IMAGE_CACHE_DIR, f"{fingerprint}-{width}{ext}")
+
+
+def generate_derivative(source: str, target: str, width: int, ext: str) -> str:
+    """
+    Resize ``source`` to ``width`` pixels and save it as ``target``.
+
+    Written to a temporary file first, so parallel workers never serve a
+    half-written image.
+    """
+    Image, ImageOps = pillow()
+    image_format = RASTER_FORMATS[ext]
+    with Image.open(source) as im:
+        im = ImageOps.exif_transpose(im)
+        if width < im.width:
+            im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+        if image_format == "JPEG" and im.mode != "RGB":
+            im = im.convert("RGB")
+        elif image_format == "WEBP" and im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or "A" in im.getbands() else "RGB")
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".part")
+        os.close(fd)
+        try:
+            im.save(tmp, image_format, quality=Config.IMAGE_QUALITY, optimize=True)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return target
+
+
+def derivative_jobs(source: str) -> list[tuple[str, str, int, str]]:
+    """All ``(source, target, width, ext)`` derivatives of one image."""
+    ext = os.path.splitext(source)[1].lower()
+    fingerprint = content_hash(source)
+    size = image_size(source, fingerprint)
+    if ext not in RASTER_FORMATS or size is None:
+        return []
+
+    jobs = []
+    for width in derivative_widths(size[0]):
+        jobs.append((source, derivative_path(fingerprint, width, ext), width, ext))
+        if ext != WEBP_SUFFIX:
+            jobs.append((source, derivative_path(fingerprint, width, WEBP_SUFFIX), width, WEBP_SUFFIX))
+    if ext != WEBP_SUFFIX:
+        # Originalgrösse als WebP
+        jobs.append((source, derivative_path(fingerprint, size[0], WEBP_SUFFIX), size[0], WEBP_SUFFIX))
+    return jobs
+
+
+def _run_job(job: tuple[str, str, int, str]) -> str:
+    return generate_derivative(*job)
+
+
+def build_derivatives(root: str | os.PathLike = DURCHFUEHRUNGEN_DIR, workers: int | None = None) -> int:
+    """
+    Generate all missing derivatives below ``root`` in a process pool.
+
+    Returns:
+        int: Number of files generated
+    """
+    jobs = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() in RASTER_FORMATS:
+                jobs.extend(job for job in derivative_jobs(os.path.join(directory, filename))
+                            if not os.path.exists(job[1]))
+    if not jobs:
+        return 0
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Grosse Bilder zuerst, damit kein Worker am Schluss allein rechnet
+    jobs.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(_run_job, jobs):
+            pass
+    return len(jobs)
+
+
+def find_derivative(slug: str, width: int, relpath: str) -> tuple[str, str] | None:
+    """
+    Derivative file for ``/unterlagen/<slug>/bild/<width>/<relpath>``.
+
+    ``relpath`` is the source path, with ``.webp`` appended for the WebP
+    version. Generates the file if it does not exist yet.
+
+    Returns:
+        tuple | None: ``(derivative path, source fingerprint)`` or None if
+        there is no such source or width
+    """
+    if not derivatives_enabled():
+        return None
+    source, ext = safe_join(str(DURCHFUEHRUNGEN_DIR), slug, relpath), None
+    if source is not None and os.path.isfile(source):
+        ext = os.path.splitext(source)[1].lower()
+    elif relpath.endswith(WEBP_SUFFIX):
+        source, ext = safe_join(str(DURCHFUEHRUNGEN_DIR), slug, relpath[:-len(WEBP_SUFFIX)]), WEBP_SUFFIX
+    if source is None or not os.path.isfile(source):
+        return None
+    # Wie unterlagen_media: Symlinks aus dem Kursordner hinaus nicht lesen
+    if not Path(source).resolve().is_relative_to((DURCHFUEHRUNGEN_DIR / slug).resolve()):
+        return None
+    source_ext = os.path.splitext(source)[1].lower()
+    if source_ext not in RASTER_FORMATS:
+        return None
+
+    fingerprint = content_hash(source)
+    size = image_size(source, fingerprint)
+    # Nur die konfigurierten Breiten (und WebP in Originalgrösse) – keine beliebigen Resizes
+    if size is None or not (width in derivative_widths(size[0])
+                            or (ext == WEBP_SUFFIX != source_ext and width == size[0])):
+        return None
+
+    target = derivative_path(fingerprint, width, ext)
+    if not os.path.exists(target):
+        generate_derivative(source, target, width, ext)
+    return target, fingerprint
+
+
+def _with_attributes(tag: str, attributes: dict[str, str]) -> str:
+    head = tag[:-2] if tag.endswith("/>") else tag[:-1]
+    extra = "".join(f' {name}="{value}"' for name, value in attributes.items())
+    return f"{head.rstrip()}{extra}>"
+
+
+@timed("responsive_images")
+def responsive_images(html: str, slug: str) -> str:
+    """
+    Add size, lazy loading and ``srcset`` to ``<img>`` tags pointing to course media.
+
+    Expects URLs already rewritten by ``rewrite_relative_urls``.
+    """
+    media = f"/unterlagen/{slug}/media/"
+    derived = f"/unterlagen/{slug}/bild/"
+
+    def repl(m):
+        tag = m.group(0)
+        attributes = {name.lower(): value[1:-1] for name, value in _ATTRIBUTE.findall(tag)}
+        src = attributes.get("src", "")
+        if not src.startswith(media) or "srcset" in attributes:
+            return tag
+        url_path = src[len(media):].partition("#")[0].partition("?")[0]
+        relpath = unquote(url_path)
+        if os.path.splitext(relpath)[1].lower() not in RASTER_FORMATS:
+            return tag
+        source = safe_join(str(DURCHFUEHRUNGEN_DIR), slug, relpath)
+        if source is None or not os.path.isfile(source):
+            return tag
+        fingerprint = content_hash(source)
+        size = image_size(source, fingerprint)
+        if size is None:
+            return tag
+
+        width, height = size
+        added = {}
+        display_width = attributes.get("width", "")
+        if "width" not in attributes and "height" not in attributes:
+            added.update(width=str(width), height=str(height))
+        elif display_width.isdigit() and "height" not in attributes:
+            added["height"] = str(round(height * int(display_width) / width))
+        if "loading" not in attributes:
+            added["loading"] = "lazy"
+        if "decoding" not in attributes:
+            added["decoding"] = "async"
+
+        if not derivatives_enabled():
+            return _with_attributes(tag, added)
+
+        version = f"?{FINGERPRINT_ARG}={fingerprint}"
+        sizes = f"{display_width}px" if display_width.isdigit() else Config.IMAGE_SIZES
+        widths = derivative_widths(width)
+        added["srcset"] = ", ".join(
+            [f"{derived}{w}/{url_path}{version} {w}w" for w in widths] + [f"{src} {width}w"])
+        added["sizes"] = sizes
+        img = _with_attributes(tag, added)
+        if os.path.splitext(relpath)[1].lower() == WEBP_SUFFIX:
+            return img
+
+        webp = ", ".join(f"{derived}{w}/{url_path}{WEBP_SUFFIX}{version} {w}w" for w in widths + [width])
+        return f'<picture><source type="image/webp" srcset="{webp}" sizes="{sizes}">{img}</picture>'
+
+    return _IMG_TAG.sub(repl, html)
+
+
+def register_images(app):
+    """Register the ``flask build-images`` command."""
+
+    @app.cli.command("build-images")
+    def build_images():
+        """Generate all image derivatives into IMAGE_CACHE_DIR."""
+        if pillow() is None:
+            raise SystemExit("Pillow ist nicht installiert")
+        count = build_derivatives(workers=Config.IMAGE_BUILD_WORKERS or None)
+        print(f"{count} Bildvarianten -> {Config.IMAGE_CACHE_DIR}")
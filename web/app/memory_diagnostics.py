@@ -0,0 +1,215 @@
+"""
+Memory diagnostics for the IT-Kurs application.
+
+Admin-only endpoints to find out why a worker's RSS grows:
+
+- ``GET  /_admin/memory``: RSS, GC counters, sizes of the app's own
+  in-memory structures and tracemalloc status of the answering worker
+- ``POST /_admin/memory/tracemalloc/start|stop``: switch tracemalloc on/off
+- ``POST /_admin/memory/snapshot``: take a snapshot (kept in the worker)
+- ``GET  /_admin/memory/diff?from=1&to=2``: compare two snapshots, grouped
+  by ``lineno`` or ``filename``
+
+tracemalloc is off by default and costs nothing until it is started. All
+numbers are per worker; the ``pid`` in every answer tells which one replied.
+"""
+
+import gc
+import logging
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict
+
+from flask import abort, jsonify, request
+
+from .auth import require_admin
+from .cache import cache
+from . import compression, email_deliverability, html_optimizer
+
+logger = logging.getLogger(__name__)
+
+MAX_SNAPSHOTS = 5
+GROUP_BY = ("lineno", "filename", "traceback")
+
+_snapshots: OrderedDict[int, tracemalloc.Snapshot] = OrderedDict()
+_snapshot_ids = iter(range(1, 1 << 62))
+_lock = threading.Lock()
+
+# Allokationen des Diagnose-Codes selbst ausblenden
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> int | None:
+    """Current resident set size of this process (None if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Fallback (macOS/BSD): nur der Spitzenwert ist verfügbar
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _rate_limiter_keys() -> int | None:
+    from .security import rate_limiter
+
+    try:
+        return rate_limiter.storage.key_count()
+    except Exception as e:
+        logger.info(f"Rate-Limiter-Schlüssel nicht zählbar: {e}")
+        return None
+
+
+def app_structures() -> dict:
+    """Sizes of the application's own in-memory structures."""
+    # Nicht get_deliverability_checker(): der würde den Checker erst anlegen
+    checker = email_deliverability._default_checker
+    return {
+        "cache_entries": cache.size(),
+        "rate_limiter_keys": _rate_limiter_keys(),
+        "mx_cache_entries": checker.cache.size() if checker else None,
+        "compressed_variants": compression.variants.size(),
+        "compressed_variant_bytes": compression.variants.nbytes(),
+        "optimized_pages": html_optimizer.pages.size(),
+    }
+
+
+def memory_report() -> dict:
+    """Everything ``GET /_admin/memory`` returns."""
+    report = {
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "gc": {
+            "counts": list(gc.get_count()),
+            "thresholds": list(gc.get_threshold()),
+            "collections": [stats["collections"] for stats in gc.get_stats()],
+            "objects": len(gc.get_objects()),
+        },
+        "app": app_structures(),
+        "tracemalloc": {
+            "tracing": tracemalloc.is_tracing(),
+            "snapshots": list(_snapshots),
+        },
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report["tracemalloc"].update(
+            traced_bytes=current,
+            peak_bytes=peak,
+            overhead_bytes=tracemalloc.get_tracemalloc_memory(),
+        )
+    return report
+
+
+def _stat_dict(stat) -> dict:
+    entry = {
+        "where": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry.update(size_diff_bytes=stat.size_diff, count_diff=stat.count_diff)
+    return entry
+
+
+def _query_options() -> tuple[str, int]:
+    group_by = request.args.get("group", "lineno")
+    if group_by not in GROUP_BY:
+        abort(400)
+    try:
+        limit = min(max(int(request.args.get("limit", "20")), 1), 200)
+    except ValueError:
+        abort(400)
+    return group_by, limit
+
+
+def _get_snapshot(name: str) -> tracemalloc.Snapshot:
+    try:
+        snapshot_id = int(request.args.get(name, ""))
+    except ValueError:
+        abort(400)
+    snapshot = _snapshots.get(snapshot_id)
+    if snapshot is None:
+        abort(404)
+    return snapshot
+
+
+def register_memory_diagnostics(app):
+    """Register the admin memory diagnostics endpoints."""
+
+    @app.get("/_admin/memory", endpoint="admin_memory")
+    @require_admin
+    def admin_memory():
+        return jsonify(memory_report())
+
+    @app.post("/_admin/memory/tracemalloc/start", endpoint="admin_tracemalloc_start")
+    @require_admin
+    def admin_tracemalloc_start():
+        try:
+            frames = min(max(int(request.args.get("frames", "1")), 1), 25)
+        except ValueError:
+            abort(400)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.warning(f"tracemalloc gestartet ({frames} Frames) in Worker {os.getpid()}")
+        return jsonify(memory_report())
+
+    @app.post("/_admin/memory/tracemalloc/stop", endpoint="admin_tracemalloc_stop")
+    @require_admin
+    def admin_tracemalloc_stop():
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info(f"tracemalloc gestoppt in Worker {os.getpid()}")
+        with _lock:
+            _snapshots.clear()
+        return jsonify(memory_report())
+
+    @app.post("/_admin/memory/snapshot", endpoint="admin_memory_snapshot")
+    @require_admin
+    def admin_memory_snapshot():
+        if not tracemalloc.is_tracing():
+            return jsonify({"error": "tracemalloc ist nicht aktiv"}), 409
+        group_by, limit = _query_options()
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        with _lock:
+            snapshot_id = next(_snapshot_ids)
+            _snapshots[snapshot_id] = snapshot
+            # Snapshots sind gross: nur die letzten MAX_SNAPSHOTS behalten
+            while len(_snapshots) > MAX_SNAPSHOTS:
+                _snapshots.popitem(last=False)
+
+        stats = snapshot.statistics(group_by)
+        return jsonify({
+            "pid": os.getpid(),
+            "id": snapshot_id,
+            "rss_bytes": rss_bytes(),
+            "total_bytes": sum(stat.size for stat in stats),
+            "top": [_stat_dict(stat) for stat in stats[:limit]],
+        })
+
+    @app.get("/_admin/memory/diff", endpoint="admin_memory_diff")
+    @require_admin
+    def admin_memory_diff():
+        group_by, limit = _query_options()
+        old = _get_snapshot("from")
+        new = _get_snapshot("to")
+
+        stats = new.compare_to(old, group_by)
+        return jsonify({
+            "pid": os.getpid(),
+            "group_by": group_by,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [_stat_dict(stat) for stat in stats[:limit]],
+        })
@@ -0,0 +1,425 @@
+"""
+Prometheus-compatible metrics for the IT-Kurs application.
+
+A small, dependency-free registry with counters, gauges and histograms that
+renders the Prometheus text exposition format (version 0.0.4).
+
+Multiprocess mode: with ``METRICS_DIR`` set, every worker periodically writes
+its own values to ``<METRICS_DIR>/metrics_<pid>_<start>.json``. The worker
+answering ``/metrics`` merges all files, so the numbers are correct across
+gunicorn workers. Counters and histograms of exited workers are kept (like
+prometheus_client does); gauges only count live processes. Besides the
+throttled flush after each request, a background thread per process writes
+changed values every ``flush_interval`` seconds, so idle workers publish
+their last increments too. The gunicorn
+master folds the files of exited workers into one ``metrics_aggregate.json``
+(``merge_dead_processes``, from the ``child_exit`` hook), so recycled workers
+do not pile up files that every scrape has to read.
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+AGGREGATE_FILE = "metrics_aggregate.json"
+# Zuletzt zusammengeführte Dateinamen: Leser, die eine davon noch gelesen
+# haben, zählen sie nicht doppelt
+_MERGED_NAMES_KEPT = 256
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def snapshot(self) -> dict:
+        """JSON-serialisable copy of the current values."""
+        with self._lock:
+            return {json.dumps(k): v for k, v in self._values.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down.
+
+    ``multiprocess_mode`` decides how live processes are combined:
+    ``"livesum"`` (e.g. requests in progress) or ``"max"`` (e.g. info gauges).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 multiprocess_mode: str = "livesum"):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [count per bucket..., +Inf count, sum]
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            else:
+                entry[len(self.buckets)] += 1
+            entry[-1] += value
+
+
+class Registry:
+    """Collection of metrics plus optional multiprocess storage."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors = []
+        self._directory: Optional[Path] = None
+        self._file: Optional[Path] = None
+        self._file_pid: Optional[int] = None
+        self._last_flush = 0.0
+        self._last_payload = None
+        self._flusher_pid = None
+        self._flush_lock = threading.Lock()
+        self.flush_interval = 1.0
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), multiprocess_mode="livesum") -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, multiprocess_mode))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, func) -> None:
+        """
+        Register a callback ``func(merged) -> list[str]`` that renders extra
+        lines from the merged values at scrape time (e.g. derived ratios).
+        """
+        self._collectors.append(func)
+
+    # --- Multiprocess ------------------------------------------------------
+
+    def enable_multiprocess(self, directory: str) -> None:
+        """Write this process' values to ``directory`` for cross-worker scrapes."""
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def _process_file(self) -> Path:
+        # Nach fork() bekommt jeder Worker seine eigene Datei; Werte, die der
+        # Elternprozess schon geschrieben hat, dürfen nicht doppelt zählen
+        pid = os.getpid()
+        if self._file_pid != pid:
+            if self._file_pid is not None:
+                for metric in self._metrics.values():
+                    if metric.kind != "gauge":
+                        metric.clear()
+            self._file = self._directory / f"metrics_{pid}_{int(time.time() * 1000)}.json"
+            self._file_pid = pid
+        return self._file
+
+    def _ensure_flusher(self) -> None:
+        # Ein Thread pro Prozess (nach fork() neu): schreibt auch, wenn keine Requests kommen
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        self._flusher_pid = pid
+        threading.Thread(target=self._flush_periodically, name="metrics-flush", daemon=True).start()
+
+    def _flush_periodically(self) -> None:
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_interval)
+            self.flush(force=True)
+
+    def flush(self, force: bool = False) -> None:
+        """Persist this process' values (at most every ``flush_interval`` s, only if changed)."""
+        if self._directory is None:
+            return
+        self._ensure_flusher()
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        with self._flush_lock:  # Request-Threads und Flush-Thread teilen die .tmp-Datei
+            path = self._process_file()
+            data = {name: m.snapshot() for name, m in self._metrics.items()}
+            payload = json.dumps({"pid": os.getpid(), "metrics": data})
+            if payload == self._last_payload and path.exists():
+                return
+            tmp = path.with_suffix(".tmp")
+            try:
+                tmp.write_text(payload)
+                os.replace(tmp, path)
+                self._last_payload = payload
+            except OSError as e:
+                logger.warning(f"Metriken konnten nicht geschrieben werden: {e}")
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        if pid == os.getpid():
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _read_process_files(self) -> list[tuple[Path, dict]]:
+        files = []
+        for path in self._directory.glob("metrics_*.json"):
+            if path.name == AGGREGATE_FILE:
+                continue
+            try:
+                files.append((path, json.loads(path.read_text())))
+            except (OSError, ValueError):
+                continue
+        return files
+
+    def _read_aggregate(self) -> dict:
+        try:
+            return json.loads((self._directory / AGGREGATE_FILE).read_text())
+        except (OSError, ValueError):
+            return {"merged": [], "metrics": {}}
+
+    def _snapshots(self) -> list[tuple[bool, dict]]:
+        if self._directory is None:
+            return [(True, {name: m.snapshot() for name, m in self._metrics.items()})]
+
+        self.flush(force=True)
+        # Erst die Prozess-Dateien, dann das Aggregat lesen: der Master schreibt
+        # das Aggregat, bevor er die Dateien löscht, so fehlt nie ein Wert
+        files = self._read_process_files()
+        aggregate = self._read_aggregate()
+        merged = set(aggregate["merged"])
+        snapshots = [(self._pid_alive(content.get("pid", -1)), content["metrics"])
+                     for path, content in files if path.name not in merged]
+        snapshots.append((False, aggregate["metrics"]))
+        return snapshots
+
+    def merge_dead_processes(self) -> list[int]:
+        """
+        Fold the files of exited processes into ``metrics_aggregate.json``.
+
+        Counters and histograms are summed, gauges dropped. Only one process
+        may call this (the gunicorn master, see ``gunicorn_conf.child_exit``).
+
+        Returns:
+            list[int]: PIDs whose files were merged
+        """
+        if self._directory is None:
+            return []
+        dead = [(path, content) for path, content in self._read_process_files()
+                if not self._pid_alive(content.get("pid", -1))]
+        if not dead:
+            return []
+
+        aggregate = self._read_aggregate()
+        totals = aggregate["metrics"]
+        for _, content in dead:
+            for name, values in content["metrics"].items():
+                metric = self._metrics.get(name)
+                if metric is not None and metric.kind == "gauge":
+                    continue
+                target = totals.setdefault(name, {})
+                for key, value in values.items():
+                    existing = target.get(key)
+                    if existing is None:
+                        target[key] = value
+                    elif isinstance(value, list):
+                        target[key] = [a + b for a, b in zip(existing, value)]
+                    else:
+                        target[key] = existing + value
+
+        names = aggregate["merged"] + [path.name for path, _ in dead]
+        path = self._directory / AGGREGATE_FILE
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"merged": names[-_MERGED_NAMES_KEPT:], "metrics": totals}))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Metriken beendeter Worker nicht zusammengeführt: {e}")
+            return []
+        for dead_path, _ in dead:
+            try:
+                dead_path.unlink()
+            except OSError:
+                pass
+        return [content.get("pid") for _, content in dead]
+
+    def collect(self) -> dict[str, dict[tuple, object]]:
+        """Merge the values of all processes."""
+        merged = {name: {} for name in self._metrics}
+        for alive, data in self._snapshots():
+            for name, values in data.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                if metric.kind == "gauge" and not alive:
+                    continue
+                target = merged[name]
+                for raw_key, value in values.items():
+                    key = tuple(json.loads(raw_key))
+                    if metric.kind == "histogram":
+                        existing = target.get(key)
+                        target[key] = value if existing is None else [a + b for a, b in zip(existing, value)]
+                    elif metric.kind == "gauge" and metric.multiprocess_mode == "max":
+                        target[key] = max(target.get(key, value), value)
+                    else:
+                        target[key] = target.get(key, 0.0) + value
+        return merged
+
+    # --- Exposition --------------------------------------------------------
+
+    def render(self) -> str:
+        """Prometheus text exposition format of all (merged) metrics."""
+        merged = self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(merged[name].items()):
+                labels = dict(zip(metric.labelnames, key))
+                if metric.kind == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (math.inf,), value):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in self._collectors:
+            lines.extend(collector(merged))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# --- Globale Registry und Metriken der Anwendung ---
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by endpoint, method and status class",
+    ("endpoint", "method", "status"),
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being processed",
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by endpoint and status class",
+    ("endpoint", "status"),
+)
+CACHE_REQUESTS = registry.counter(
+    "app_cache_requests_total", "In-memory cache lookups by result", ("result",),
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "Duration of SQL statements",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+SEARCH_LATENCY = registry.histogram(
+    "search_duration_seconds", "Full-text search latency (index lookup, ranking, snippets)",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 1.0),
+)
+EMAIL_SENDS = registry.counter(
+    "email_send_total", "E-mail send attempts by outcome", ("outcome",),
+)
+APP_INFO = registry.gauge(
+    "app_info", "Application information", ("app_name", "version", "debug"),
+    multiprocess_mode="max",
+)
+
+
+def _cache_hit_ratio(merged: dict) -> list[str]:
+    values = merged.get(CACHE_REQUESTS.name, {})
+    hits = values.get(("hit",), 0.0)
+    total = hits + values.get(("miss",), 0.0)
+    ratio = hits / total if total else 0.0
+    return [
+        "# HELP app_cache_hit_ratio Share of cache lookups served from cache",
+        "# TYPE app_cache_hit_ratio gauge",
+        f"app_cache_hit_ratio {_format_value(ratio)}",
+    ]
+
+
+registry.add_collector(_cache_hit_ratio)
+atexit.register(lambda: registry.flush(force=True))
@@ -7,56 +7,67 @@ functionality for production deployment.
 
 import logging
 import time
-from flask import jsonify
+from flask import Response, request
 from .database import check_database_health
 from .config import Config
+from .health import register_health_checks
+from .metrics import (
+    registry, CONTENT_TYPE, APP_INFO, HTTP_IN_PROGRESS, HTTP_LATENCY, HTTP_REQUESTS,
+)
+
+APP_VERSION = "1.0.0"
+
+# Methode kommt vom Client: unbekannte Verben zusammenfassen (Kardinalität)
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"})
 
 logger = logging.getLogger(__name__)
 
 
+def register_request_metrics(app):
+    """Instrument every request: count, in-flight gauge and latency histogram."""
+
+    if Config.METRICS_DIR:
+        registry.enable_multiprocess(Config.METRICS_DIR)
+    APP_INFO.set(1, app_name="it-kurs-webapp", version=APP_VERSION,
+                 debug=str(Config.FLASK_DEBUG).lower())
+
+    # Messwerte liegen im WSGI-environ: teardown_request läuft evtl. ohne App-Kontext
+    @app.before_request
+    def start_request_metrics():
+        request.environ["metrics.started"] = time.perf_counter()
+        HTTP_IN_PROGRESS.inc()
+
+    @app.after_request
+    def capture_response_status(response):
+        request.environ["metrics.status"] = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request_metrics(exc):
+        started = request.environ.pop("metrics.started", None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        status = 500 if exc is not None else request.environ.pop("metrics.status", 500)
+        status_class = f"{status // 100}xx"
+        # Nur bekannte Endpunkte als Label, sonst explodiert die Kardinalität
+        endpoint = request.endpoint or "unmatched"
+
+        method = request.method if request.method in HTTP_METHODS else "other"
+
+        HTTP_IN_PROGRESS.dec()
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=status_class)
+        HTTP_LATENCY.observe(duration, endpoint=endpoint, status=status_class)
+        registry.flush()
+
+
 def register_monitoring_endpoints(app):
     """Register monitoring endpoints with the Flask application."""
-    
-    @app.route("/health")
-    def health_check():
-        """Basic health check endpoint."""
-        return jsonify({
-            "status": "healthy",
-            "timestamp": time.time(),
-            "service": "it-kurs-webapp"
-        })
-    
-    @app.route("/health/ready")
-    def readiness_check():
-        """Readiness check including database connectivity."""
-        db_health = check_database_health()
-        
-        overall_status = "ready" if db_health["available"] else "not_ready"
-        status_code = 200 if db_health["available"] else 503
-        
-        return jsonify({
-            "status": overall_status,
-            "timestamp": time.time(),
-            "checks": {
-                "database": db_health
-            }
-        }), status_code
-    
-    @app.route("/health/live")  
-    def liveness_check():
-        """Liveness check for container orchestration."""
-        return jsonify({
-            "status": "alive",
-            "timestamp": time.time()
-        })
-    
+
+    register_request_metrics(app)
+    register_health_checks(app, {"database": check_database_health})
+
     @app.route("/metrics")
-    def basic_metrics():
-        """Basic application metrics."""
-        # In production, you might want to integrate with Prometheus
-        return jsonify({
-            "app_name": "it-kurs-webapp",
-            "version": "1.0.0",
-            "debug_mode": Config.FLASK_DEBUG,
-            "timestamp": time.time()
-        })
+    def prometheus_metrics():
+        """Application metrics in Prometheus text format (all workers)."""
+        return Response(registry.render(), content_type=CONTENT_TYPE)
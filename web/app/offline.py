@@ -0,0 +1,104 @@
+"""
+Offline lesson reader: precache manifest per course and service worker.
+
+``GET /unterlagen/<slug>/offline.json`` lists everything a course needs
+offline: the course page, every lesson (``list_lessons``), the asset pages
+and media files they link to and the stylesheet. Media and static URLs carry
+their content fingerprint (``?v=``); the manifest ``version`` is a hash over
+all URLs and the rendered lesson HTML, so it changes exactly when something
+in the course changed. The manifest itself is revalidated by ETag.
+
+The service worker (``static/js/sw.js``, served as ``/unterlagen/sw.js`` so
+its scope covers all course pages) is registered by ``static/js/offline.js``
+on course and lesson pages. After the first visit it downloads the manifest
+into a cache per course; afterwards:
+
+- fingerprinted URLs (``?v=``) come from the cache without a request
+- lesson and course pages come from the cache and are revalidated in the
+  background (stale-while-revalidate; the next visit shows the update)
+- everything else (search, registration, admin) goes to the network
+
+Both scripts are static files because the CSP only allows ``script-src 'self'``.
+"""
+
+import hashlib
+import os
+import re
+
+from flask import url_for
+
+from .assets import STATIC_DIR
+from .config import Config
+from .utils.markdown_loader import DURCHFUEHRUNGEN_DIR, list_lessons, load_asset_page, load_lesson
+
+MANIFEST_VERSION = 1
+SERVICE_WORKER = STATIC_DIR / "js" / "sw.js"
+
+_LINK = re.compile(r"""\b(?:src|href)=["'](?P<url>/(?:unterlagen|static)/[^"'#\s]+)""")
+
+
+def _local_file(url: str, slug: str) -> str | None:
+    """File behind a media/static URL (None for pages and foreign courses)."""
+    path = url.partition("?")[0]
+    media = f"/unterlagen/{slug}/media/"
+    if path.startswith(media):
+        return os.path.join(DURCHFUEHRUNGEN_DIR, slug, path[len(media):])
+    if path.startswith("/static/"):
+        return os.path.join(STATIC_DIR, path[len("/static/"):])
+    return None
+
+
+def course_manifest(slug: str) -> dict:
+    """
+    Precache manifest of a course (needs an app/request context for ``url_for``).
+
+    Returns:
+        dict: ``version``, ``cache`` (cache name), ``urls`` and their total ``bytes``;
+        files larger than ``OFFLINE_MAX_FILE_BYTES`` are left out
+    """
+    pages = {}
+    for lesson in list_lessons(slug):
+        page = load_lesson(slug, lesson["id"])
+        if page is not None:
+            pages[url_for("unterlagen_lektion", slug=slug, lesson_id=lesson["id"])] = page[1]
+
+    # Verlinkte Asset-Seiten (eine Ebene) mitnehmen
+    asset_prefix = f"/unterlagen/{slug}/assets/"
+    links = [m.group("url") for html in list(pages.values()) for m in _LINK.finditer(html)]
+    for url in links:
+        path = url.partition("?")[0]
+        if path.startswith(asset_prefix) and path.endswith(".md") and path not in pages:
+            page = load_asset_page(slug, path[len(asset_prefix):])
+            if page is not None:
+                pages[path] = page[1]
+
+    files = [url_for("static", filename="css/style.css"), url_for("static", filename="js/offline.js")]
+    files += [m.group("url") for html in pages.values() for m in _LINK.finditer(html)]
+    urls, total = [url_for("unterlagen_kurs", slug=slug), *pages], 0
+    for url in dict.fromkeys(files):
+        if url in pages or (url.startswith("/unterlagen/") and not url.startswith(f"/unterlagen/{slug}/")):
+            continue
+        path = _local_file(url, slug)
+        if path is None:
+            continue
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        if size <= Config.OFFLINE_MAX_FILE_BYTES:
+            urls.append(url)
+            total += size
+
+    digest = hashlib.sha256()
+    for url in urls:
+        digest.update(url.encode())
+        digest.update(b"\0")
+        if url in pages:
+            digest.update(pages[url].encode())
+    return {
+        "format": MANIFEST_VERSION,
+        "version": digest.hexdigest()[:16],
+        "cache": f"unterlagen-{slug}",
+        "urls": urls,
+        "bytes": total,
+    }
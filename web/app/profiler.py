@@ -0,0 +1,166 @@
+"""
+On-demand sampling profiler for admins.
+
+Only active with ``PROFILING_ENABLED=1``; otherwise nothing is registered
+and there is no per-request cost. Two modes, both behind ``require_admin``:
+
+- one request: append ``?_profile=1`` to any URL, the response is replaced
+  by the collapsed stacks of that request
+- a time window: ``POST /_admin/profile?seconds=10`` samples all threads of
+  the worker answering the call for the given time
+
+Output is the "collapsed stack" format (one ``frame;frame;frame count`` line
+per stack) understood by flamegraph.pl, speedscope and similar tools. Only
+one profile can run per worker at a time.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, abort, request
+
+from .auth import is_admin_request, require_admin
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+_profile_lock = threading.Lock()
+
+
+class SamplingProfiler:
+    """
+    Samples Python stacks via ``sys._current_frames()`` from a background thread.
+
+    Args:
+        interval: Seconds between samples
+        thread_ids: Threads to sample (None = all except the sampler itself)
+        exclude: Threads to skip
+    """
+
+    def __init__(self, interval: float = 0.005, thread_ids: set[int] | None = None,
+                 exclude: set[int] | None = None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.exclude = exclude or set()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or thread_id in self.exclude:
+                continue
+            if self.thread_ids is not None and thread_id not in self.thread_ids:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(self._frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _profile_response(profiler: SamplingProfiler, label: str) -> Response:
+    response = Response(profiler.collapsed(), mimetype="text/plain")
+    filename = f"profile-{label}-{os.getpid()}-{int(time.time())}.folded"
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.headers["X-Profile-Samples"] = str(profiler.samples)
+    response.headers["Cache-Control"] = "private, no-store"
+    return response
+
+
+def _interval_ms() -> float:
+    try:
+        interval = float(request.args.get("interval", "5"))
+    except ValueError:
+        abort(400)
+    return min(max(interval, 1.0), 100.0) / 1000
+
+
+def register_profiler(app):
+    """Register profiling hooks and endpoint (only if PROFILING_ENABLED)."""
+    if not Config.PROFILING_ENABLED:
+        return
+
+    logger.warning("Sampling-Profiler aktiviert (PROFILING_ENABLED=1)")
+
+    @app.before_request
+    def start_request_profile():
+        if "_profile" not in request.args or not is_admin_request():
+            return
+        interval = _interval_ms()
+        if not _profile_lock.acquire(blocking=False):
+            return ("Es läuft bereits ein Profil.", 409)
+        profiler = SamplingProfiler(interval, thread_ids={threading.get_ident()})
+        request.environ["profiler"] = profiler.start()
+
+    @app.after_request
+    def finish_request_profile(response):
+        profiler = request.environ.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        _profile_lock.release()
+        return _profile_response(profiler, request.endpoint or "request")
+
+    @app.teardown_request
+    def abort_request_profile(exc):
+        # Fehlerpfad: after_request lief nicht, Lock trotzdem freigeben
+        profiler = request.environ.pop("profiler", None)
+        if profiler is not None:
+            profiler.stop()
+            _profile_lock.release()
+
+    @app.post("/_admin/profile", endpoint="admin_profile")
+    @require_admin
+    def admin_profile():
+        try:
+            seconds = float(request.args.get("seconds", "10"))
+        except ValueError:
+            abort(400)
+        seconds = min(max(seconds, 0.1), Config.PROFILING_MAX_SECONDS)
+        interval = _interval_ms()
+
+        if not _profile_lock.acquire(blocking=False):
+            return ("Es läuft bereits ein Profil.", 409)
+        try:
+            # Alle Threads des Workers ausser dem wartenden Admin-Request
+            profiler = SamplingProfiler(interval, exclude={threading.get_ident()}).start()
+            time.sleep(seconds)
+            profiler.stop()
+        finally:
+            _profile_lock.release()
+
+        logger.info(f"Profil über {seconds}s erstellt ({profiler.samples} Samples)")
+        return _profile_response(profiler, "window")
@@ -0,0 +1,328 @@
+"""
+Storage backends for the rate limiter of the IT-Kurs application.
+
+The limiter in security.py only decides *whether* a request is allowed;
+the bookkeeping lives in one of the backends below so that the limit can
+be shared between gunicorn workers (SQLite in WAL mode on the same host)
+or between several hosts (any server speaking the Redis protocol).
+
+The shared backends use a sliding-window counter: hits are counted in
+fixed buckets of ``window`` seconds and the previous bucket is weighted by
+how much of it still overlaps the sliding window.
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse, unquote
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitStorageError(Exception):
+    """Raised when a backend cannot answer in time or is unavailable."""
+
+
+def _sliding_estimate(previous: int, current: int, window: int, now: float) -> float:
+    """
+    Weighted hit count for a sliding window built from two fixed buckets.
+
+    Args:
+        previous: Hits in the previous bucket
+        current: Hits in the current bucket (including this request)
+        window: Window length in seconds
+        now: Current timestamp
+
+    Returns:
+        float: Estimated hits within the last ``window`` seconds
+    """
+    elapsed = now % window
+    return previous * ((window - elapsed) / window) + current
+
+
+class MemoryStorage:
+    """Per-process sliding log (the original behaviour, now thread-safe)."""
+
+    def __init__(self):
+        self.requests = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: int) -> bool:
+        """
+        Register a hit for ``key`` and report whether it is within the limit.
+
+        Args:
+            key: Unique identifier (usually IP address)
+            limit: Maximum requests allowed
+            window: Time window in seconds
+
+        Returns:
+            bool: True if request is allowed
+        """
+        now = time.monotonic()
+        window_start = now - window
+
+        with self._lock:
+            hits = self.requests[key]
+            while hits and hits[0] < window_start:
+                hits.popleft()
+
+            if len(hits) >= limit:
+                return False
+
+            hits.append(now)
+            return True
+
+    def key_count(self) -> int:
+        """Number of tracked keys."""
+        return len(self.requests)
+
+
+class SQLiteStorage:
+    """
+    Host-local backend for several worker processes.
+
+    All workers open the same SQLite file in WAL mode. Each hit runs in a
+    ``BEGIN IMMEDIATE`` transaction, so increment and read are atomic even
+    with concurrent writers. The busy timeout doubles as the time budget.
+
+    Bucket numbers depend on the window (``now // window``), so every row
+    carries its own expiry: the cleanup must not compare buckets of
+    limiters with different windows.
+    """
+
+    def __init__(self, path: str, timeout: float = 0.05):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._hits_since_cleanup = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # Connections must not be shared across fork()
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit ("
+            " key TEXT NOT NULL,"
+            " bucket INTEGER NOT NULL,"
+            " hits INTEGER NOT NULL,"
+            " expires_at REAL,"
+            " PRIMARY KEY (key, bucket))"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(rate_limit)")}
+        if "expires_at" not in columns:
+            # Datei aus einer älteren Version: Spalte nachrüsten
+            try:
+                conn.execute("ALTER TABLE rate_limit ADD COLUMN expires_at REAL")
+            except sqlite3.OperationalError:
+                pass  # anderer Worker war schneller
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key: str, limit: int, window: int) -> bool:
+        """Register a hit for ``key``; see :meth:`MemoryStorage.hit`."""
+        now = time.time()
+        bucket = int(now // window)
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Ein Bucket zählt noch als "vorheriger" bis zum Ende des nächsten
+                conn.execute(
+                    "INSERT INTO rate_limit (key, bucket, hits, expires_at) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(key, bucket) DO UPDATE SET hits = hits + 1, expires_at = excluded.expires_at",
+                    (key, bucket, (bucket + 2) * window),
+                )
+                rows = dict(conn.execute(
+                    "SELECT bucket, hits FROM rate_limit WHERE key = ? AND bucket IN (?, ?)",
+                    (key, bucket - 1, bucket),
+                ).fetchall())
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            raise RateLimitStorageError(str(e)) from e
+
+        self._maybe_cleanup(conn, now)
+        estimate = _sliding_estimate(rows.get(bucket - 1, 0), rows.get(bucket, 0), window, now)
+        return estimate <= limit
+
+    def _maybe_cleanup(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired buckets (of any window) every few hundred hits."""
+        self._hits_since_cleanup += 1
+        if self._hits_since_cleanup < 500:
+            return
+        self._hits_since_cleanup = 0
+        try:
+            conn.execute("DELETE FROM rate_limit WHERE expires_at IS NULL OR expires_at < ?", (now,))
+        except sqlite3.Error as e:
+            logger.debug(f"Rate limit cleanup skipped: {e}")
+
+    def key_count(self) -> int:
+        """Number of tracked keys."""
+        try:
+            return self._connection().execute(
+                "SELECT COUNT(DISTINCT key) FROM rate_limit"
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+class RedisStorage:
+    """
+    Multi-node backend for any server speaking the Redis protocol (RESP).
+
+    Uses a tiny built-in client so that no extra dependency is needed.
+    ``INCR``/``EXPIRE``/``GET`` are sent as one ``MULTI``/``EXEC`` block,
+    which the server executes atomically.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: str | None = None, timeout: float = 0.05,
+                 prefix: str = "ratelimit"):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.prefix = prefix
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 0.05) -> "RedisStorage":
+        """Create a backend from ``redis://[:password@]host[:port][/db]``."""
+        parsed = urlparse(url)
+        db = parsed.path.lstrip("/")
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            timeout=timeout,
+        )
+
+    # --- RESP client -------------------------------------------------------
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        self._local.pid = os.getpid()
+        if self.password:
+            self._execute(("AUTH", self.password))
+        if self.db:
+            self._execute(("SELECT", str(self.db)))
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    @staticmethod
+    def _encode(*commands) -> bytes:
+        out = []
+        for args in commands:
+            out.append(f"*{len(args)}\r\n".encode())
+            for arg in args:
+                data = arg if isinstance(arg, bytes) else str(arg).encode()
+                out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise RateLimitStorageError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RateLimitStorageError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RateLimitStorageError(f"Unexpected reply: {line!r}")
+
+    def _execute(self, *commands):
+        self._local.sock.sendall(self._encode(*commands))
+        return [self._read_reply() for _ in commands]
+
+    def _pipeline(self, *commands):
+        if getattr(self._local, "sock", None) is None or self._local.pid != os.getpid():
+            self._connect()
+        try:
+            return self._execute(*commands)
+        except (OSError, RateLimitStorageError) as e:
+            # Drop the connection; a half-read reply would poison the next call
+            self._close()
+            raise RateLimitStorageError(str(e)) from e
+
+    # --- Limiter API -------------------------------------------------------
+
+    def hit(self, key: str, limit: int, window: int) -> bool:
+        """Register a hit for ``key``; see :meth:`MemoryStorage.hit`."""
+        now = time.time()
+        bucket = int(now // window)
+        current_key = f"{self.prefix}:{key}:{bucket}"
+        previous_key = f"{self.prefix}:{key}:{bucket - 1}"
+
+        replies = self._pipeline(
+            ("MULTI",),
+            ("INCR", current_key),
+            ("EXPIRE", current_key, window * 2),
+            ("GET", previous_key),
+            ("EXEC",),
+        )
+        current, _, previous = replies[-1]
+        estimate = _sliding_estimate(int(previous or 0), int(current), window, now)
+        return estimate <= limit
+
+    def key_count(self) -> int:
+        """Not tracked locally for the shared backend."""
+        return 0
+
+
+def create_storage(url: str | None, timeout: float = 0.05):
+    """
+    Create a storage backend from a URL.
+
+    Args:
+        url: ``memory://`` (default), ``sqlite:///path/to/file.db`` or
+             ``redis://[:password@]host[:port][/db]``
+        timeout: Time budget per operation in seconds
+
+    Returns:
+        MemoryStorage | SQLiteStorage | RedisStorage
+    """
+    if not url or url.startswith("memory"):
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        return SQLiteStorage(url[len("sqlite:///"):], timeout=timeout)
+    if url.startswith("redis://"):
+        return RedisStorage.from_url(url, timeout=timeout)
+    raise ValueError(f"Unbekanntes Rate-Limit-Backend: {url}")
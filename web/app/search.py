@@ -0,0 +1,458 @@
+"""
+Full-text search over the course materials.
+
+Indexed are the rendered texts of every lesson (``Lxx/index.md``) and every
+``assets/*.md`` page of the courses in ``courses.json``.
+
+- German-aware analysis: lower case, umlaut folding (ä -> a, ß -> ss),
+  stop words and a light suffix stemmer ("Netzwerke" -> "netzwerk")
+- inverted index as compact arrays: per term ``array('I')`` of document ids
+  and ``array('H')`` of term frequencies, ranked with BM25
+- persisted outside the content folder (``SEARCH_INDEX_PATH``, default in
+  the temp directory like the content-build state) and updated per
+  document: a changed source file replaces only its own document
+  (tombstone + append, compacted when a quarter is dead)
+- queries never wait for indexing: building a missing index and picking up
+  changes run in a background thread; until the first index exists the
+  search page answers 503 "wird aufgebaut"
+
+``GET /unterlagen/<slug>/suche?q=...`` shows the hits with highlighted
+snippets; the latency goes into ``search_duration_seconds`` (p99 via
+``histogram_quantile``).
+"""
+
+import base64
+import html as html_lib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from functools import lru_cache
+from pathlib import Path
+
+import click
+from markupsafe import Markup, escape
+
+from .config import Config
+from .file_serving import content_hash
+from .utils.content_loader import META_DIR
+from .utils.markdown_loader import DURCHFUEHRUNGEN_DIR, load_asset_page, load_lesson
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 180
+
+STOPWORDS = frozenset("""
+    aber alle allem allen aller alles als also am an auch auf aus bei bin bis bist da damit dann
+    das dass dein deine dem den der des dich die dies diese diesem diesen dieser dieses dir doch
+    du durch ein eine einem einen einer eines er es euch euer fur hat hatte hier ich ihr ihre im
+    in ist ja jede jedem jeden jeder jedes kann kein keine man mein meine mit nach nicht noch nur
+    ob oder ohne sich sie sind so uber um und uns unser vom von vor war waren was weil wenn wer
+    wie wir wird wo zu zum zur
+""".split())
+# Endungen, längste zuerst; der Stamm muss mindestens 4 Zeichen behalten
+_SUFFIXES = ("ern", "em", "en", "er", "es", "e", "s", "n")
+_FOLD = str.maketrans({"ä": "a", "ö": "o", "ü": "u", "ß": "ss", "é": "e", "è": "e", "à": "a"})
+_WORD = re.compile(r"\w+")
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=65536)
+def normalize(word: str) -> str | None:
+    """
+    Index term for a word: folded, stemmed; None for stop words and noise.
+    """
+    word = word.lower().translate(_FOLD)
+    if word in STOPWORDS or len(word) < 2:
+        return None
+    if not word.isdigit():
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[:-len(suffix)]
+                break
+    return word
+
+
+def analyze(text: str) -> list[str]:
+    """Terms of a text in order (stop words dropped)."""
+    return [term for term in map(normalize, _WORD.findall(text)) if term]
+
+
+def html_to_text(html: str) -> str:
+    return _SPACE.sub(" ", html_lib.unescape(_TAG.sub(" ", html))).strip()
+
+
+def _encode(values: array) -> str:
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _decode(typecode: str, data: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    return values
+
+
+class SearchIndex:
+    """
+    Inverted index with BM25 ranking.
+
+    Documents are dicts with at least ``key``, ``slug``, ``title``, ``text``
+    and ``signature``; removed documents leave a tombstone (None) until
+    :meth:`compacted`.
+    """
+
+    def __init__(self):
+        self.terms: dict[str, int] = {}
+        self.doc_ids: list[array] = []
+        self.freqs: list[array] = []
+        self.lengths = array("I")
+        self.docs: list[dict | None] = []
+        self.by_key: dict[str, int] = {}
+        self.total_length = 0
+
+    @property
+    def live_count(self) -> int:
+        return len(self.by_key)
+
+    def add(self, doc: dict) -> int:
+        """Index one document (replaces an existing one with the same key)."""
+        if doc["key"] in self.by_key:
+            self.remove(doc["key"])
+        counts: dict[str, int] = {}
+        terms = analyze(f"{doc['title']} {doc['text']}")
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        # Reihenfolge für Leser ohne Lock (search): erst Dokument und Länge,
+        # dann Posting-Listen, zuletzt der Term-Eintrag, der auf sie zeigt
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.lengths.append(len(terms))
+        for term, count in counts.items():
+            term_id = self.terms.get(term)
+            if term_id is None:
+                # Dokument-IDs wachsen nur: Postings bleiben sortiert
+                self.doc_ids.append(array("I", [doc_id]))
+                self.freqs.append(array("H", [min(count, 0xFFFF)]))
+                self.terms[term] = len(self.doc_ids) - 1
+                continue
+            self.doc_ids[term_id].append(doc_id)
+            self.freqs[term_id].append(min(count, 0xFFFF))
+        self.by_key[doc["key"]] = doc_id
+        self.total_length += len(terms)
+        return doc_id
+
+    def remove(self, key: str) -> None:
+        doc_id = self.by_key.pop(key, None)
+        if doc_id is not None:
+            self.docs[doc_id] = None
+            self.total_length -= self.lengths[doc_id]
+
+    def compacted(self) -> "SearchIndex":
+        """Copy without tombstones (re-numbered; readers keep the old one)."""
+        index = SearchIndex()
+        for doc in self.docs:
+            if doc is not None:
+                index.add(doc)
+        return index
+
+    def needs_compaction(self) -> bool:
+        return len(self.docs) - self.live_count > max(8, self.live_count // 4)
+
+    def search(self, query: str, slug: str | None = None, limit: int = 20) -> list[tuple[float, dict]]:
+        """
+        BM25-ranked documents for ``query``.
+
+        Args:
+            query: Free text (analysed like the documents)
+            slug: Only documents of this course
+            limit: Maximum number of hits
+        """
+        live = self.live_count
+        if not live:
+            return []
+        average = self.total_length / live or 1.0
+        scores: dict[int, float] = {}
+        for term in dict.fromkeys(analyze(query)):
+            term_id = self.terms.get(term)
+            if term_id is None:
+                continue
+            doc_ids, freqs = self.doc_ids[term_id], self.freqs[term_id]
+            df = sum(1 for d in doc_ids if self.docs[d] is not None)
+            if not df:
+                continue
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(doc_ids, freqs):
+                doc = self.docs[doc_id]
+                if doc is None or (slug is not None and doc["slug"] != slug):
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / average)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, self.docs[doc_id]) for doc_id, score in best]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "terms": list(self.terms),
+            "doc_ids": [_encode(a) for a in self.doc_ids],
+            "freqs": [_encode(a) for a in self.freqs],
+            "lengths": _encode(self.lengths),
+            "docs": self.docs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SearchIndex":
+        index = cls()
+        index.terms = {term: i for i, term in enumerate(data["terms"])}
+        index.doc_ids = [_decode("I", d) for d in data["doc_ids"]]
+        index.freqs = [_decode("H", d) for d in data["freqs"]]
+        index.lengths = _decode("I", data["lengths"])
+        index.docs = data["docs"]
+        index.by_key = {doc["key"]: i for i, doc in enumerate(index.docs) if doc is not None}
+        index.total_length = sum(length for doc, length in zip(index.docs, index.lengths) if doc is not None)
+        return index
+
+
+_UNFOLD = {"a": "[aäà]", "o": "[oö]", "u": "[uü]", "e": "[eéè]"}
+
+
+@lru_cache(maxsize=1024)
+def _candidates(terms: frozenset) -> re.Pattern | None:
+    """
+    Regex for words that may normalize to one of ``terms`` (checked afterwards).
+
+    Scanning the text in C and normalizing only the candidates keeps snippets
+    cheap for long documents.
+    """
+    if not terms:
+        return None
+    alternatives = []
+    for term in sorted(terms, key=len, reverse=True):
+        parts = re.split("(ss)", term)
+        alternatives.append("".join(
+            "(?:ss|ß)" if part == "ss" else "".join(_UNFOLD.get(c, re.escape(c)) for c in part)
+            for part in parts
+        ))
+    return re.compile(rf"\b(?:{'|'.join(alternatives)})\w*", re.IGNORECASE)
+
+
+def snippet(text: str, query: str, width: int = SNIPPET_CHARS) -> Markup:
+    """
+    Excerpt around the densest cluster of query terms, matches in ``<mark>``.
+    """
+    wanted = set(analyze(query))
+    pattern = _candidates(frozenset(wanted))
+    matches = [m for m in pattern.finditer(text) if normalize(m.group()) in wanted] if pattern else []
+    if not matches:
+        return Markup(escape(text[:width] + ("…" if len(text) > width else "")))
+
+    # Fenster mit den meisten Treffern (zwei Zeiger über die Trefferliste)
+    best, best_count, last = matches[0].start(), 0, 0
+    for i, first in enumerate(matches):
+        last = max(last, i)
+        while last + 1 < len(matches) and matches[last + 1].end() - first.start() <= width:
+            last += 1
+        if last - i + 1 > best_count:
+            best, best_count = first.start(), last - i + 1
+    start = max(0, best - width // 4)
+    if start:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < best else start
+    end = min(len(text), start + width)
+
+    parts, position = [], start
+    for m in matches:
+        if m.start() < start or m.end() > end:
+            continue
+        parts.append(escape(text[position:m.start()]))
+        parts.append(Markup("<mark>%s</mark>") % m.group())
+        position = m.end()
+    parts.append(escape(text[position:end]))
+    return Markup(("… " if start else "") + "".join(parts) + (" …" if end < len(text) else ""))
+
+
+class SearchService:
+    """
+    Keeps the index current with the content and answers queries.
+
+    Args:
+        path: JSON file the index is persisted to
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = str(path)
+        self.index: SearchIndex | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._worker_lock = threading.Lock()
+
+    def sources(self) -> dict[str, tuple[Path, str, str, str]]:
+        """Document key -> (Markdown file, slug, kind, name)."""
+        try:
+            courses = json.loads((META_DIR / "courses.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"courses.json nicht lesbar: {e}")
+            return {}
+        sources = {}
+        for slug in (c["id"] for c in courses if "id" in c):
+            course = DURCHFUEHRUNGEN_DIR / slug
+            for md in sorted(course.glob("L*/index.md")):
+                sources[f"lesson:{slug}:{md.parent.name}"] = (md, slug, "lesson", md.parent.name)
+            for md in sorted((course / "assets").rglob("*.md")):
+                name = md.relative_to(course / "assets").as_posix()
+                sources[f"asset_page:{slug}:{name}"] = (md, slug, "asset", name)
+        return sources
+
+    @staticmethod
+    def _document(key: str, md: Path, slug: str, kind: str, name: str) -> dict | None:
+        # Signatur vor dem Lesen: ändert sich die Datei dazwischen, wird sie beim
+        # nächsten Mal erneut indexiert. Ungecacht rendern, sonst käme nach einer
+        # Änderung der alte Inhalt zur neuen Signatur in den Index.
+        signature = content_hash(md)
+        if kind == "lesson":
+            page = load_lesson.__wrapped__(slug, name)
+        else:
+            page = load_asset_page.__wrapped__(slug, name)
+        if page is None:
+            return None
+        meta, html = page
+        return {
+            "key": key,
+            "slug": slug,
+            "kind": kind,
+            "name": name,
+            "title": str(meta.get("title") or name),
+            "text": html_to_text(html),
+            "signature": signature,
+        }
+
+    def _load(self) -> SearchIndex | None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return SearchIndex.from_dict(data)
+        except (OSError, ValueError, KeyError) as e:
+            logger.info(f"Suchindex {self.path} nicht geladen, baue neu: {e}")
+        return None
+
+    def _save(self) -> None:
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.index.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Suchindex nicht gespeichert: {e}")
+
+    def update(self, force: bool = False) -> list[str]:
+        """
+        Re-index documents whose source changed (throttled like content builds).
+
+        Returns:
+            list[str]: Keys of re-indexed or removed documents
+        """
+        now = time.monotonic()
+        if not force and self.index is not None and now < self._next_check:
+            return []
+        with self._lock:
+            self._next_check = now + Config.CONTENT_STATE_CHECK_INTERVAL
+            # Ein neuer Index wird erst veröffentlicht, wenn er vollständig ist
+            index = self.index or self._load() or SearchIndex()
+
+            changed = []
+            sources = self.sources()
+            for key in [key for key in index.by_key if key not in sources]:
+                index.remove(key)
+                changed.append(key)
+            for key, (md, slug, kind, name) in sources.items():
+                doc_id = index.by_key.get(key)
+                if doc_id is not None and index.docs[doc_id]["signature"] == content_hash(md):
+                    continue
+                try:
+                    doc = self._document(key, md, slug, kind, name)
+                except Exception as e:
+                    logger.warning(f"Suchindex: {key} nicht gerendert: {e}")
+                    continue
+                if doc is not None:
+                    index.add(doc)
+                else:
+                    index.remove(key)
+                changed.append(key)
+
+            if changed and index.needs_compaction():
+                index = index.compacted()
+            self.index = index
+            if changed:
+                self._save()
+            return changed
+
+    def _update_in_background(self) -> None:
+        try:
+            self.update()
+        except Exception:
+            logger.exception("Suchindex: Aktualisierung fehlgeschlagen")
+
+    def refresh(self) -> bool:
+        """
+        Bring the index up to date without blocking the caller.
+
+        A saved index is loaded on first use; building a missing one and
+        re-indexing changed documents run in a background thread while
+        queries use the current index.
+
+        Returns:
+            bool: Whether an index is available
+        """
+        building = self._worker is not None and self._worker.is_alive()
+        if self.index is None and not building and os.path.isfile(self.path):
+            self.index = self._load()
+        if self.index is None or time.monotonic() >= self._next_check:
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._update_in_background, name="search-index", daemon=True)
+                    self._worker.start()
+        return self.index is not None
+
+    def search(self, query: str, slug: str | None = None, limit: int = 20) -> list[dict] | None:
+        """
+        Hits as dicts with ``score``, document fields and ``snippet``.
+
+        Returns:
+            list | None: The hits, or None while the index is still being built
+        """
+        if not self.refresh():
+            return None
+        return [
+            {**doc, "score": round(score, 4), "snippet": snippet(doc["text"], query)}
+            for score, doc in self.index.search(query, slug, limit)
+        ]
+
+
+search_service = SearchService(Config.SEARCH_INDEX_PATH)
+
+
+def register_search(app):
+    """Register ``flask build-search`` (the index also updates itself on queries)."""
+
+    @app.cli.command("build-search")
+    @click.option("--force", is_flag=True, help="Index komplett neu aufbauen")
+    def build_search(force):
+        """Index changed lessons and asset pages into SEARCH_INDEX_PATH."""
+        started = time.perf_counter()
+        if force:
+            search_service.index = SearchIndex()
+        changed = search_service.update(force=True)
+        index = search_service.index
+        print(f"{len(changed)} Dokumente indexiert, {index.live_count} im Index, {len(index.terms)} Terme "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms) -> {search_service.path}")
@@ -7,21 +7,35 @@ rate limiting, input sanitization, and security headers.
 
 import logging
 import re
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
+import time
 from functools import wraps
 from flask import request, abort, g
 from markupsafe import escape
+from .config import Config
+from .rate_limit_storage import MemoryStorage, create_storage
 
 logger = logging.getLogger(__name__)
 
+# Vorkompilierte Muster (werden pro Request mehrfach verwendet)
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+SCRIPT_TAG_RE = re.compile(r'<script[^>]*>.*?</script>', re.IGNORECASE | re.DOTALL)
+JS_PROTOCOL_RE = re.compile(r'javascript:', re.IGNORECASE)
+
 
-# Simple in-memory rate limiting (for production, consider Redis)
 class RateLimiter:
-    """Simple in-memory rate limiter."""
+    """
+    Rate limiter with a pluggable storage backend.
+
+    The backend (see rate_limit_storage.py) keeps the counters; the limiter
+    fails open if the backend errors or exceeds its time budget, and then
+    leaves it alone for ``retry_after`` seconds so a slow store cannot add
+    latency to every request.
+    """
     
-    def __init__(self):
-        self.requests = defaultdict(deque)
+    def __init__(self, storage=None, retry_after: float = 30.0):
+        self.storage = storage or MemoryStorage()
+        self.retry_after = retry_after
+        self._disabled_until = 0.0
     
     def is_allowed(self, key: str, limit: int = 10, window: int = 60) -> bool:
         """
@@ -35,23 +49,20 @@ class RateLimiter:
         Returns:
             bool: True if request is allowed
         """
-        now = datetime.now()
-        window_start = now - timedelta(seconds=window)
-        
-        # Clean old requests
-        while self.requests[key] and self.requests[key][0] < window_start:
-            self.requests[key].popleft()
-        
-        # Check if within limit
-        if len(self.requests[key]) >= limit:
-            return False
+        if time.monotonic() < self._disabled_until:
+            return True
         
-        # Add current request
-        self.requests[key].append(now)
-        return True
+        try:
+            return self.storage.hit(key, limit, window)
+        except Exception as e:
+            logger.warning(f"Rate limit storage unavailable, failing open: {e}")
+            self._disabled_until = time.monotonic() + self.retry_after
+            return True
 
 
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(
+    create_storage(Config.RATE_LIMIT_STORAGE, timeout=Config.RATE_LIMIT_TIMEOUT)
+)
 
 
 def rate_limit(limit: int = 10, window: int = 60):
@@ -65,9 +76,9 @@ def rate_limit(limit: int = 10, window: int = 60):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            key = request.remote_addr
+            key = f"{request.endpoint}:{request.remote_addr}"
             if not rate_limiter.is_allowed(key, limit, window):
-                logger.warning(f"Rate limit exceeded for {key}")
+                logger.warning(f"Rate limit exceeded for {request.remote_addr}")
                 abort(429)  # Too Many Requests
             return f(*args, **kwargs)
         return decorated_function
@@ -92,8 +103,8 @@ def sanitize_input(text: str) -> str:
     
     # Additional cleaning for common attack patterns
     # Remove script tags and javascript: protocols
-    sanitized = re.sub(r'<script[^>]*>.*?</script>', '', str(sanitized), flags=re.IGNORECASE | re.DOTALL)
-    sanitized = re.sub(r'javascript:', '', sanitized, flags=re.IGNORECASE)
+    sanitized = SCRIPT_TAG_RE.sub('', str(sanitized))
+    sanitized = JS_PROTOCOL_RE.sub('', sanitized)
     
     return sanitized.strip()
 
@@ -111,8 +122,7 @@ def validate_email(email: str) -> bool:
     if not email:
         return False
     
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return EMAIL_RE.match(email) is not None
 
 
 def add_security_headers(response):
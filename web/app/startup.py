@@ -0,0 +1,163 @@
+"""
+Startup timeline for the IT-Kurs application.
+
+Records where boot time goes, kept in the process and served to admins at
+``GET /_admin/startup``:
+
+- an import breakdown like ``python -X importtime`` (self and cumulative
+  time per module imported while booting)
+- named phases (``create_app`` and the ``register_*`` steps)
+
+Import recording starts in ``wsgi.py`` (before the app is imported) and
+stops at the end of the first ``create_app()``; elsewhere (tests, CLI,
+benchmarks) no import hook is installed and only the phases are recorded.
+Set ``STARTUP_TIMELINE=0`` to disable it. Only stdlib imports here: this
+module is loaded before everything else.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Schwere Abhängigkeiten, die erst bei Bedarf geladen werden sollen
+DEFERRED_MODULES = ("yaml", "markdown", "requests", "wtforms", "flask_wtf", "email_validator", "dns", "PIL")
+
+_T0 = time.perf_counter()
+
+
+class _TimedLoader:
+    """Wraps a loader to time ``exec_module``; everything else is delegated."""
+
+    def __init__(self, loader, recorder: "ImportRecorder"):
+        self._loader = loader
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Modul sieht seinen echten Loader (isinstance-Prüfungen, Ressourcen)
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._recorder._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._recorder._exit()
+
+
+class ImportRecorder:
+    """
+    ``sys.meta_path`` finder that times module execution (nested like -X importtime).
+    """
+
+    def __init__(self):
+        self.entries: list[dict] = []
+        self._stack: list[list] = []
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _enter(self, name: str) -> None:
+        # [Name, Start, Zeit der Unter-Importe]
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self) -> None:
+        name, started, children = self._stack.pop()
+        cumulative = time.perf_counter() - started
+        if self._stack:
+            self._stack[-1][2] += cumulative
+        self.entries.append({
+            "module": name,
+            "depth": len(self._stack),
+            "self_ms": round((cumulative - children) * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        })
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+class StartupTimeline:
+    """Boot phases and import breakdown of this process."""
+
+    def __init__(self):
+        self.phases: list[dict] = []
+        self.imports = ImportRecorder()
+        self.finished_at = None
+        self.enabled = os.getenv("STARTUP_TIMELINE", "1") == "1"
+
+    def start(self) -> None:
+        if self.enabled:
+            self.imports.install()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measure one boot phase: ``with timeline.phase("create_app"): ...``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.finished_at is None:
+                self.phases.append({
+                    "name": name,
+                    "start_ms": round((started - _T0) * 1000, 3),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                })
+
+    def finish(self) -> None:
+        """Stop recording (called at the end of every ``create_app``)."""
+        self.imports.uninstall()
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+
+    def report(self, limit: int = 30) -> dict:
+        end = self.finished_at or time.perf_counter()
+        imports = sorted(self.imports.entries, key=lambda e: e["cumulative_ms"], reverse=True)
+        return {
+            "pid": os.getpid(),
+            "enabled": self.enabled,
+            "total_ms": round((end - _T0) * 1000, 3),
+            "phases": self.phases,
+            "imports_ms": round(sum(e["self_ms"] for e in self.imports.entries), 3),
+            "slowest_imports": imports[:limit],
+            "deferred_not_loaded": [m for m in DEFERRED_MODULES if m not in sys.modules],
+        }
+
+
+timeline = StartupTimeline()
+
+
+def register_startup_report(app):
+    """Register ``GET /_admin/startup`` (admin only)."""
+    from flask import jsonify, request
+
+    from .auth import require_admin
+
+    @app.get("/_admin/startup", endpoint="admin_startup")
+    @require_admin
+    def admin_startup():
+        try:
+            limit = min(max(int(request.args.get("limit", "30")), 1), 500)
+        except ValueError:
+            limit = 30
+        return jsonify(timeline.report(limit))
@@ -0,0 +1,24 @@
+// Offline-Lesen: registriert den Service Worker der Kursunterlagen und lässt
+// ihn die Lektionen des aktuellen Kurses vorladen (siehe app/offline.py).
+(function () {
+  "use strict";
+  var script = document.currentScript;
+  if (!("serviceWorker" in navigator) || !script) {
+    return;
+  }
+  var worker = script.getAttribute("data-worker");
+  var manifest = script.getAttribute("data-manifest");
+
+  window.addEventListener("load", function () {
+    navigator.serviceWorker.register(worker, { scope: "/unterlagen/" })
+      .then(function () { return navigator.serviceWorker.ready; })
+      .then(function (registration) {
+        if (manifest && registration.active) {
+          registration.active.postMessage({ type: "precache", manifest: manifest });
+        }
+      })
+      .catch(function (error) {
+        console.warn("Offline-Modus nicht verfügbar:", error);
+      });
+  });
+})();
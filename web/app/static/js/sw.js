@@ -0,0 +1,120 @@
+// Service Worker der Kursunterlagen (Scope /unterlagen/, siehe app/offline.py).
+//
+// - "precache"-Nachricht: Manifest des Kurses laden und alle URLs in den
+//   Cache des Kurses legen; unveränderte Dateien (gleiches ?v=) bleiben liegen
+// - URLs mit ?v= (Inhalt im Namen): aus dem Cache, ohne Netz
+// - Kurs-/Lektionsseiten: aus dem Cache, im Hintergrund revalidieren
+// - alles andere (Suche, Anmeldung, Admin): Netz
+"use strict";
+
+const CACHE_PREFIX = "unterlagen-";
+const COURSE = /^\/unterlagen\/([^/]+)(?:\/|$)/;
+const DERIVATIVE = /^(\/unterlagen\/[^/]+)\/bild\/\d+\/(.+?)(?:\.webp)?$/;
+
+self.addEventListener("install", () => self.skipWaiting());
+
+self.addEventListener("activate", (event) => event.waitUntil(self.clients.claim()));
+
+self.addEventListener("message", (event) => {
+  const data = event.data || {};
+  if (data.type === "precache" && data.manifest) {
+    event.waitUntil(precache(new URL(data.manifest, self.location).href));
+  }
+});
+
+async function precache(manifestUrl) {
+  const response = await fetch(manifestUrl, { cache: "no-cache" });
+  if (!response.ok) {
+    return;
+  }
+  const manifest = await response.clone().json();
+  if (!manifest.cache || !manifest.cache.startsWith(CACHE_PREFIX)) {
+    return;
+  }
+  const cache = await caches.open(manifest.cache);
+  const previous = await cache.match(manifestUrl);
+  if (previous && (await previous.json()).version === manifest.version) {
+    return;
+  }
+
+  const wanted = new Set(manifest.urls.map((url) => new URL(url, self.location).href));
+  wanted.add(manifestUrl);
+  const cached = new Set((await cache.keys()).map((request) => request.url));
+  await Promise.allSettled([...wanted].map(async (url) => {
+    // Fingerprint-URLs ändern sich nie; Seiten ohne Fingerprint neu holen
+    if (url === manifestUrl || (cached.has(url) && new URL(url).searchParams.has("v"))) {
+      return;
+    }
+    const fresh = await fetch(url, { cache: "no-cache" });
+    if (fresh.ok) {
+      await cache.put(url, fresh);
+    }
+  }));
+  await Promise.all([...cached].filter((url) => !wanted.has(url)).map((url) => cache.delete(url)));
+  // Manifest zuletzt: erst jetzt gilt die neue Version als vollständig
+  await cache.put(manifestUrl, response);
+}
+
+function courseCache(pathname) {
+  const match = COURSE.exec(pathname);
+  return match ? CACHE_PREFIX + match[1] : null;
+}
+
+async function fromNetwork(request, cacheName) {
+  const response = await fetch(request);
+  if (response.ok && cacheName) {
+    const copy = response.clone();
+    caches.open(cacheName).then((cache) => cache.put(request, copy));
+  }
+  return response;
+}
+
+async function cacheFirst(request, url) {
+  const cached = await caches.match(request);
+  if (cached) {
+    return cached;
+  }
+  try {
+    return await fromNetwork(request, courseCache(url.pathname));
+  } catch (error) {
+    // Offline und Bildvariante nie gesehen: Originalbild aus dem Precache
+    const derivative = DERIVATIVE.exec(url.pathname);
+    const original = derivative && await caches.match(`${derivative[1]}/media/${derivative[2]}`, { ignoreSearch: true });
+    if (original) {
+      return original;
+    }
+    throw error;
+  }
+}
+
+async function cacheHolding(request) {
+  for (const name of await caches.keys()) {
+    if (name.startsWith(CACHE_PREFIX) && await (await caches.open(name)).match(request)) {
+      return name;
+    }
+  }
+  return null;
+}
+
+async function staleWhileRevalidate(event, request) {
+  const cached = await caches.match(request);
+  if (!cached) {
+    return fetch(request);
+  }
+  const cacheName = courseCache(new URL(request.url).pathname) || await cacheHolding(request);
+  event.waitUntil(fromNetwork(request, cacheName).catch(() => undefined));
+  return cached;
+}
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== "GET" || url.origin !== self.location.origin) {
+    return;
+  }
+  if (url.searchParams.has("v")) {
+    event.respondWith(cacheFirst(request, url));
+  } else if (!url.search && (COURSE.test(url.pathname) || url.pathname.startsWith("/static/"))) {
+    event.respondWith(staleWhileRevalidate(event, request));
+  }
+});
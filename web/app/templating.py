@@ -0,0 +1,142 @@
+"""
+Jinja setup: fragment cache tag, bytecode cache and template reloading.
+
+Fragment cache::
+
+    {% cache "kursliste", version=course_registry_version() %}
+      ... Kurskarten ...
+    {% endcache %}
+
+    {% cache ("lessons", kurs.id), 600, version=lesson_index_version(kurs.id) %}
+
+The key is a string or a tuple (joined with ``:``), the optional second
+argument the TTL in seconds (default ``FRAGMENT_CACHE_TTL``). The rendered
+markup is stored in the app cache under ``fragment:<key>`` together with
+``version``, a version of the data the fragment shows
+(``course_registry_version()``, ``lesson_index_version(slug)``, or
+``|version`` on any JSON-like value). A different version on read renders
+the fragment again and replaces the entry: there is one entry per fragment,
+never a stale one, and old versions do not pile up in the cache. Fragments
+must not depend on the user (``is_admin``).
+
+Compiled templates go to a ``FileSystemBytecodeCache`` (``JINJA_BYTECODE_DIR``,
+filled at image build time by ``flask build-templates``), and outside debug
+mode templates are not checked for changes (``auto_reload`` off): workers
+neither compile nor ``stat`` templates while warming up.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .cache import cache
+from .config import Config
+from .utils.markdown_loader import list_lessons
+
+FRAGMENT_PREFIX = "fragment:"
+_VERSIONS_MAX = 256
+
+_versions: dict[int, tuple[object, str]] = {}
+_versions_lock = threading.Lock()
+
+
+def data_version(value) -> str:
+    """
+    Short content hash of JSON-like data.
+
+    Memoized per object: cached data (``load_courses()``, ``list_lessons()``)
+    is the same object until its cache entry is replaced, so the hash is
+    computed once per content version.
+    """
+    entry = _versions.get(id(value))
+    if entry is not None and entry[0] is value:
+        return entry[1]
+    version = hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    with _versions_lock:
+        # Referenz behalten: sonst könnte die id() an ein neues Objekt gehen
+        _versions[id(value)] = (value, version)
+        while len(_versions) > _VERSIONS_MAX:
+            del _versions[next(iter(_versions))]
+    return version
+
+
+def lesson_index_version(slug: str) -> str:
+    """Version of a course's lesson list (changes with titles, ids and order)."""
+    return data_version(list_lessons(slug))
+
+
+def fragment_key(key) -> str:
+    if isinstance(key, (tuple, list)):
+        key = ":".join(str(part) for part in key)
+    return f"{FRAGMENT_PREFIX}{key}"
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache key[, ttl][, version=...] %}...{% endcache %}`` backed by the app cache."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        options = {"ttl": nodes.Const(None), "version": nodes.Const(None)}
+        positional = True
+        while parser.stream.skip_if("comma"):
+            if parser.stream.current.type == "name" and parser.stream.look().type == "assign":
+                name = next(parser.stream).value
+                if name not in options:
+                    parser.fail(f"cache: unbekanntes Argument {name!r}", lineno)
+                next(parser.stream)
+                options[name] = parser.parse_expression()
+                positional = False
+            elif positional:
+                options["ttl"] = parser.parse_expression()
+                positional = False
+            else:
+                parser.fail("cache: erwartet key[, ttl][, version=...]", lineno)
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        args = [key, options["ttl"], options["version"]]
+        return nodes.CallBlock(self.call_method("_render", args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, version, caller):
+        key = fragment_key(key)
+        entry = cache.get(key, Config.FRAGMENT_CACHE_TTL if ttl is None else ttl)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        html = Markup(caller())
+        # Gleicher Key, neue Version: der Eintrag wird ersetzt, nicht ergänzt
+        cache.set(key, (version, html))
+        return html
+
+
+def register_templating(app):
+    """Fragment cache tag, bytecode cache, ``auto_reload`` and ``flask build-templates``."""
+    env = app.jinja_env
+    env.add_extension(FragmentCacheExtension)
+    env.globals["lesson_index_version"] = lesson_index_version
+    env.filters["version"] = data_version
+
+    # Im Betrieb ändern sich Templates nur mit einem neuen Image
+    env.auto_reload = bool(Config.TEMPLATES_AUTO_RELOAD or app.config.get("TEMPLATES_AUTO_RELOAD")
+                           or app.debug or Config.FLASK_DEBUG)
+    if Config.JINJA_BYTECODE_DIR:
+        os.makedirs(Config.JINJA_BYTECODE_DIR, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(Config.JINJA_BYTECODE_DIR)
+
+    @app.cli.command("build-templates")
+    def build_templates():
+        """Compile all templates into the bytecode cache (JINJA_BYTECODE_DIR)."""
+        if env.bytecode_cache is None:
+            raise SystemExit("JINJA_BYTECODE_DIR ist nicht gesetzt")
+        started = time.perf_counter()
+        names = env.list_templates(filter_func=lambda name: name.endswith(".html"))
+        for name in names:
+            env.get_template(name)
+        print(f"{len(names)} Templates kompiliert ({(time.perf_counter() - started) * 1000:.0f} ms) "
+              f"-> {Config.JINJA_BYTECODE_DIR}")
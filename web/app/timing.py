@@ -0,0 +1,139 @@
+"""
+Request phase timing for the IT-Kurs application.
+
+Hot paths annotate themselves with ``phase("name")`` or ``@timed("name")``.
+When enabled (``SERVER_TIMING=1``), the collected durations are sent as a
+``Server-Timing`` response header (visible in the browser dev tools) and
+requests slower than ``SLOW_REQUEST_MS`` are logged as one JSON line.
+
+When disabled, ``phase()`` returns a shared no-op context manager and
+``@timed`` adds a single flag check per call.
+"""
+
+import json
+import logging
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from flask import has_request_context, request, template_rendered, before_render_template
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+_enabled = Config.SERVER_TIMING
+_NOOP = nullcontext()
+_ENVIRON_KEY = "timing.phases"
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn phase timing on or off at runtime."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def record(name: str, duration: float) -> None:
+    """
+    Add ``duration`` seconds to phase ``name`` of the current request.
+
+    Repeated phases (e.g. several SQL statements) are summed up.
+    """
+    if not _enabled or not has_request_context():
+        return
+    phases = request.environ.setdefault(_ENVIRON_KEY, {})
+    total, count = phases.get(name, (0.0, 0))
+    phases[name] = (total + duration, count + 1)
+
+
+class _Phase:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def phase(name: str):
+    """Context manager measuring one phase: ``with phase("render_lesson"): ...``"""
+    if not _enabled:
+        return _NOOP
+    return _Phase(name)
+
+
+def timed(name: str):
+    """Decorator form of :func:`phase`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _header_value(phases: dict, total: float) -> str:
+    parts = [
+        f'{name};dur={duration * 1000:.2f};desc="{count}x"'
+        for name, (duration, count) in phases.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def register_server_timing(app):
+    """Register Server-Timing header, slow-request log and template timing."""
+
+    @app.before_request
+    def start_server_timing():
+        if _enabled:
+            request.environ["timing.started"] = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing(response):
+        started = request.environ.get("timing.started")
+        if not _enabled or started is None:
+            return response
+
+        total = time.perf_counter() - started
+        phases = request.environ.get(_ENVIRON_KEY, {})
+        response.headers["Server-Timing"] = _header_value(phases, total)
+
+        if total * 1000 >= Config.SLOW_REQUEST_MS:
+            logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 2),
+                "phases_ms": {name: round(d * 1000, 2) for name, (d, _) in phases.items()},
+            }))
+        return response
+
+    # Jinja-Rendering über Flask-Signale messen (verschachtelte Templates: Stack)
+    def _template_started(sender, template, context, **extra):
+        if _enabled and has_request_context():
+            request.environ.setdefault("timing.templates", []).append(time.perf_counter())
+
+    def _template_finished(sender, template, context, **extra):
+        if _enabled and has_request_context():
+            stack = request.environ.get("timing.templates")
+            if stack:
+                record("template", time.perf_counter() - stack.pop())
+
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_finished, app, weak=False)
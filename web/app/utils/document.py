@@ -0,0 +1,201 @@
+# web/app/utils/document.py
+"""
+Markdown-Dokumente mit YAML-Front-Matter: einmal trennen, einmal parsen.
+
+Ein Dokument beginnt optional mit einem Front-Matter-Block::
+
+    ---
+    id: L01
+    title: "Lektion 1: Einstieg"
+    order: 1
+    ---
+
+Der Block endet an der ersten Zeile, die nur aus ``---`` (oder ``...``)
+besteht. Fehlt diese Zeile, gilt der ganze Text als Body.
+
+Flache ``key: value``-Köpfe (alle Lektionen) werden ohne YAML gelesen; die
+Werte werden dabei wie von YAML aufgelöst (Zahlen, true/false, null, Strings
+in Anführungszeichen). Alles andere (Listen, Verschachtelung, Datumswerte,
+Anker, ...) geht an ``yaml`` mit dem libyaml-``CSafeLoader``, falls
+vorhanden. ``load_document`` hält geparste Dokumente pro Pfad, bis sich
+mtime oder Grösse der Datei ändern.
+"""
+
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_DELIMITERS = ("---", "...")
+_KEY = re.compile(r"([A-Za-z_][\w-]*):(?:[ \t]+(.*))?$")
+_INT = re.compile(r"[-+]?(?:0|[1-9][0-9]*)$")
+_FLOAT = re.compile(r"[-+]?[0-9]+\.[0-9]*$|\.[0-9]+$")
+_BOOLS = {
+    "true": True, "True": True, "TRUE": True, "yes": True, "Yes": True, "YES": True,
+    "on": True, "On": True, "ON": True,
+    "false": False, "False": False, "FALSE": False, "no": False, "No": False, "NO": False,
+    "off": False, "Off": False, "OFF": False,
+}
+_NULLS = {"", "~", "null", "Null", "NULL"}
+# Plain Scalars, die YAML anders als String auflöst oder die Struktur einleiten
+_SPECIAL_START = tuple("[]{}&*!|><=%@`#?-:.+") + tuple("0123456789")
+
+
+@dataclass(frozen=True)
+class Document:
+    """
+    A parsed Markdown source.
+
+    Attributes:
+        meta: Front-matter values ({} without front matter or on YAML errors)
+        body: Markdown after the front matter
+        path: Source file (None for text parsed directly)
+        mtime_ns: Source modification time (0 without a file)
+        size: Source size in bytes (0 without a file)
+        has_front_matter: Whether the text started with a front-matter block
+    """
+
+    meta: dict = field(default_factory=dict)
+    body: str = ""
+    path: Path | None = None
+    mtime_ns: int = 0
+    size: int = 0
+    has_front_matter: bool = False
+
+
+def split_front_matter(text: str) -> tuple[str | None, str]:
+    """
+    Trennt Front-Matter und Body.
+
+    Returns:
+        tuple: (Front-Matter-Text ohne Begrenzer oder None, Body)
+    """
+    if not text.startswith("---"):
+        return None, text
+    first, newline, rest = text.partition("\n")
+    if first.rstrip() != "---" or not newline:
+        return None, text
+
+    position = 0
+    while position <= len(rest):
+        end = rest.find("\n", position)
+        line = rest[position:] if end < 0 else rest[position:end]
+        if line.rstrip() in _DELIMITERS:
+            body = "" if end < 0 else rest[end + 1:]
+            return rest[:position], body.lstrip("\n")
+        if end < 0:
+            break
+        position = end + 1
+    return None, text
+
+
+def _scalar(value: str):
+    """YAML-Auflösung eines flachen Werts; ``ValueError`` = an YAML übergeben."""
+    value = value.strip()
+    if value[:1] == '"':
+        if len(value) < 2 or not value.endswith('"') or "\\" in value or '"' in value[1:-1]:
+            raise ValueError(value)
+        return value[1:-1]
+    if value[:1] == "'":
+        if len(value) < 2 or not value.endswith("'") or "'" in value[1:-1]:
+            raise ValueError(value)
+        return value[1:-1]
+    if value in _NULLS:
+        return None
+    if value in _BOOLS:
+        return _BOOLS[value]
+    if _INT.match(value):
+        return int(value)
+    if _FLOAT.match(value):
+        return float(value)
+    if (value.startswith(_SPECIAL_START) or value.endswith(":") or ": " in value
+            or " #" in value or "\t" in value):
+        raise ValueError(value)
+    return value
+
+
+def _parse_flat(head: str) -> dict | None:
+    """Flacher Kopf aus ``key: value``-Zeilen; None, wenn YAML nötig ist."""
+    meta = {}
+    for line in head.splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        m = _KEY.match(line.rstrip())
+        if m is None:
+            return None
+        value = m.group(2)
+        if value is None or m.group(1) in _BOOLS or m.group(1) in _NULLS:
+            return None  # "key:" leitet womöglich eine Liste/Map ein
+        try:
+            meta[m.group(1)] = _scalar(value)
+        except ValueError:
+            return None
+    return meta
+
+
+def parse_front_matter(head: str) -> dict:
+    """
+    Parst einen Front-Matter-Block (ohne Begrenzer).
+
+    Returns:
+        dict: Die Werte; {} bei leerem Block, Nicht-Mappings oder YAML-Fehlern
+    """
+    meta = _parse_flat(head)
+    if meta is not None:
+        return meta
+
+    import yaml  # erst bei Bedarf laden (Startzeit)
+    try:
+        meta = yaml.load(head, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    except yaml.YAMLError as e:
+        logger.warning(f"Front-Matter nicht lesbar: {e}")
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+
+def parse_document(text: str, path: Path | None = None, stat: os.stat_result | None = None) -> Document:
+    """
+    Parst einen Markdown-Text mit optionalem Front-Matter.
+
+    Args:
+        text: Inhalt der Datei
+        path: Quelle (nur zur Information)
+        stat: ``os.stat`` der Quelle
+    """
+    head, body = split_front_matter(text)
+    return Document(
+        meta=parse_front_matter(head) if head is not None else {},
+        body=body,
+        path=path,
+        mtime_ns=stat.st_mtime_ns if stat else 0,
+        size=stat.st_size if stat else 0,
+        has_front_matter=head is not None,
+    )
+
+
+_documents: dict[str, Document] = {}
+_documents_lock = threading.Lock()
+
+
+def load_document(path: str | os.PathLike) -> Document:
+    """
+    Liest und parst eine Markdown-Datei; erneut nur, wenn sich mtime oder Grösse ändern.
+
+    Raises:
+        OSError: Wenn die Datei nicht existiert oder nicht lesbar ist
+    """
+    key = os.fspath(path)
+    stat = os.stat(key)
+    document = _documents.get(key)
+    if document is not None and document.mtime_ns == stat.st_mtime_ns and document.size == stat.st_size:
+        return document
+
+    with open(key, encoding="utf-8") as f:
+        document = parse_document(f.read(), Path(key), stat)
+    with _documents_lock:
+        _documents[key] = document
+    return document
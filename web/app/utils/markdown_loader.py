@@ -1,9 +1,37 @@
 from pathlib import Path
-import yaml
-import markdown
 import re
+import threading
+from urllib.parse import unquote
+
+from ..cache import (
+    cache_asset_page_key, cache_lesson_key, cache_lessons_key, cached, rendered_content_ttl,
+)
+from ..timing import timed
+from .document import load_document
 
 BASE_DIR = Path(__file__).resolve().parents[1]  # .../web/app
+DURCHFUEHRUNGEN_DIR = BASE_DIR / "content" / "unterlagen" / "durchfuehrungen"
+
+# Gemeinsame Konfiguration für Lektionen und assets/*.md (gleiches HTML)
+MARKDOWN_EXTENSIONS = ("extra", "fenced_code", "tables")
+
+_converters = threading.local()
+
+
+def markdown_to_html(text: str) -> str:
+    """
+    Rendert Markdown mit ``MARKDOWN_EXTENSIONS``.
+
+    Jeder Thread hält einen einmal konfigurierten ``Markdown``-Konverter und
+    setzt ihn pro Dokument mit ``reset()`` zurück, statt wie
+    ``markdown.markdown()`` Konverter und Extensions bei jedem Aufruf neu zu bauen.
+    """
+    md = getattr(_converters, "md", None)
+    if md is None:
+        import markdown  # erst bei Bedarf laden (Startzeit)
+        md = _converters.md = markdown.Markdown(extensions=list(MARKDOWN_EXTENSIONS))
+    return md.reset().convert(text)
+
 
 def course_dir(slug: str) -> Path:
     """
@@ -15,8 +43,9 @@ def course_dir(slug: str) -> Path:
     Returns:
         Path: Pfad zu content/unterlagen/durchfuehrungen/<slug>
     """
-    return BASE_DIR / "content" / "unterlagen" / "durchfuehrungen" / slug
+    return DURCHFUEHRUNGEN_DIR / slug
 
+@cached(key_func=cache_lessons_key, ttl=rendered_content_ttl)
 def list_lessons(slug: str) -> list[dict]:
     """
     Listet alle verfügbaren Lektionen einer Kursdurchführung.
@@ -37,17 +66,7 @@ def list_lessons(slug: str) -> list[dict]:
 
     for md in sorted(d.glob("L*/index.md")):
         lid = md.parent.name  # z.B. "L01"
-        raw = md.read_text(encoding="utf-8")
-        meta, body = {}, raw
-
-        # sehr simples Front‑Matter‑Parsing
-        if raw.startswith("---"):
-            head, _, rest = raw.partition("\n---")
-            try:
-                meta = yaml.safe_load(head.replace("---", "", 1)) or {}
-            except Exception:
-                meta = {}
-            body = rest.lstrip("\n")
+        meta = load_document(md).meta
 
         lessons.append({
             "id": meta.get("id", lid),
@@ -58,6 +77,7 @@ def list_lessons(slug: str) -> list[dict]:
     lessons.sort(key=lambda x: (x.get("order", 999), x.get("id", "")))
     return lessons
 
+@timed("render_lesson")
 def render_lesson(slug: str, lesson_id: str) -> tuple[dict | None, str | None, Path | None]:
     """
     Rendert eine spezifische Lektion von Markdown zu HTML.
@@ -73,23 +93,15 @@ def render_lesson(slug: str, lesson_id: str) -> tuple[dict | None, str | None, P
             - folder: Path zum Lektionsverzeichnis
     """
     md_path = course_dir(slug) / lesson_id / "index.md"
-    if not md_path.exists():
+    try:
+        doc = load_document(md_path)
+    except FileNotFoundError:
         return None, None, None
 
-    raw = md_path.read_text(encoding="utf-8")
-    meta, body = {}, raw
-
-    if raw.startswith("---"):
-        head, _, rest = raw.partition("\n---")
-        try:
-            meta = yaml.safe_load(head.replace("---", "", 1)) or {}
-        except Exception:
-            meta = {}
-        body = rest.lstrip("\n")
-
-    html = markdown.markdown(body, extensions=["extra", "fenced_code", "tables"])
-    return meta, html, md_path.parent
+    html = markdown_to_html(doc.body)
+    return dict(doc.meta), html, md_path.parent
 
+@timed("rewrite_relative_urls")
 def rewrite_relative_urls(html: str, slug: str, lesson_id: str | None = None) -> str:
     """
     Wandelt relative href/src (./bild.png, ../assets/x.pdf, foo.jpg) in
@@ -97,8 +109,13 @@ def rewrite_relative_urls(html: str, slug: str, lesson_id: str | None = None) ->
     Lässt absolute URLs, /root-Pfade, #anchors, mailto:, tel: unverändert.
 
     Wenn die Datei im selben Lektionsordner liegt und lesson_id gesetzt ist,
-    wird automatisch '<lesson_id>/' vorangestellt.
+    wird automatisch '<lesson_id>/' vorangestellt. Existierende Dateien
+    bekommen ihren Fingerprint (``?v=...``) aus dem Asset-Manifest.
+    ``<img>``-Tags bekommen Grösse, Lazy Loading und ``srcset`` (siehe
+    ``images.responsive_images``).
     """
+    from ..assets import manifest  # zirkulärer Import: assets nutzt DURCHFUEHRUNGEN_DIR
+
     base = f"/unterlagen/{slug}/media/"
 
     pattern = re.compile(
@@ -120,6 +137,59 @@ def rewrite_relative_urls(html: str, slug: str, lesson_id: str | None = None) ->
         if lesson_id and not url.startswith(("assets/", "docs/", "static/")):
             url = f"{lesson_id}/{url}"
 
-        return f'{m.group("attr")}="{base}{url}"'
+        # Fingerprint anhängen -> URL ist ein Jahr cachebar (immutable)
+        path, sep, fragment = url.partition("#")
+        suffix = "" if "?" in path else manifest.url_suffix("media", f"{slug}/{unquote(path)}")
+
+        # Schliessendes Anführungszeichen bleibt im Text (nicht Teil des Treffers)
+        return f'{m.group("attr")}={m.group(2)}{base}{path}{suffix}{sep}{fragment}'
+
+    from ..images import responsive_images
+
+    return responsive_images(pattern.sub(repl, html), slug)
+
+
+@cached(key_func=cache_lesson_key, ttl=rendered_content_ttl)
+def load_lesson(slug: str, lesson_id: str) -> tuple[dict, str] | None:
+    """
+    Gerenderte Lektion mit umgeschriebenen URLs, im Render-Cache.
+
+    Der Eintrag wird verworfen, sobald sich eine seiner Quellen ändert
+    (siehe ``content_build``).
+
+    Returns:
+        tuple | None: (meta, html) oder None falls nicht gefunden
+    """
+    meta, html, _ = render_lesson(slug, lesson_id)
+    if not meta:
+        return None
+    return meta, rewrite_relative_urls(html, slug, lesson_id)
+
+
+@cached(key_func=cache_asset_page_key, ttl=rendered_content_ttl)
+def load_asset_page(slug: str, filename: str) -> tuple[dict, str] | None:
+    """
+    Rendert eine Markdown-Datei aus dem assets-Ordner eines Kurses (im Render-Cache).
+
+    Args:
+        slug: Eindeutige Bezeichnung der Kursdurchführung
+        filename: Pfad relativ zu assets/ (z.B. 'Internet.md')
+
+    Returns:
+        tuple | None: (meta inkl. title, html) oder None falls nicht gefunden
+    """
+    md_path = course_dir(slug) / "assets" / filename
+    if not md_path.is_file():
+        return None
+
+    doc = load_document(md_path)
+    meta = doc.meta
+
+    html = markdown_to_html(doc.body)
+
+    # Relative URLs umschreiben für assets-Kontext
+    html = rewrite_relative_urls(html, slug, "assets")
 
-    return pattern.sub(repl, html)
\ No newline at end of file
+    # Titel aus Meta oder Dateiname
+    title = meta.get("title", filename.replace(".md", "").replace("_", " ").title())
+    return {"title": title, **meta}, html
@@ -3,129 +3,283 @@ Enhanced validation classes for the IT-Kurs application.
 
 This module provides comprehensive validation for forms and user input,
 including custom validators for Swiss phone numbers and extended email validation.
+
+The rules themselves are plain functions over strings (``check_*``) built on
+module-level compiled patterns. The WTForms validators wrap them for the
+registration form, and ``validate_rows()`` applies the same rules to many
+records at once (imports, data audits).
 """
 
 import re
-from wtforms.validators import ValidationError, Regexp
-from wtforms import validators
+from typing import Callable, Iterable, Mapping, Optional
+
+from wtforms.validators import ValidationError
 from .security import validate_email
+from .email_deliverability import suggest_domain, get_deliverability_checker
+
+
+# --- Vorkompilierte Muster ---
+PHONE_SEPARATORS_RE = re.compile(r'[\s\-\(\)]')
+SWISS_PHONE_RE = re.compile(
+    r'^(?:\+41|0041)?0?(?:'
+    r'7[6-9]\d{7}'    # Mobile numbers
+    r'|[2-5]\d{8}'    # Landline numbers
+    r')$'
+)
+NAME_RE = re.compile(r"^[a-zA-ZäöüÄÖÜß\s\-']+$")
+
+# --- Fehlermeldungen ---
+PHONE_MESSAGE = 'Bitte geben Sie eine gültige Schweizer Telefonnummer ein.'
+EMAIL_MESSAGE = 'Bitte geben Sie eine gültige E-Mail-Adresse ein.'
+NAME_MESSAGE = ('Name muss 2-50 Zeichen lang sein und darf nur Buchstaben, '
+                'Leerzeichen, Bindestriche und Apostrophe enthalten.')
+COURSE_MESSAGE = 'Bitte wählen Sie einen verfügbaren Kurs aus.'
+COURSE_UNAVAILABLE_MESSAGE = 'Der gewählte Kurs ist nicht verfügbar.'
+REQUIRED_MESSAGE = 'Pflichtfeld fehlt.'
+
+UNDELIVERABLE_MESSAGE = 'An diese E-Mail-Domain können keine E-Mails zugestellt werden.'
+SUGGESTION_MESSAGE = 'Meinten Sie: {suggestion}?'
+
+
+# --- Regeln (ohne WTForms, wiederverwendbar) ---
+def check_phone(value: str) -> Optional[str]:
+    """
+    Prüft eine Schweizer Telefonnummer.
+
+    Returns:
+        str | None: Fehlermeldung oder None, wenn gültig
+    """
+    if SWISS_PHONE_RE.match(PHONE_SEPARATORS_RE.sub('', value)) is None:
+        return PHONE_MESSAGE
+    return None
+
+
+def check_name(value: str) -> Optional[str]:
+    """Prüft Vor- und Nachnamen (2-50 Zeichen, nur Buchstaben u.ä.)."""
+    name = value.strip()
+    if not 2 <= len(name) <= 50 or NAME_RE.match(name) is None:
+        return NAME_MESSAGE
+    return None
+
+
+def suggest_email(value: str) -> Optional[str]:
+    """Gibt eine korrigierte Adresse zurück, falls die Domain wie ein Tippfehler aussieht."""
+    local, _, domain = value.rpartition('@')
+    correction = suggest_domain(domain)
+    if correction:
+        return f"{local}@{correction}"
+    return None
+
+
+def check_email(value: str) -> Optional[str]:
+    """
+    Prüft Format und vermutete Tippfehler einer E-Mail-Adresse (für Importe
+    und Audits; im Formular ist der Vorschlag nur ein Hinweis).
+    """
+    if not validate_email(value):
+        return EMAIL_MESSAGE
+    suggestion = suggest_email(value)
+    if suggestion:
+        return SUGGESTION_MESSAGE.format(suggestion=suggestion)
+    return None
+
+
+def visible_course_ids(courses: Iterable[Mapping]) -> frozenset:
+    """Menge der IDs aller sichtbaren Kurse."""
+    return frozenset(c['id'] for c in courses if c.get('visible', False))
+
+
+# Letzte Kursliste und ihre sichtbaren IDs (Referenz halten: Vergleich per Identität)
+_visible_ids_cache: tuple[object, frozenset] = (None, frozenset())
+
+
+def cached_visible_course_ids(courses: Iterable[Mapping]) -> frozenset:
+    """
+    Wie ``visible_course_ids``, neu berechnet nur für eine neue Kursliste.
+
+    ``load_courses`` ist gecacht und liefert dasselbe Objekt, bis sich
+    ``courses.json`` ändert; so teilen sich alle Formulare eine Menge.
+    """
+    global _visible_ids_cache
+    cached_courses, ids = _visible_ids_cache
+    if courses is not cached_courses:
+        ids = visible_course_ids(courses)
+        _visible_ids_cache = (courses, ids)
+    return ids
 
 
 class SwissPhoneValidator:
     """
     Validator for Swiss phone numbers.
-    
+
     Accepts formats like:
     - +41 76 123 45 67
-    - 076 123 45 67  
+    - 076 123 45 67
     - 0761234567
     - +41761234567
     """
-    
+
     def __init__(self, message=None):
         if not message:
-            message = 'Bitte geben Sie eine gültige Schweizer Telefonnummer ein.'
+            message = PHONE_MESSAGE
         self.message = message
-    
+
     def __call__(self, form, field):
         if not field.data:
             return  # Optional field
-            
-        # Remove all spaces, dashes, and parentheses
-        phone = re.sub(r'[\s\-\(\)]', '', field.data)
-        
-        # Swiss mobile patterns
-        patterns = [
-            r'^(\+41|0041)?0?7[6-9]\d{7}$',  # Mobile numbers
-            r'^(\+41|0041)?0?[2-5]\d{8}$',   # Landline numbers
-        ]
-        
-        if not any(re.match(pattern, phone) for pattern in patterns):
+
+        if check_phone(field.data):
             raise ValidationError(self.message)
 
 
 class EnhancedEmailValidator:
     """
     Enhanced email validator with domain verification and common typo detection.
+
+    With ``check_deliverability`` the domain's MX records are looked up
+    (cached, strict time budget). Only a definite "no mail here" answer
+    rejects the address; timeouts and resolver errors let it pass.
+
+    A likely typo (``suggest_email``) does not reject the address: the
+    suggestion is stored as ``field.suggestion`` for the form to show as a
+    hint. Domains that resolve MX get no suggestion.
     """
-    
+
     def __init__(self, message=None, check_deliverability=False):
         if not message:
-            message = 'Bitte geben Sie eine gültige E-Mail-Adresse ein.'
+            message = EMAIL_MESSAGE
         self.message = message
         self.check_deliverability = check_deliverability
-    
+
     def __call__(self, form, field):
         if not field.data:
             return
-            
+
         if not validate_email(field.data):
             raise ValidationError(self.message)
-        
-        # Check for common typos in domains
-        common_typos = {
-            'gmial.com': 'gmail.com',
-            'gmai.com': 'gmail.com', 
-            'yahooo.com': 'yahoo.com',
-            'hotmial.com': 'hotmail.com',
-            'outlok.com': 'outlook.com'
-        }
-        
-        domain = field.data.split('@')[-1].lower()
-        if domain in common_typos:
-            suggestion = f"{field.data.split('@')[0]}@{common_typos[domain]}"
-            raise ValidationError(f'Meinten Sie: {suggestion}?')
+
+        deliverable = None
+        if self.check_deliverability:
+            checker = get_deliverability_checker()
+            if checker:
+                deliverable = checker.check(field.data.rpartition('@')[2])
+
+        field.suggestion = None if deliverable else suggest_email(field.data)
+        if deliverable is False:
+            message = UNDELIVERABLE_MESSAGE
+            if field.suggestion:
+                message += ' ' + SUGGESTION_MESSAGE.format(suggestion=field.suggestion)
+            raise ValidationError(message)
 
 
 class NameValidator:
     """
     Validator for names (first name, last name).
-    
+
     - Allows letters, spaces, hyphens, apostrophes
     - Minimum 2 characters
     - Maximum 50 characters
     """
-    
+
     def __init__(self, message=None):
         if not message:
-            message = 'Name muss 2-50 Zeichen lang sein und darf nur Buchstaben, Leerzeichen, Bindestriche und Apostrophe enthalten.'
+            message = NAME_MESSAGE
         self.message = message
-    
+
     def __call__(self, form, field):
         if not field.data:
             return
-            
-        name = field.data.strip()
-        
-        # Length check
-        if len(name) < 2 or len(name) > 50:
-            raise ValidationError(self.message)
-        
-        # Character check (allow letters, spaces, hyphens, apostrophes)
-        if not re.match(r"^[a-zA-ZäöüÄÖÜß\s\-']+$", name):
+
+        if check_name(field.data):
             raise ValidationError(self.message)
 
 
 class CourseSelectionValidator:
     """
     Validator to ensure selected course exists and is available.
+
+    The set of visible course IDs is rebuilt only when the course loader
+    returns a new list (``load_courses`` is cached, so usually it does not);
+    the set is shared across validator instances.
     """
-    
+
     def __init__(self, course_loader_func, message=None):
         self.course_loader_func = course_loader_func
         if not message:
-            message = 'Bitte wählen Sie einen verfügbaren Kurs aus.'
+            message = COURSE_MESSAGE
         self.message = message
-    
+
+    def visible_ids(self) -> frozenset:
+        """IDs der sichtbaren Kurse, neu berechnet nur bei neuer Kursliste."""
+        return cached_visible_course_ids(self.course_loader_func())
+
     def __call__(self, form, field):
         if not field.data:
             raise ValidationError(self.message)
-            
+
         try:
-            courses = self.course_loader_func()
-            visible_course_ids = [c['id'] for c in courses if c.get('visible', False)]
-            
-            if field.data not in visible_course_ids:
-                raise ValidationError('Der gewählte Kurs ist nicht verfügbar.')
+            visible_ids = self.visible_ids()
         except Exception:
             raise ValidationError('Fehler beim Überprüfen der Kursverfügbarkeit.')
+
+        if field.data not in visible_ids:
+            raise ValidationError(COURSE_UNAVAILABLE_MESSAGE)
+
+
+# --- Batch-Validierung ---
+# Feld -> (Pflichtfeld?, Regel)
+REGISTRATION_RULES: dict[str, tuple[bool, Callable[[str], Optional[str]]]] = {
+    'first_name': (True, check_name),
+    'last_name': (True, check_name),
+    'email': (False, check_email),
+    'phone': (False, check_phone),
+}
+
+
+def validate_rows(
+    rows: Iterable[Mapping],
+    courses: Optional[Iterable[Mapping]] = None,
+    rules: Optional[Mapping] = None,
+) -> list[dict[str, str]]:
+    """
+    Validiert viele Datensätze mit denselben Regeln wie das Anmeldeformular.
+
+    Gedacht für Importe (z.B. CSV) und Datenprüfungen. Die Kursmenge wird
+    einmal aufgebaut und für alle Zeilen verwendet.
+
+    Args:
+        rows: Datensätze als Mappings (z.B. csv.DictReader oder dicts)
+        courses: Kursliste; wenn angegeben, wird ``course_id`` gegen die
+            sichtbaren Kurse geprüft
+        rules: Optional eigene Regeln im Format von REGISTRATION_RULES
+
+    Returns:
+        list[dict]: Pro Zeile ein dict Feld -> Fehlermeldung (leer = gültig)
+    """
+    rules = list((rules or REGISTRATION_RULES).items())
+    course_ids = visible_course_ids(courses) if courses is not None else None
+
+    results = []
+    append = results.append
+    for row in rows:
+        errors = {}
+        for field, (required, check) in rules:
+            value = row.get(field)
+            if value is not None:
+                value = str(value).strip()
+            if not value:
+                if required:
+                    errors[field] = REQUIRED_MESSAGE
+                continue
+            message = check(value)
+            if message:
+                errors[field] = message
+
+        if course_ids is not None:
+            course_id = row.get('course_id')
+            if not course_id:
+                errors['course_id'] = COURSE_MESSAGE
+            elif course_id not in course_ids:
+                errors['course_id'] = COURSE_UNAVAILABLE_MESSAGE
+        append(errors)
+    return results
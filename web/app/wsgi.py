@@ -0,0 +1,18 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c python:app.gunicorn_conf app.wsgi:application
+
+Only here the startup timeline records imports (``startup.py``): tests,
+CLI commands and benchmarks that import ``app`` modules run without the
+import hook.
+"""
+
+# Boot-Zeitmessung vor allen App-Imports starten; create_app() beendet sie
+from .startup import timeline
+
+timeline.start()
+
+from .app import create_app  # noqa: E402
+
+application = create_app()
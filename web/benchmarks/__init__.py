@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks for the IT-Kurs application.
+
+Run from the ``web`` directory, e.g. ``python -m benchmarks.bench_validators``.
+"""
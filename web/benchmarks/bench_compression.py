@@ -0,0 +1,78 @@
+"""
+Benchmark: bytes saved and CPU cost of response compression on the real
+lesson pages and stylesheets.
+
+For every page: uncompressed size, then size and compression time per
+encoding/level (gzip 6 = per-request level, gzip 9 / brotli 11 = level of the
+variants compressed once). The last column is the cost of a variant-cache hit.
+brotli rows only appear when the optional ``brotli`` package is installed.
+
+    cd web && python -m benchmarks.bench_compression
+"""
+
+import time
+
+from app.app import create_app, load_courses
+from app.compression import VariantCache, brotli, compress
+from app.utils.markdown_loader import list_lessons
+
+LEVELS = [("gzip", False, "gzip-6"), ("gzip", True, "gzip-9")]
+if brotli is not None:
+    LEVELS += [("br", False, "br-4"), ("br", True, "br-11")]
+
+
+def _best(func, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _pages(client) -> dict[str, bytes]:
+    pages = {}
+    for course in load_courses():
+        for lesson in list_lessons(course["id"]):
+            url = f"/unterlagen/{course['id']}/{lesson['id']}"
+            response = client.get(url)
+            if response.status_code == 200:
+                pages[url] = response.data
+    for css in ("style.css", "landing.css"):
+        pages[f"/static/css/{css}"] = client.get(f"/static/css/{css}").data
+    return pages
+
+
+def main() -> None:
+    client = create_app({"TESTING": True}).test_client()
+    pages = _pages(client)
+    labels = [label for _, _, label in LEVELS]
+    print(f"{'page':<45} {'raw':>8} " + " ".join(f"{label:>18}" for label in labels) + f" {'hit':>8}")
+
+    totals = {label: [0, 0.0] for label in labels}
+    raw_total = 0
+    for url, data in pages.items():
+        raw_total += len(data)
+        cells = []
+        for encoding, best, label in LEVELS:
+            size = len(compress(data, encoding, best))
+            seconds = _best(lambda: compress(data, encoding, best), repeat=5 if best else 20)
+            totals[label][0] += size
+            totals[label][1] += seconds
+            cells.append(f"{size:>7} {seconds * 1000:>6.2f} ms")
+
+        cache = VariantCache(16)
+        cache.get("page", "gzip", lambda: data)
+        hit = _best(lambda: cache.get("page", "gzip", lambda: data), repeat=1000)
+        print(f"{url:<45} {len(data):>8} " + " ".join(f"{c:>18}" for c in cells)
+              + f" {hit * 1e6:>5.1f} us")
+
+    print()
+    for label, (size, seconds) in totals.items():
+        saved = 100 * (1 - size / raw_total) if raw_total else 0.0
+        print(f"{label:<8} {raw_total:>9} -> {size:>8} bytes ({saved:4.1f}% saved), "
+              f"{seconds * 1000:7.2f} ms CPU for all pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Harness: what critical CSS inlining and HTML minification save per page.
+
+For every cached page (course list, course pages, lessons) the raw and the
+optimized HTML are compared:
+
+- render-blocking requests before the first paint (stylesheets and
+  non-deferred scripts in ``<head>``)
+- bytes before the first paint: HTML plus blocking CSS, gzip-compressed
+  as they go over the wire
+- the one-off optimization time and the cost of a ``PageCache`` hit
+  (what every later request pays)
+
+    cd web && python -m benchmarks.bench_critical_css
+"""
+
+import gzip
+import re
+import time
+from unittest.mock import patch
+
+from app.app import create_app, load_courses
+from app.html_optimizer import PageCache, optimize_html
+from app.utils.markdown_loader import list_lessons
+
+from .common import measure
+
+_HEAD = re.compile(r"<head>.*?</head>", re.DOTALL | re.IGNORECASE)
+_BLOCKING_CSS = re.compile(r"""<link\b(?=[^>]*rel=["']stylesheet["'])[^>]*href=["']([^"']+)["']""")
+_BLOCKING_JS = re.compile(r"<script\b(?![^>]*\b(?:defer|async)\b)[^>]*\bsrc=")
+
+
+def _first_paint(client, html: str) -> tuple[int, int]:
+    """(blocking requests, gzip bytes of HTML + blocking CSS)."""
+    head = _HEAD.search(html).group(0)
+    css = _BLOCKING_CSS.findall(head)
+    requests = len(css) + len(_BLOCKING_JS.findall(head))
+    size = len(gzip.compress(html.encode(), 9))
+    for href in css:
+        size += len(gzip.compress(client.get(href).data, 9))
+    return requests, size
+
+
+def main() -> None:
+    client = create_app({"TESTING": True}).test_client()
+    urls = ["/unterlagen"]
+    for course in load_courses():
+        if course.get("visible"):
+            urls.append(f"/unterlagen/{course['id']}")
+            urls += [f"/unterlagen/{course['id']}/{lesson['id']}" for lesson in list_lessons(course["id"])]
+
+    print(f"{'page':<42} {'blocking req':>12} {'bytes to first paint (gz)':>28} "
+          f"{'html (+inline css)':>18} {'optimize':>9}")
+    totals = [0, 0, 0, 0]
+    for url in urls:
+        with patch("app.config.Config.HTML_OPTIMIZE", False):
+            raw = client.get(url, headers={"Accept-Encoding": "identity"}).get_data(as_text=True)
+        started = time.perf_counter()
+        optimized = optimize_html(raw)
+        seconds = time.perf_counter() - started
+
+        before, after = _first_paint(client, raw), _first_paint(client, optimized)
+        totals = [totals[0] + before[0], totals[1] + after[0], totals[2] + before[1], totals[3] + after[1]]
+        print(f"{url[-42:]:<42} {before[0]:>5} -> {after[0]:<4} {before[1]:>12} -> {after[1]:<11} "
+              f"{len(raw):>8} -> {len(optimized):<7} {seconds * 1000:>6.2f} ms")
+
+    print()
+    print(f"all {len(urls)} pages: {totals[0]} -> {totals[1]} blocking requests, "
+          f"{totals[2]} -> {totals[3]} bytes before first paint "
+          f"({100 * (1 - totals[3] / totals[2]):.0f}% less)")
+
+    cache = PageCache(16)
+    body = raw.encode()
+    cache.get("page", lambda: body)
+    print(f"PageCache hit (every later request): {measure(lambda: cache.get('page', lambda: body), 10000) * 1e6:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
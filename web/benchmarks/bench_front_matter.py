@@ -0,0 +1,81 @@
+"""
+Benchmark: front-matter parsing per document.
+
+Compares the previous per-call-site parsing (``partition`` + pure-Python
+``yaml.safe_load``) with ``utils.document``: the YAML path through libyaml's
+``CSafeLoader`` (if available), the flat ``key: value`` fast path and a
+``load_document`` cache hit. Runs on the current lessons/asset pages and on
+a synthetic corpus of 1,000 lessons (every tenth with a nested header).
+
+    cd web && python -m benchmarks.bench_front_matter
+"""
+
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from app.utils.document import load_document, parse_document, split_front_matter
+from app.utils.markdown_loader import DURCHFUEHRUNGEN_DIR
+
+from .common import measure, report
+
+
+def _legacy(raw: str) -> tuple[dict, str]:
+    # Bisheriges Parsing in list_lessons/render_lesson/load_asset_page
+    meta, body = {}, raw
+    if raw.startswith("---"):
+        head, _, rest = raw.partition("\n---")
+        try:
+            meta = yaml.safe_load(head.replace("---", "", 1)) or {}
+        except Exception:
+            meta = {}
+        body = rest.lstrip("\n")
+    return meta, body
+
+
+def _c_loader(raw: str) -> dict:
+    head, _ = split_front_matter(raw)
+    return yaml.load(head, Loader=yaml.CSafeLoader) if head is not None else {}
+
+
+def _synthetic(directory: Path) -> list[Path]:
+    paths = []
+    body = "\n".join(f"Absatz {i}: Router, Switch und **Netzwerk** – Übung {i}." for i in range(60))
+    for i in range(1000):
+        if i % 10:
+            head = f'id: L{i:04d}\ntitle: "Lektion {i}: Thema {i % 37}"\norder: {i}\n'
+        else:
+            head = f"id: L{i:04d}\ntitle: Lektion {i}\norder: {i}\ntags:\n  - netz\n  - web\n"
+        path = directory / f"L{i:04d}.md"
+        path.write_text(f"---\n{head}---\n\n# Lektion {i}\n\n{body}\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def _run(label: str, paths: list[Path]) -> None:
+    texts = [p.read_text(encoding="utf-8") for p in paths]
+    print(f"\n{label}: {len(paths)} documents")
+    legacy = measure(lambda: [_legacy(t) for t in texts], number=3) / len(texts)
+    report("partition + yaml.safe_load (before)", legacy)
+    if hasattr(yaml, "CSafeLoader"):
+        report("split + yaml CSafeLoader", measure(lambda: [_c_loader(t) for t in texts], number=3) / len(texts),
+               legacy)
+    report("parse_document (fast path / CSafeLoader)",
+           measure(lambda: [parse_document(t) for t in texts], number=3) / len(texts), legacy)
+    for p in paths:
+        load_document(p)
+    report("load_document, unchanged file (stat only)",
+           measure(lambda: [load_document(p) for p in paths], number=3) / len(paths), legacy)
+
+
+def main() -> None:
+    print(f"libyaml CSafeLoader: {'yes' if hasattr(yaml, 'CSafeLoader') else 'no'}")
+    _run("current content", sorted(DURCHFUEHRUNGEN_DIR.glob("*/L*/index.md"))
+         + sorted(DURCHFUEHRUNGEN_DIR.glob("*/assets/**/*.md")))
+    with tempfile.TemporaryDirectory() as tmp:
+        _run("synthetic corpus", _synthetic(Path(tmp)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark: Markdown rendering per document, fresh converter vs. reused one.
+
+``markdown.markdown()`` builds a ``Markdown`` instance and instantiates the
+``extra``/``fenced_code``/``tables`` extensions on every call;
+``markdown_to_html()`` keeps one converter per thread and only ``reset()``s
+it. The constructor cost alone is shown as well: that is the saving per
+render, independent of the document size.
+
+    cd web && python -m benchmarks.bench_markdown
+"""
+
+import markdown
+
+from app.utils.document import load_document
+from app.utils.markdown_loader import DURCHFUEHRUNGEN_DIR, MARKDOWN_EXTENSIONS, markdown_to_html
+
+from .common import measure, report
+
+
+def main() -> None:
+    paths = sorted(DURCHFUEHRUNGEN_DIR.glob("*/L*/index.md")) + sorted(DURCHFUEHRUNGEN_DIR.glob("*/assets/**/*.md"))
+    bodies = [load_document(p).body for p in paths]
+    extensions = list(MARKDOWN_EXTENSIONS)
+
+    construct = measure(lambda: markdown.Markdown(extensions=extensions), number=200)
+    report("Markdown(extensions=...) alone", construct)
+    print()
+
+    fresh_total = reused_total = 0.0
+    for path, body in zip(paths, bodies):
+        fresh = measure(lambda: markdown.markdown(body, extensions=extensions), number=20)
+        reused = measure(lambda: markdown_to_html(body), number=20)
+        fresh_total += fresh
+        reused_total += reused
+        name = path.relative_to(DURCHFUEHRUNGEN_DIR).as_posix()
+        print(f"{name[-44:]:<44} {len(body):>7} chars")
+        report("  markdown.markdown()", fresh)
+        report("  markdown_to_html()", reused, fresh)
+
+    print()
+    report(f"all {len(bodies)} documents, markdown.markdown()", fresh_total)
+    report(f"all {len(bodies)} documents, markdown_to_html()", reused_total, fresh_total)
+    print(f"saving per render: {(fresh_total - reused_total) / len(bodies) * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: full-text search latency (p50/p99) and index size.
+
+Indexes the real course materials, then a synthetic corpus of 1,000
+documents built from their vocabulary, and runs a query mix of one- to
+three-word queries against both (ranking plus snippets, as the endpoint does).
+
+    cd web && python -m benchmarks.bench_search
+"""
+
+import json
+import random
+import tempfile
+import time
+
+from app.app import create_app
+from app.search import SearchIndex, SearchService, analyze, snippet
+
+QUERIES = 2000
+
+
+def _percentiles(samples: list[float]) -> tuple[float, float, float]:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return pick(0.5), pick(0.99), samples[-1]
+
+
+def _run(label: str, index: SearchIndex, queries: list[str]) -> None:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        for _, doc in index.search(query, limit=20):
+            snippet(doc["text"], query)
+        latencies.append(time.perf_counter() - started)
+    p50, p99, worst = _percentiles(latencies)
+    size = len(json.dumps(index.to_dict()))
+    print(f"{label:<28} {index.live_count:>6} docs {len(index.terms):>7} terms {size / 1024:>8.0f} KiB   "
+          f"p50 {p50 * 1000:6.2f} ms   p99 {p99 * 1000:6.2f} ms   max {worst * 1000:6.2f} ms")
+
+
+def main() -> None:
+    create_app({"TESTING": True})
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        service = SearchService(f"{tmp}/index.json")
+        started = time.perf_counter()
+        service.update(force=True)
+        print(f"index build (real content): {(time.perf_counter() - started) * 1000:.0f} ms")
+        real = service.index
+
+        words = [w for doc in real.docs if doc for w in doc["text"].split() if len(w) > 3]
+        queries = [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(QUERIES)]
+        _run("real content", real, queries)
+
+        synthetic = SearchIndex()
+        started = time.perf_counter()
+        for i in range(1000):
+            text = " ".join(rng.choices(words, k=rng.randint(200, 1500)))
+            synthetic.add({"key": f"doc:{i}", "slug": "bench", "kind": "lesson", "name": f"L{i}",
+                           "title": f"Lektion {i}", "text": text, "signature": str(i)})
+        print(f"index build (1,000 synthetic): {(time.perf_counter() - started) * 1000:.0f} ms")
+        _run("synthetic 1,000", synthetic, queries)
+
+        stems = {term for query in queries for term in analyze(query)}
+        print(f"{len(stems)} distinct query terms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: startup cost of the application, each step in a fresh interpreter
+(times are cumulative, measured from the first import).
+
+- import only (what tests and CLI tools pay before touching the app)
+- ``create_app()`` (routes and hooks, no database connection)
+- first request to a public page
+- first database session (engine, pool and ``create_all`` on SQLite)
+
+    cd web && python -m benchmarks.bench_startup
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+WEB_DIR = Path(__file__).resolve().parent.parent
+
+STEPS = {
+    "import app.app": "import app.app",
+    "create_app()": "from app.app import create_app; create_app()",
+    "create_app() + GET /kursliste": (
+        "from app.app import create_app\n"
+        "create_app().test_client().get('/kursliste')"
+    ),
+    "create_app() + first DB session": (
+        "from app.app import create_app\n"
+        "from app.database import SessionLocal\n"
+        "create_app({{'DATABASE_URL': 'sqlite:///{db}'}})\n"
+        "SessionLocal().close()"
+    ),
+}
+
+
+def _run(code: str, repeat: int = 5) -> float:
+    """Best wall time of ``repeat`` fresh interpreters, measured inside the child."""
+    timed = (
+        "import time; _t = time.perf_counter()\n"
+        f"{code}\n"
+        "print(time.perf_counter() - _t)"
+    )
+    best = float("inf")
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", timed], cwd=WEB_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        best = min(best, float(output.strip().splitlines()[-1]))
+    return best
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, code in STEPS.items():
+            seconds = _run(code.format(db=Path(tmp) / "bench.db"))
+            print(f"{label:<40} {seconds * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
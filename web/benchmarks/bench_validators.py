@@ -0,0 +1,78 @@
+"""
+Benchmark: registration validators, single field and batched.
+
+Compares the precompiled rules in app.validators with the previous
+implementation (pattern strings passed to ``re.match`` per call, course
+list rebuilt per validation).
+"""
+
+import random
+import re
+
+from app.validators import (
+    check_email, check_name, check_phone, validate_rows, visible_course_ids,
+)
+from benchmarks.common import measure, report
+
+COURSES = [{"id": f"kurs-{i}", "label": f"Kurs {i}", "visible": i % 3 != 0} for i in range(30)]
+
+
+def legacy_phone(value):
+    phone = re.sub(r'[\s\-\(\)]', '', value)
+    patterns = [r'^(\+41|0041)?0?7[6-9]\d{7}$', r'^(\+41|0041)?0?[2-5]\d{8}$']
+    return any(re.match(p, phone) for p in patterns)
+
+
+def legacy_name(value):
+    name = value.strip()
+    return 2 <= len(name) <= 50 and bool(re.match(r"^[a-zA-ZäöüÄÖÜß\s\-']+$", name))
+
+
+def legacy_email(value):
+    return bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', value))
+
+
+def legacy_course(value):
+    visible = [c['id'] for c in COURSES if c.get('visible', False)]
+    return value in visible
+
+
+def legacy_row(row):
+    return (legacy_name(row["first_name"]), legacy_name(row["last_name"]),
+            legacy_email(row["email"]), legacy_phone(row["phone"]),
+            legacy_course(row["course_id"]))
+
+
+def make_rows(n):
+    rng = random.Random(42)
+    return [{
+        "first_name": rng.choice(["Anna", "Hans-Peter", "Zoë", "X"]),
+        "last_name": rng.choice(["Müller", "O'Brien", "Meier", "123"]),
+        "email": rng.choice(["anna@bluewin.ch", "hans@gmial.com", "kaputt@"]),
+        "phone": rng.choice(["076 123 45 67", "+41 44 123 45 67", "12"]),
+        "course_id": f"kurs-{rng.randrange(30)}",
+    } for _ in range(n)]
+
+
+def main():
+    print("Single values")
+    report("phone (legacy)", base := measure(lambda: legacy_phone("+41 76 123 45 67"), 20000))
+    report("phone (compiled)", measure(lambda: check_phone("+41 76 123 45 67"), 20000), base)
+    report("name (legacy)", base := measure(lambda: legacy_name("Hans-Peter"), 20000))
+    report("name (compiled)", measure(lambda: check_name("Hans-Peter"), 20000), base)
+    report("email (legacy)", base := measure(lambda: legacy_email("anna@bluewin.ch"), 20000))
+    report("email (compiled)", measure(lambda: check_email("anna@bluewin.ch"), 20000), base)
+    ids = visible_course_ids(COURSES)
+    report("course (legacy list rebuild)", base := measure(lambda: legacy_course("kurs-29"), 20000))
+    report("course (visible-id set)", measure(lambda: "kurs-29" in ids, 20000), base)
+
+    for n in (1_000, 10_000):
+        rows = make_rows(n)
+        print(f"\nBatch of {n} rows (per row)")
+        base = measure(lambda: [legacy_row(r) for r in rows], 1, repeat=3) / n
+        report("legacy rules, row by row", base)
+        report("validate_rows()", measure(lambda: validate_rows(rows, COURSES), 1, repeat=3) / n, base)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Small helpers shared by the benchmark scripts."""
+
+import time
+from typing import Callable
+
+
+def measure(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """
+    Best-of-``repeat`` time per call in seconds.
+
+    Args:
+        func: Callable without arguments
+        number: Calls per repetition
+        repeat: Number of repetitions
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def report(label: str, seconds: float, baseline: float | None = None) -> None:
+    """Print one result line, optionally with the speed-up against a baseline."""
+    line = f"{label:<48} {seconds * 1e6:>10.2f} µs"
+    if baseline:
+        line += f"   ({baseline / seconds:.1f}x)"
+    print(line)
@@ -0,0 +1,137 @@
+"""
+Load test: Flask development server vs. gunicorn (app.gunicorn_conf).
+
+Starts each server as a subprocess on a free port, hits the main public
+routes from ``--concurrency`` client threads for ``--duration`` seconds and
+prints throughput and latency percentiles.
+
+    cd web && python -m benchmarks.load_test
+    cd web && python -m benchmarks.load_test --servers gunicorn --concurrency 32
+
+Server settings come from the environment (e.g. GUNICORN_WORKER_CLASS=sync).
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROUTES = ("/", "/kursliste", "/kursleitung", "/unterlagen", "/flyer")
+WEB_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_command(server: str, port: int) -> tuple[list[str], dict]:
+    env = dict(os.environ)
+    if server == "dev":
+        command = [sys.executable, "-m", "flask", "--app", "app.wsgi:application",
+                   "run", "--port", str(port), "--no-reload", "--no-debugger"]
+    else:
+        env["GUNICORN_BIND"] = f"127.0.0.1:{port}"
+        command = [sys.executable, "-m", "gunicorn", "-c", "python:app.gunicorn_conf",
+                   "app.wsgi:application"]
+    return command, env
+
+
+def _wait_until_up(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health/live")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server auf Port {port} nicht erreichbar")
+
+
+def _client(port: int, stop: threading.Event, latencies: list, errors: list) -> None:
+    i = 0
+    while not stop.is_set():
+        path = ROUTES[i % len(ROUTES)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status >= 500:
+                errors.append(path)
+                continue
+        except OSError:
+            errors.append(path)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def run(server: str, concurrency: int, duration: float, warmup: float) -> dict:
+    port = _free_port()
+    command, env = _server_command(server, port)
+    process = subprocess.Popen(command, cwd=WEB_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_up(port)
+        results = {}
+        for phase, seconds in (("warmup", warmup), ("measure", duration)):
+            latencies, errors = [], []
+            stop = threading.Event()
+            threads = [threading.Thread(target=_client, args=(port, stop, latencies, errors))
+                       for _ in range(concurrency)]
+            for t in threads:
+                t.start()
+            time.sleep(seconds)
+            stop.set()
+            for t in threads:
+                t.join()
+            results = {"latencies": latencies, "errors": len(errors), "seconds": seconds}
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100)[int(pct) - 1] if len(values) > 1 else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--servers", nargs="+", default=["dev", "gunicorn"], choices=["dev", "gunicorn"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"Routen: {', '.join(ROUTES)} – {args.concurrency} parallele Clients, {args.duration}s")
+    baseline = None
+    for server in args.servers:
+        result = run(server, args.concurrency, args.duration, args.warmup)
+        latencies = result["latencies"]
+        throughput = len(latencies) / result["seconds"]
+        line = (f"{server:<10} {throughput:>8.1f} req/s   "
+                f"p50 {_percentile(latencies, 50) * 1000:>7.1f} ms   "
+                f"p95 {_percentile(latencies, 95) * 1000:>7.1f} ms   "
+                f"p99 {_percentile(latencies, 99) * 1000:>7.1f} ms   "
+                f"Fehler {result['errors']}")
+        if baseline:
+            line += f"   ({throughput / baseline:.1f}x)"
+        baseline = baseline or throughput
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
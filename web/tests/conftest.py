@@ -20,6 +20,7 @@ def client():
     # Set test configuration
     app.config['TESTING'] = True
     app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF for testing
+    app.secret_key = 'test-secret-key'  # Signed session cookies (admin login)
     
     # Use in-memory SQLite for tests
     test_db_url = 'sqlite:///:memory:'
@@ -88,10 +88,85 @@ def test_admin_access_without_token(client):
 
 
 def test_admin_access_with_token(client):
-    """Test admin access with valid token."""
+    """Test admin access with valid token (legacy link is exchanged for a session)."""
     with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
         response = client.get('/_admin?admin=test-token')
+        assert response.status_code == 302
+        assert 'admin=' not in response.headers['Location']
+
+        response = client.get('/_admin')
+        assert response.status_code == 200
+
+
+def test_admin_login_sets_httponly_session(client):
+    """Test that the login exchanges the token for a signed session cookie."""
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        assert client.post('/_admin/login', data={'token': 'wrong'}).status_code == 403
+
+        response = client.post('/_admin/login', data={'token': 'test-token', 'next': '/teilnehmende/new'})
+        assert response.status_code == 302
+        assert response.headers['Location'] == '/teilnehmende/new'
+        cookie = response.headers['Set-Cookie']
+        assert 'HttpOnly' in cookie and 'test-token' not in cookie
+
+        response = client.get('/teilnehmende/new')
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'private, no-store'
+
+        assert client.post('/_admin/logout').status_code == 403  # ohne Origin
+        client.post('/_admin/logout', headers={'Origin': 'http://localhost'})
+        assert client.get('/teilnehmende/new').status_code == 403
+
+
+def test_admin_cookie_posts_require_same_origin(client):
+    """Cookie-authenticated admin POSTs from another origin are refused; the header token is not affected."""
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        client.post('/_admin/login', data={'token': 'test-token'})
+        url = '/_admin/memory/tracemalloc/stop'
+        assert client.post(url).status_code == 403
+        assert client.post(url, headers={'Origin': 'https://evil.example'}).status_code == 403
+        assert client.post(url, headers={'Referer': 'http://localhost.evil.example/x'}).status_code == 403
+        assert client.post(url, headers={'Origin': 'http://localhost'}).status_code != 403
+        assert client.post(url, headers={'Referer': 'http://localhost/_admin'}).status_code != 403
+        assert client.get('/_admin').status_code == 200
+
+        client.post('/_admin/logout', headers={'Origin': 'http://localhost'})
+        assert client.post(url, headers={'X-Admin-Token': 'test-token'}).status_code != 403
+
+
+def test_legacy_admin_link_only_on_get(client):
+    """A ?admin= token is exchanged for a session on GET only."""
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        assert client.post('/_admin/memory/tracemalloc/stop?admin=test-token').status_code == 403
+        assert client.get('/_admin').status_code == 403
+
+
+def test_admin_login_rejects_external_next(client):
+    """Test that the login does not redirect to other hosts."""
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        response = client.post('/_admin/login', data={'token': 'test-token', 'next': '//evil.example/'})
+        assert response.headers['Location'] == '/_admin'
+
+
+def test_admin_header_token(client):
+    """Test that scripts can still authenticate with the X-Admin-Token header."""
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        assert client.get('/_admin', headers={'X-Admin-Token': 'test-token'}).status_code == 200
+        assert client.get('/_admin', headers={'X-Admin-Token': 'nope'}).status_code == 403
+
+
+def test_public_pages_vary_on_cookie_only(client):
+    """Test that public pages are cacheable for anonymous visitors."""
+    with patch('app.config.Config.PUBLIC_CACHE_MAX_AGE', 120):
+        response = client.get('/kursleitung?admin=whatever')
         assert response.status_code == 200
+        assert 'Cookie' in response.headers['Vary']
+        assert response.headers['Cache-Control'] == 'public, max-age=120'
+        assert 'Set-Cookie' not in response.headers
+
+        # JSON endpoints do not depend on the session at all
+        response = client.get('/health')
+        assert 'Vary' not in response.headers
 
 
 def test_participant_count_endpoint(client):
@@ -155,3 +230,94 @@ def test_email_validation():
     assert validate_email('invalid-email') is False
     assert validate_email('') is False
     assert validate_email(None) is False
+
+
+def test_phone_and_name_rules():
+    """Test the precompiled phone and name rules."""
+    from app.validators import check_phone, check_name
+
+    for phone in ['+41 76 123 45 67', '076 123 45 67', '0761234567', '0041 44 123 45 67']:
+        assert check_phone(phone) is None
+    for phone in ['0123456789', '12', '+49 151 1234567']:
+        assert check_phone(phone) is not None
+
+    assert check_name('Hans-Peter') is None
+    assert check_name("O'Brien") is None
+    assert check_name('X') is not None
+    assert check_name('R2D2') is not None
+
+
+def test_course_validator_reuses_visible_id_set(sample_course_data):
+    """Test that the visible-id set is only rebuilt for a new course list."""
+    from app.validators import CourseSelectionValidator
+
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return sample_course_data
+
+    validator = CourseSelectionValidator(loader)
+    first = validator.visible_ids()
+    assert validator.visible_ids() is first
+    assert first == {'test-course'}
+    assert len(calls) == 2
+    assert CourseSelectionValidator(loader).visible_ids() is first
+
+
+def test_register_form_does_not_grow_shared_validators(client, sample_course_data):
+    """Each form gets its own validator list; the class-level field stays untouched."""
+    from app.forms import RegisterForm
+
+    forms = [RegisterForm(course_loader_func=lambda: sample_course_data) for _ in range(3)]
+    assert [len(form.course_id.validators) for form in forms] == [2, 2, 2]
+    assert len(RegisterForm.course_id.kwargs['validators']) == 1
+
+
+def test_validate_rows_batch(sample_course_data):
+    """Test batch validation with the registration rules."""
+    from app.validators import validate_rows
+
+    rows = [
+        {'first_name': 'Anna', 'last_name': 'Müller', 'email': 'anna@example.com',
+         'phone': '076 123 45 67', 'course_id': 'test-course'},
+        {'first_name': '', 'last_name': 'Meier', 'email': 'hans@gmial.com',
+         'phone': '12', 'course_id': 'unknown'},
+    ]
+    valid, invalid = validate_rows(rows, courses=sample_course_data)
+
+    assert valid == {}
+    assert set(invalid) == {'first_name', 'email', 'phone', 'course_id'}
+    assert 'gmail.com' in invalid['email']
+
+
+def _pool_size_in_child(queue):
+    from app.database import SessionLocal
+    queue.put(SessionLocal.engine.pool.checkedin())
+
+
+def test_create_app_connects_lazily_and_per_process(tmp_path):
+    """create_app() opens no connection; a forked child starts with an empty pool."""
+    import multiprocessing
+    from app.app import create_app
+    from app.config import Config
+    from app.database import SessionLocal
+
+    db_path = tmp_path / 'factory.db'
+    try:
+        app = create_app({'TESTING': True, 'DATABASE_URL': f'sqlite:///{db_path}'})
+        assert SessionLocal._engine is None
+        assert not db_path.exists()
+
+        response = app.test_client().get('/teilnehmende/count')
+        assert response.get_json() == {'participants': 0}
+        assert SessionLocal.engine.pool.checkedin() == 1
+
+        ctx = multiprocessing.get_context('fork')
+        queue = ctx.Queue()
+        child = ctx.Process(target=_pool_size_in_child, args=(queue,))
+        child.start()
+        child.join(10)
+        assert queue.get(timeout=5) == 0
+    finally:
+        SessionLocal.configure(Config.DATABASE_URL)
@@ -0,0 +1,79 @@
+"""
+Tests for response compression: negotiation, cached variants and streaming.
+"""
+
+import gzip
+
+from app.compression import variants
+
+LESSON_URL = '/unterlagen/grundkurs-2025-10-02-di/L01'
+GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+
+def test_lesson_page_compressed_once(client):
+    """Lesson pages are gzip-encoded once per content and revalidated by ETag."""
+    plain = client.get(LESSON_URL)
+    variants.clear()
+
+    first = client.get(LESSON_URL, headers=GZIP)
+    second = client.get(LESSON_URL, headers=GZIP)
+
+    assert plain.headers.get('Content-Encoding') is None
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(first.data) == plain.data
+    assert len(first.data) < len(plain.data)
+    assert first.headers['ETag'].endswith('-gzip"')
+    assert first.data == second.data
+    assert (variants.misses, variants.hits) == (1, 1)
+
+    not_modified = client.get(LESSON_URL, headers={**GZIP, 'If-None-Match': first.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert client.get(LESSON_URL, headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+
+
+def test_static_css_compressed_with_own_etag(client):
+    """Text files get a gzip variant with its own ETag; images stay as they are."""
+    plain = client.get('/static/css/style.css')
+    encoded = client.get('/static/css/style.css', headers=GZIP)
+
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(encoded.data) == plain.data
+    assert encoded.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert client.get('/static/css/style.css', headers={
+        **GZIP, 'If-None-Match': encoded.headers['ETag']}).status_code == 304
+
+    image = client.get('/unterlagen/grundkurs-2025-10-02-di/media/L02/Dorfstrasse.jpg', headers=GZIP)
+    assert image.headers.get('Content-Encoding') is None
+
+
+def test_negotiation_respects_quality_and_threshold(client):
+    """gzip;q=0 means no compression; small dynamic responses are sent as is."""
+    from unittest.mock import patch
+
+    refused = client.get('/kursliste', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert refused.headers.get('Content-Encoding') is None
+
+    with patch('app.config.Config.COMPRESSION_MIN_SIZE', 10 ** 9):
+        small = client.get('/kursliste', headers=GZIP)
+    assert small.headers.get('Content-Encoding') is None
+
+    dynamic = client.get('/kursliste', headers=GZIP)
+    assert dynamic.headers['Content-Encoding'] == 'gzip'
+    assert 'ETag' not in dynamic.headers
+
+
+def test_streamed_response_compressed_incrementally():
+    """Streamed responses go through the incremental compressor."""
+    from app.app import create_app
+
+    app = create_app({'TESTING': True})
+
+    @app.get('/_test/stream')
+    def stream():
+        return app.response_class((f'<p>Zeile {i}</p>\n' for i in range(500)), mimetype='text/html')
+
+    response = app.test_client().get('/_test/stream', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data).decode().count('<p>Zeile') == 500
@@ -0,0 +1,93 @@
+"""
+Tests for the incremental content build and render-cache invalidation.
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+from app.cache import cache
+from app.content_build import ContentBuild
+
+SLUG = 'grundkurs-2025-10-02-di'
+IMAGE = f'unterlagen/durchfuehrungen/{SLUG}/L02/Dorfstrasse.jpg'
+
+
+def _edit_state(path, edit):
+    state = json.loads(path.read_text())
+    edit(state)
+    path.write_text(json.dumps(state))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1000))
+
+
+def test_graph_tracks_images_and_assets():
+    """Lessons depend on their index.md and embedded images; courses.json is tracked."""
+    graph = ContentBuild('unused').graph()
+    deps = [p.name for p in graph[f'lesson:{SLUG}:L02']]
+    assert deps[0] == 'index.md' and 'Dorfstrasse.jpg' in deps
+    assert [p.name for p in graph['courses:all']] == ['courses.json']
+    assert f'asset_page:{SLUG}:Internet.md' in graph
+    assert len(graph[f'lessons:{SLUG}']) == 3
+
+
+def test_rebuild_renders_only_dependents(tmp_path):
+    """After a change only the entries depending on it are re-rendered."""
+    state_path = tmp_path / 'state.json'
+    build = ContentBuild(str(state_path))
+
+    first = build.build()
+    assert f'lesson:{SLUG}:L01' in first.rendered
+    assert build.build().rendered == []
+
+    # Bild geändert (aus Sicht des Zustands): nur L02 neu rendern
+    _edit_state(state_path, lambda s: s['files'].__setitem__(IMAGE, '0'))
+    result = build.build()
+    assert result.changed_files == [IMAGE]
+    assert result.rendered == [f'lesson:{SLUG}:L02']
+    assert result.invalidated == []  # Ausgabe unverändert
+
+    _edit_state(state_path, lambda s: s['entries'][f'lesson:{SLUG}:L02'].__setitem__('output', '0'))
+    assert build.build(force=True).invalidated == [f'lesson:{SLUG}:L02']
+
+
+def test_workers_drop_only_changed_entries(tmp_path):
+    """A new state file makes running processes drop exactly the changed keys."""
+    state_path = tmp_path / 'state.json'
+    ContentBuild(str(state_path)).build()
+    worker = ContentBuild(str(state_path))
+
+    with patch('app.config.Config.CONTENT_STATE_CHECK_INTERVAL', 0):
+        worker.refresh()
+        cache.set(f'lesson:{SLUG}:L01', 'l01')
+        cache.set(f'lesson:{SLUG}:L02', 'l02')
+        assert worker.refresh() == []
+
+        _edit_state(state_path, lambda s: s['entries'][f'lesson:{SLUG}:L02'].__setitem__('output', '0'))
+        assert worker.refresh() == [f'lesson:{SLUG}:L02']
+
+    assert cache.get(f'lesson:{SLUG}:L02') is None
+    assert cache.get(f'lesson:{SLUG}:L01') == 'l01'
+
+
+def test_lesson_render_cache(client):
+    """Lessons are rendered once and then served from the render cache."""
+    from unittest.mock import patch as mock_patch
+    from app.utils import markdown_loader
+
+    cache.delete(f'lesson:{SLUG}:L01')
+    with mock_patch.object(markdown_loader, 'render_lesson', wraps=markdown_loader.render_lesson) as render, \
+            mock_patch('app.config.Config.RENDER_CACHE_TTL', 600):
+        assert client.get(f'/unterlagen/{SLUG}/L01').status_code == 200
+        assert client.get(f'/unterlagen/{SLUG}/L01').status_code == 200
+    assert render.call_count == 1
+
+
+def test_lessons_rendered_per_request_without_watcher(client):
+    """By default (no watcher, RENDER_CACHE_TTL=0) an edit shows up on the next request."""
+    from app.utils import markdown_loader
+
+    edited = ({'title': 'Neu'}, '<p>neu</p>', None)
+    cache.set(f'lesson:{SLUG}:L01', ({'title': 'Alt'}, '<p>alt</p>'))
+    with patch.object(markdown_loader, 'render_lesson', return_value=edited):
+        html = client.get(f'/unterlagen/{SLUG}/L01').get_data(as_text=True)
+    assert 'neu' in html and 'alt</p>' not in html
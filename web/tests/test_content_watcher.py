@@ -0,0 +1,111 @@
+"""
+Tests for the content watcher: backends, debouncing and leader election.
+"""
+
+import math
+import sys
+import time
+
+import pytest
+
+from app.cache import content_cache_ttl, set_content_watched
+from app.content_watcher import ContentWatcher, PollingBackend, create_backend
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.mark.parametrize('mode', ['poll', 'inotify'])
+def test_backend_reports_changed_files(tmp_path, mode):
+    """Both backends report created, modified and new-subdirectory files."""
+    if mode == 'inotify' and not sys.platform.startswith('linux'):
+        pytest.skip('inotify nur unter Linux')
+    backend = create_backend(mode, [tmp_path], interval=0.05)
+    try:
+        (tmp_path / 'index.md').write_text('# L01')
+        assert str(tmp_path / 'index.md') in backend.wait(1.0) | backend.wait(0.1)
+
+        (tmp_path / 'L02').mkdir()
+        backend.wait(0.2)
+        (tmp_path / 'L02' / 'bild.png').write_bytes(b'x')
+        changed = backend.wait(1.0) | backend.wait(0.1)
+        assert str(tmp_path / 'L02' / 'bild.png') in changed
+    finally:
+        backend.close()
+    if mode == 'poll':
+        assert isinstance(backend, PollingBackend)
+
+
+def test_watcher_calls_back_once_per_batch(tmp_path):
+    """A burst of writes is delivered as one debounced batch."""
+    batches = []
+    watcher = ContentWatcher(batches.append, roots=[tmp_path], mode='poll', interval=0.05)
+    watcher.ensure_running()
+    try:
+        assert _wait_for(lambda: batches == [set()])  # Abgleich beim Start
+        for i in range(3):
+            (tmp_path / f'L0{i}.md').write_text('x')
+        assert _wait_for(lambda: len(batches) == 2)
+        assert batches[1] == {str(tmp_path / f'L0{i}.md') for i in range(3)}
+    finally:
+        watcher.stop()
+        set_content_watched(False)
+
+
+def test_single_leader_and_unlimited_ttl(tmp_path):
+    """Only one process watches; the others know a watcher is active."""
+    lock = str(tmp_path / 'state.json.lock')
+    first = ContentWatcher(lambda changed: None, roots=[tmp_path], mode='poll', interval=0.05, lock_path=lock)
+    second = ContentWatcher(lambda changed: None, roots=[tmp_path], mode='poll', interval=0.05, lock_path=lock)
+    try:
+        first.ensure_running()
+        assert _wait_for(lambda: first.leader)
+        second.ensure_running()
+        assert _wait_for(lambda: second.active)
+        assert not second.leader
+        assert content_cache_ttl() == math.inf
+    finally:
+        first.stop()
+        second.stop()
+        set_content_watched(False)
+    assert content_cache_ttl() != math.inf
+
+
+def test_failed_leader_releases_lock(tmp_path, monkeypatch):
+    """A leader whose backend cannot start frees the lock; an unmarked lock means unwatched."""
+    import fcntl
+    from app import content_watcher
+
+    lock = str(tmp_path / 'state.json.lock')
+
+    def no_inotify(*args):
+        raise OSError(28, 'inotify watch limit reached')
+
+    monkeypatch.setattr(content_watcher, 'create_backend', no_inotify)
+    failed = ContentWatcher(lambda changed: None, roots=[tmp_path], mode='inotify', lock_path=lock)
+    failed.ensure_running()
+    failed._thread.join(2.0)
+    assert not failed.leader and failed._lock_file is None
+    with open(lock, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)  # frei
+
+    # Lock gehalten, aber ohne laufenden Watcher (keine pid): Caches behalten ihre TTL
+    monkeypatch.setattr(content_watcher, 'LEADER_RETRY_SECONDS', 0.05)
+    holder = open(lock, 'a')
+    fcntl.flock(holder, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    waiting = ContentWatcher(lambda changed: None, roots=[tmp_path], mode='poll', lock_path=lock)
+    try:
+        waiting.ensure_running()
+        time.sleep(0.2)
+        assert not waiting.active and not waiting.leader
+        assert content_cache_ttl() != math.inf
+    finally:
+        waiting.stop()
+        holder.close()
+        set_content_watched(False)
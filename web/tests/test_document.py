@@ -0,0 +1,66 @@
+"""
+Tests for the shared front-matter document model.
+"""
+
+import os
+
+import pytest
+import yaml
+
+from app.utils.document import _parse_flat, load_document, parse_document, parse_front_matter
+
+
+def test_flat_header_parsed_without_yaml():
+    """Flat key: value headers resolve like YAML (ints, quotes, bools, null)."""
+    doc = parse_document('---\nid: L01\ntitle: "Lektion 1: Einstieg"\norder: 1\nvisible: true\nnote: ~\n---\n\n# Text\n')
+    assert doc.has_front_matter
+    assert doc.meta == {'id': 'L01', 'title': 'Lektion 1: Einstieg', 'order': 1, 'visible': True, 'note': None}
+    assert doc.body == '# Text\n'
+
+
+@pytest.mark.parametrize('value', [
+    'L01', '"Lektion 1: Einstieg"', "'x'", "Bob's", '1', '-3', '007', '1.5', '.5', '-.5', '1e3', '1_000',
+    'Yes', 'off', 'null', '2025-10-02', '12:30', 'a #b', '[1, 2]', '&a x', '"a\\"b"', "'a''b'",
+    'Lektion 2 - Internet', 'http://example.org/x?q=1',
+])
+def test_fast_path_matches_yaml(value):
+    """The fast path either agrees with yaml.safe_load or defers to it."""
+    head = f'title: {value}\n'
+    assert parse_front_matter(head) == yaml.safe_load(head)
+    flat = _parse_flat(head)
+    if flat is not None:
+        assert type(flat['title']) is type(yaml.safe_load(head)['title'])
+
+
+def test_nested_front_matter_uses_yaml():
+    """Lists and maps go through the YAML loader; broken YAML yields {}."""
+    doc = parse_document('---\ntitle: X\ntags:\n  - netz\n  - web\n---\nBody')
+    assert doc.meta == {'title': 'X', 'tags': ['netz', 'web']}
+    assert parse_document('---\ntitle: [unclosed\n---\nBody').meta == {}
+    assert parse_document('---\n- a\n---\nBody').meta == {}
+
+
+def test_split_rules():
+    """The closing delimiter is a line of its own; without one there is no front matter."""
+    assert parse_document('# Nur Text\n---\n').body == '# Nur Text\n---\n'
+    doc = parse_document('---\ntitle: X\n----- kein Ende\n')
+    assert not doc.has_front_matter and doc.body.startswith('---\n')
+    doc = parse_document('---\r\ntitle: X\r\n---\r\nBody')
+    assert doc.meta == {'title': 'X'} and doc.body == 'Body'
+    assert parse_document('---\ntitle: X\n...\nBody').body == 'Body'
+
+
+def test_load_document_reparses_only_on_change(tmp_path):
+    """Parsed documents are reused until mtime or size change."""
+    path = tmp_path / 'index.md'
+    path.write_text('---\ntitle: Eins\n---\nA', encoding='utf-8')
+    first = load_document(path)
+    assert first.meta == {'title': 'Eins'} and first.size == path.stat().st_size
+    assert load_document(path) is first
+
+    path.write_text('---\ntitle: Zwei\n---\nAB', encoding='utf-8')
+    os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    assert load_document(path).meta == {'title': 'Zwei'}
+
+    with pytest.raises(FileNotFoundError):
+        load_document(tmp_path / 'missing.md')
@@ -0,0 +1,143 @@
+"""
+Tests for e-mail typo suggestions and the cached MX deliverability check.
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from wtforms.validators import ValidationError
+
+from app.email_deliverability import (
+    DeliverabilityChecker, MXCache, StaticResolver, edit_distance, suggest_domain,
+    set_deliverability_checker,
+)
+from app.validators import EnhancedEmailValidator, check_email
+
+
+@pytest.fixture
+def resolver():
+    return StaticResolver({"bluewin.ch": ["mx.bluewin.ch"], "example.org": ["mail.example.org"]})
+
+
+@pytest.fixture
+def install_checker(resolver):
+    checker = DeliverabilityChecker(resolver, timeout=0.2)
+    set_deliverability_checker(checker)
+    yield checker
+    set_deliverability_checker(None)
+
+
+def test_edit_distance_with_transpositions():
+    assert edit_distance("gmial.com", "gmail.com", 2) == 1
+    assert edit_distance("gmai.com", "gmail.com", 2) == 1
+    assert edit_distance("abc", "abc", 2) == 0
+    assert edit_distance("completely", "different", 2) == 3
+
+
+def test_suggest_domain_against_popular_providers():
+    assert suggest_domain("gmial.com") == "gmail.com"
+    assert suggest_domain("blewin.ch") == "bluewin.ch"
+    assert suggest_domain("Outlok.com") == "outlook.com"
+    # Bekannte und unbekannte, aber plausible Domains bleiben unangetastet
+    assert suggest_domain("gmx.ch") is None
+    assert suggest_domain("yahoo.fr") is None
+    assert suggest_domain("meine-firma.ch") is None
+
+
+@pytest.mark.parametrize("domain", ["ymail.com", "mail.com", "email.com", "online.de", "gmx.com", "live.ch"])
+def test_real_providers_near_popular_ones_get_no_suggestion(domain):
+    assert suggest_domain(domain) is None
+    assert check_email(f"anna@{domain}") is None
+    field = SimpleNamespace(data=f"anna@{domain}")
+    EnhancedEmailValidator()(None, field)
+    assert field.suggestion is None
+
+
+def test_suggestion_is_a_hint_not_an_error():
+    field = SimpleNamespace(data="anna@gmial.com")
+    EnhancedEmailValidator()(None, field)
+    assert field.suggestion == "anna@gmail.com"
+
+
+def test_domains_with_mx_get_no_suggestion():
+    resolver = StaticResolver({"gmx.cn": ["mx.gmx.cn"]})
+    set_deliverability_checker(DeliverabilityChecker(resolver, timeout=0.2))
+    try:
+        field = SimpleNamespace(data="anna@gmx.cn")
+        EnhancedEmailValidator(check_deliverability=True)(None, field)
+        assert field.suggestion is None
+        assert suggest_domain("gmx.cn") == "gmx.ch"
+    finally:
+        set_deliverability_checker(None)
+
+
+def test_checker_caches_positive_and_negative_answers(resolver):
+    checker = DeliverabilityChecker(resolver, timeout=1.0)
+
+    assert checker.check("bluewin.ch") is True
+    assert checker.check("nope.invalid") is False
+    assert checker.check("BLUEWIN.ch") is True
+    assert checker.check("nope.invalid") is False
+    assert resolver.lookups == 2
+
+
+def test_negative_answers_expire_sooner():
+    cache = MXCache(ttl=60, negative_ttl=0.01)
+    cache.set("good.ch", True)
+    cache.set("bad.ch", False)
+    time.sleep(0.02)
+    assert cache.get("good.ch") is True
+    assert cache.get("bad.ch") is None
+
+
+def test_checker_respects_time_budget():
+    slow = StaticResolver({"slow.ch": ["mx.slow.ch"]}, delay=0.3)
+    checker = DeliverabilityChecker(slow, timeout=0.05)
+
+    started = time.monotonic()
+    assert checker.check("slow.ch") is None
+    assert time.monotonic() - started < 0.2
+
+    # The lookup finishes in the background and fills the cache
+    time.sleep(0.4)
+    assert checker.check("slow.ch") is True
+    assert slow.lookups == 1
+
+
+def test_resolver_errors_are_not_cached():
+    def broken(domain):
+        raise OSError("network unreachable")
+
+    checker = DeliverabilityChecker(broken, timeout=0.5)
+    assert checker.check("bluewin.ch") is None
+    assert checker.cache.size() == 0
+
+
+def test_enhanced_email_validator_checks_deliverability(install_checker):
+    validator = EnhancedEmailValidator(check_deliverability=True)
+
+    validator(None, SimpleNamespace(data="anna@bluewin.ch"))
+    with pytest.raises(ValidationError, match="zugestellt"):
+        validator(None, SimpleNamespace(data="anna@no-mail-here.ch"))
+    # Undeliverable typo: rejected, with the suggestion in the message
+    with pytest.raises(ValidationError, match="zugestellt.*gmail.com"):
+        validator(None, SimpleNamespace(data="anna@gmial.com"))
+
+    # Without the flag no lookups happen
+    EnhancedEmailValidator()(None, SimpleNamespace(data="anna@no-mail-here.ch"))
+    assert install_checker.resolver.lookups == 3
+
+
+def test_registration_asks_once_about_a_likely_typo(client, mock_courses, mock_email):
+    """The first submit shows the hint; submitting the same address again registers."""
+    form = {'first_name': 'Anna', 'last_name': 'Muster', 'email': 'anna@gmial.com',
+            'phone': '076 123 45 67', 'course_id': 'test-course'}
+    response = client.post('/anmeldung', data=form)
+    assert 'Meintest Du <strong>anna@gmail.com</strong>'.encode() in response.data
+    assert b'name="email_checked" value="anna@gmial.com"' in response.data
+
+    with patch('app.app.SessionLocal'):
+        response = client.post('/anmeldung', data={**form, 'email_checked': 'anna@gmial.com'})
+    assert b'Danke, Anna!' in response.data
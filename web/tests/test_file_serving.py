@@ -0,0 +1,184 @@
+"""
+Tests for file delivery: ETags, conditional GET, ranges and caching.
+"""
+
+import os
+
+from app.file_serving import content_hash
+
+MEDIA_URL = '/unterlagen/grundkurs-2025-10-02-di/media/L02/Dorfstrasse.jpg'
+
+
+def test_media_etag_and_not_modified(client):
+    """Media responses carry a content-hash ETag and answer 304 when unchanged."""
+    response = client.get(MEDIA_URL)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get(MEDIA_URL, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_media_byte_range(client):
+    """Large files can be fetched in parts."""
+    response = client.get(MEDIA_URL, headers={'Range': 'bytes=0-99'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'].startswith('bytes 0-99/')
+    assert len(response.data) == 100
+
+
+def test_media_fingerprinted_url_is_immutable(client):
+    """With the current fingerprint in the URL the file is cached for a year."""
+    fingerprint = client.get(MEDIA_URL).headers['ETag'].strip('"')
+
+    response = client.get(f'{MEDIA_URL}?v={fingerprint}')
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+    stale = client.get(f'{MEDIA_URL}?v=0000000000000000')
+    assert 'immutable' not in stale.headers['Cache-Control']
+
+
+def test_media_rejects_path_traversal(client):
+    """Paths outside the course folder are refused."""
+    assert client.get('/unterlagen/grundkurs-2025-10-02-di/media/..%2F..%2Fmeta%2Fcourses.json').status_code == 403
+    assert client.get('/unterlagen/..%2F..%2Fmeta/media/courses.json').status_code == 404
+    assert client.get('/unterlagen/grundkurs-2025-10-02-di/media/L02/missing.png').status_code == 404
+
+
+def test_media_rejects_symlinks_leaving_the_course(client):
+    """A symlink inside the course folder that points outside it is refused."""
+    from app.utils.markdown_loader import DURCHFUEHRUNGEN_DIR
+
+    link = DURCHFUEHRUNGEN_DIR / 'grundkurs-2025-10-02-di' / 'L02' / 'courses-link.json'
+    link.symlink_to(DURCHFUEHRUNGEN_DIR.parent.parent / 'meta' / 'courses.json')
+    try:
+        assert link.is_file()
+        assert client.get('/unterlagen/grundkurs-2025-10-02-di/media/L02/courses-link.json').status_code == 403
+    finally:
+        link.unlink()
+
+
+def test_content_hash_cached_per_mtime(tmp_path):
+    """The hash is recomputed only when mtime or size change."""
+    path = tmp_path / 'handout.pdf'
+    path.write_bytes(b'version 1')
+    first = content_hash(path)
+
+    stat = os.stat(path)
+    path.write_bytes(b'version 2')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert content_hash(path) == first  # same mtime and size: cached
+
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert content_hash(path) != first
+
+
+def test_static_urls_are_fingerprinted(client):
+    """url_for('static') appends the fingerprint; such URLs are immutable."""
+    html = client.get('/kursleitung').get_data(as_text=True)
+    assert '/static/img/astrid.png?v=' in html
+
+    url = html.split('href="/static/css/style.css', 1)[1].split('"', 1)[0]
+    response = client.get('/static/css/style.css' + url)
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'no-cache' in client.get('/static/css/style.css').headers['Cache-Control']
+
+
+def test_rewrite_relative_urls_adds_fingerprint():
+    """Lesson HTML links existing media with their fingerprint."""
+    from app.utils.markdown_loader import rewrite_relative_urls
+
+    html = rewrite_relative_urls(
+        '<img src="Dorfstrasse.jpg"><a href="missing.pdf#p2">x</a><a href="../assets/bank_qr.png#top">y</a>',
+        'grundkurs-2025-10-02-di', 'L02',
+    )
+    assert '/media/L02/Dorfstrasse.jpg?v=' in html
+    assert 'href="/unterlagen/grundkurs-2025-10-02-di/media/L02/missing.pdf#p2"' in html
+    assert '/media/assets/bank_qr.png?v=' in html and html.endswith('#top">y</a>')
+
+
+def test_asset_manifest_build_and_load(tmp_path):
+    """The manifest written at build time is used as is."""
+    from app.assets import AssetManifest
+
+    root = tmp_path / 'static'
+    (root / 'css').mkdir(parents=True)
+    (root / 'css' / 'site.css').write_text('body {}')
+    (root / '.DS_Store').write_text('x')
+
+    path = tmp_path / 'manifest.json'
+    assert AssetManifest({'static': root}).write(str(path)) == 1
+
+    loaded = AssetManifest({'static': root}, str(path))
+    assert loaded.fingerprint('static', 'css/site.css') == content_hash(root / 'css' / 'site.css')
+    assert loaded.fingerprint('static', 'css/missing.css') is None
+    assert loaded.fingerprint('static', '../manifest.json') is None
+
+
+def _offload_client(mode):
+    from unittest.mock import patch
+    from app.app import create_app
+    from app.config import Config
+    from app.file_serving import OffloadProxy
+
+    app = create_app({'TESTING': True})
+    proxy = OffloadProxy(app.wsgi_app, Config.FILE_OFFLOAD_ROOT, '/_protected')
+    app.wsgi_app = proxy
+    return app, proxy, patch('app.config.Config.FILE_OFFLOAD', mode)
+
+
+def test_offload_returns_header_only():
+    """In offload mode the app answers with the proxy header and no body."""
+    from unittest.mock import patch
+    from app.app import create_app
+
+    client = create_app({'TESTING': True}).test_client()
+    with patch('app.config.Config.FILE_OFFLOAD', 'x-accel-redirect'):
+        response = client.get(MEDIA_URL)
+        not_modified = client.get(MEDIA_URL, headers={'If-None-Match': response.headers['ETag']})
+        flyer = client.get('/flyer')
+    with patch('app.config.Config.FILE_OFFLOAD', 'x-sendfile'):
+        sendfile = client.get('/static/css/style.css')
+
+    assert response.headers['X-Accel-Redirect'] == (
+        '/_protected/content/unterlagen/durchfuehrungen/grundkurs-2025-10-02-di/L02/Dorfstrasse.jpg')
+    assert response.data == b''
+    assert response.content_type == 'image/jpeg'
+    assert not_modified.status_code == 304
+    assert flyer.headers['X-Accel-Redirect'].endswith('/static/docs/promo/Flyer-IT-Kurs-Dietikon.pdf')
+    assert sendfile.headers['X-Sendfile'] == '/_protected/static/css/style.css'
+
+
+def test_offload_through_proxy_stand_in(client):
+    """Behind the proxy stand-in clients get the same bytes and ranges as in-process."""
+    expected = client.get(MEDIA_URL).data
+
+    app, proxy, offload = _offload_client('x-accel-redirect')
+    with offload:
+        proxied = app.test_client().get(MEDIA_URL)
+        partial = app.test_client().get(MEDIA_URL, headers={'Range': 'bytes=10-19'})
+
+    assert proxy.offloaded == 2
+    assert proxied.status_code == 200
+    assert proxied.data == expected
+    assert partial.status_code == 206
+    assert partial.data == expected[10:20]
+
+
+def test_offload_falls_back_outside_root(tmp_path):
+    """Files outside FILE_OFFLOAD_ROOT are still served by the app."""
+    from unittest.mock import patch
+    from flask import Flask
+    from app.file_serving import send_cached_file
+
+    path = tmp_path / 'export.csv'
+    path.write_text('a;b\n')
+    app = Flask(__name__)
+    with patch('app.config.Config.FILE_OFFLOAD', 'x-accel-redirect'):
+        with app.test_request_context('/'):
+            response = send_cached_file(path)
+            response.direct_passthrough = False
+            assert 'X-Accel-Redirect' not in response.headers
+            assert response.get_data() == b'a;b\n'
@@ -0,0 +1,75 @@
+"""
+Tests for the post-render stage: critical CSS, deferred stylesheets, minified HTML.
+"""
+
+import hashlib
+from unittest.mock import patch
+
+from app.html_optimizer import critical_css, minify_html, optimize_html, pages
+
+SLUG = 'grundkurs-2025-10-02-di'
+
+
+def test_critical_css_keeps_only_matching_rules():
+    """Rules for absent classes drop out; media queries and @font-face stay as blocks."""
+    css = ('/* c */ body { margin : 0 } .used a:hover { color: red } .unused { color: blue }\n'
+           '@media (max-width: 600px) { .used { display: none } .unused { x: y } }\n'
+           '@media print { .unused { x: y } } @font-face { font-family: X }')
+    html = '<body><div class="used"><a href="#">x</a></div></body>'
+    assert critical_css(css, html) == ('body{margin:0}.used a:hover{color:red}'
+                                       '@media (max-width: 600px){.used{display:none}}'
+                                       '@font-face{font-family:X}')
+
+
+def test_minify_keeps_preformatted_blocks():
+    """Whitespace collapses and comments go, but <pre> and <script> stay byte for byte."""
+    html = '<p>\n   Hallo   <b>Welt</b>  </p><!-- weg -->\n<pre>  a\n    b</pre>\n<script>  x  </script>'
+    assert minify_html(html) == '<p>\nHallo <b>Welt</b> </p>\n<pre>  a\n    b</pre>\n<script>  x  </script>'
+
+
+def test_stylesheet_is_deferred():
+    """The <head> link becomes inline critical CSS plus preload; the sheet moves to the end."""
+    html = ('<html><head><link href="/static/css/style.css?v=1" rel="stylesheet"></head>'
+            '<body><main class="wrap"><h1>X</h1></main></body></html>')
+    result = optimize_html(html)
+    head, body = result.split('</head>')
+    assert '<style>' in head and 'rel="stylesheet"' not in head
+    assert '<link rel="preload" as="style" href="/static/css/style.css?v=1">' in head
+    assert body.endswith('<link rel="stylesheet" href="/static/css/style.css?v=1">\n</body></html>')
+    assert 'h1{' in head and '.participants-table' not in head
+
+
+def test_cached_pages_optimized_once(client):
+    """Lesson pages are optimized once per content; other pages are left alone."""
+    pages.clear()
+    url = f'/unterlagen/{SLUG}/L01'
+    first = client.get(url)
+    html = first.get_data(as_text=True)
+    assert '<style>' in html and '<!--' not in html
+    assert html.rstrip().endswith('</html>')
+
+    second = client.get(url)
+    assert second.data == first.data
+    assert pages.misses == 1 and pages.hits == 1
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    with patch('app.config.Config.HTML_OPTIMIZE', False):
+        assert '<style>' not in client.get(url).get_data(as_text=True)
+    assert '<style>' not in client.get('/kursliste').get_data(as_text=True)
+
+
+def test_cached_page_hit_does_not_hash_the_body(client):
+    """The view's fingerprint is the cache key: a hit neither re-optimizes nor hashes the page."""
+    pages.clear()
+    url = f'/unterlagen/{SLUG}/L01'
+    first = client.get(url)
+
+    hashed, sha256 = [], hashlib.sha256
+    spy = lambda data=b'': hashed.append(bytes(data)) or sha256(data)
+    with patch('app.html_optimizer.hashlib.sha256', spy), \
+            patch('app.html_optimizer._optimize', side_effect=AssertionError):
+        second = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert second.status_code == 200
+    assert pages.hits == 1
+    assert not any(b'</html>' in data for data in hashed)
+    assert second.headers['ETag'].strip('"').split('-')[0] == first.headers['ETag'].strip('"')
@@ -0,0 +1,108 @@
+"""
+Tests for responsive lesson images: sizes, lazy loading, srcset and derivatives.
+"""
+
+import re
+import struct
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+from app.images import _header_size, responsive_images
+
+SLUG = 'grundkurs-2025-10-02-di'
+MEDIA = f'/unterlagen/{SLUG}/media/'
+
+
+def _png(path, width, height):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    rows = b''.join(b'\x00' + b'\x00' * width * 3 for _ in range(height))
+    path.write_bytes(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) + chunk(b'IDAT', zlib.compress(rows))
+                     + chunk(b'IEND', b''))
+
+
+def test_header_size_without_decoding(tmp_path):
+    """PNG, WebP and JPEG sizes come from the file headers."""
+    png = tmp_path / 'a.png'
+    _png(png, 31, 7)
+    webp = tmp_path / 'b.webp'
+    webp.write_bytes(b'RIFF\x00\x00\x00\x00WEBPVP8X' + b'\x0a\x00\x00\x00' + b'\x00' * 4
+                     + (639).to_bytes(3, 'little') + (479).to_bytes(3, 'little'))
+    jpeg = tmp_path / 'c.jpg'
+    jpeg.write_bytes(b'\xff\xd8' + b'\xff\xe0\x00\x04ab' + b'\xff\xc0\x00\x11\x08'
+                     + struct.pack('>HH', 90, 120) + b'\x00' * 10)
+
+    assert _header_size(str(png)) == (31, 7)
+    assert _header_size(str(webp)) == (640, 480)
+    assert _header_size(str(jpeg)) == (120, 90)
+
+
+def test_lesson_images_get_size_and_lazy_loading(client):
+    """Lesson <img> tags carry width/height, loading=lazy and keep author widths."""
+    html = client.get(f'/unterlagen/{SLUG}/L02').get_data(as_text=True)
+    tag = re.search(r'<img[^>]*Dorfstrasse[^>]*>', html).group(0)
+    assert re.search(r'width="\d+" height="\d+"', tag)
+    assert 'loading="lazy"' in tag
+
+    html = client.get(f'/unterlagen/{SLUG}/L03').get_data(as_text=True)
+    tag = re.search(r'<img[^>]*asi_handpan[^>]*>', html).group(0)
+    assert tag.count('width=') == 1 and 'width="200"' in tag and 'height="' in tag
+
+
+def test_srcset_and_webp_source_when_derivatives_available():
+    """With derivatives the <img> gets a srcset and a WebP <source> inside <picture>."""
+    html = f'<p><img alt="x" src="{MEDIA}L02/Dorfstrasse.jpg?v=1"></p>'
+    with patch('app.images.derivatives_enabled', return_value=True):
+        result = responsive_images(html, SLUG)
+
+    assert result.startswith('<p><picture><source type="image/webp" srcset="')
+    srcset = re.search(r'<img[^>]*srcset="([^"]+)"', result).group(1)
+    widths = re.findall(r' (\d+)w', srcset)
+    assert widths[:2] == ['480', '960']
+    assert f'/unterlagen/{SLUG}/bild/480/L02/Dorfstrasse.jpg?v=' in srcset
+    assert f'/unterlagen/{SLUG}/bild/480/L02/Dorfstrasse.jpg.webp?v=' in result
+    assert 'sizes="' in result
+
+
+def test_derivative_route_rejects_unknown_widths(client):
+    """Only configured widths are generated (no arbitrary resizing)."""
+    with patch('app.images.derivatives_enabled', return_value=True):
+        assert client.get(f'/unterlagen/{SLUG}/bild/123/L02/Dorfstrasse.jpg').status_code == 404
+        assert client.get(f'/unterlagen/{SLUG}/bild/480/L02/missing.jpg').status_code == 404
+
+
+def test_derivative_route_rejects_symlinks_leaving_the_course(client, tmp_path):
+    """A symlinked source outside the course folder is neither read nor served."""
+    from app.utils.markdown_loader import DURCHFUEHRUNGEN_DIR
+
+    outside = tmp_path / 'outside.png'
+    _png(outside, 960, 10)
+    link = DURCHFUEHRUNGEN_DIR / SLUG / 'L02' / 'outside-link.png'
+    link.symlink_to(outside)
+    try:
+        with patch('app.images.derivatives_enabled', return_value=True), \
+                patch('app.images.content_hash', side_effect=AssertionError('source read')):
+            assert client.get(f'/unterlagen/{SLUG}/bild/480/L02/outside-link.png').status_code == 404
+            assert client.get(f'/unterlagen/{SLUG}/bild/480/L02/outside-link.png.webp').status_code == 404
+    finally:
+        link.unlink()
+
+
+def test_derivatives_generated_and_cached(client, tmp_path):
+    """Derivatives are generated once per source hash and served immutable."""
+    pytest.importorskip('PIL')
+    from app.images import build_derivatives
+
+    with patch('app.config.Config.IMAGE_CACHE_DIR', str(tmp_path)):
+        url = f'/unterlagen/{SLUG}/bild/480/L02/Dorfstrasse.jpg.webp'
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.mimetype == 'image/webp'
+        assert len(response.data) < 907656
+        assert len(list(tmp_path.iterdir())) == 1
+
+        assert build_derivatives(workers=2) > 0
+        assert build_derivatives(workers=2) == 0
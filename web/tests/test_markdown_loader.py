@@ -0,0 +1,45 @@
+"""
+Tests for the reusable Markdown converter.
+"""
+
+import threading
+
+import markdown
+
+from app.utils import markdown_loader
+from app.utils.markdown_loader import DURCHFUEHRUNGEN_DIR, MARKDOWN_EXTENSIONS, markdown_to_html
+
+
+def _fresh(text):
+    return markdown.markdown(text, extensions=list(MARKDOWN_EXTENSIONS))
+
+
+def test_reused_converter_renders_like_a_fresh_one():
+    """Course pages render exactly as with markdown.markdown(), in any order."""
+    sources = [p.read_text(encoding='utf-8') for p in sorted(DURCHFUEHRUNGEN_DIR.glob('*/**/*.md'))]
+    assert sources
+    for text in sources + sources[::-1]:
+        assert markdown_to_html(text) == _fresh(text)
+
+
+def test_no_state_leaks_between_documents():
+    """Footnotes, abbreviations and reference links of one document do not reach the next."""
+    first = 'Text[^1] mit HTML.\n\n[^1]: Fussnote\n\n*[HTML]: Hyper Text\n\n[link]: https://example.org'
+    second = 'Nur HTML und [link].'
+    markdown_to_html(first)
+    assert markdown_to_html(second) == _fresh(second)
+    assert 'footnote' not in markdown_to_html(second)
+
+
+def test_one_converter_per_thread():
+    """Each thread builds its own converter once and reuses it."""
+    markdown_to_html('# a')
+    main = markdown_loader._converters.md
+    markdown_to_html('# b')
+    assert markdown_loader._converters.md is main
+
+    seen = []
+    thread = threading.Thread(target=lambda: (markdown_to_html('# c'), seen.append(markdown_loader._converters.md)))
+    thread.start()
+    thread.join()
+    assert seen[0] is not main
@@ -0,0 +1,333 @@
+"""
+Tests for metrics, health checks and diagnostics endpoints.
+"""
+
+import multiprocessing
+import time
+
+from app.metrics import Registry
+
+
+def _worker(directory, requests):
+    registry = Registry()
+    counter = registry.counter("jobs_total", "Jobs", ("kind",))
+    in_flight = registry.gauge("jobs_in_progress", "Jobs in progress")
+    latency = registry.histogram("job_seconds", "Job latency", buckets=(0.1, 1.0))
+    registry.enable_multiprocess(directory)
+    for _ in range(requests):
+        counter.inc(kind="a")
+        latency.observe(0.05)
+    in_flight.inc()
+    registry.flush(force=True)
+
+
+def test_metrics_endpoint_prometheus_format(client):
+    """Test that /metrics exposes request metrics in Prometheus text format."""
+    client.get('/kursleitung')
+    client.get('/kursleitung')
+    client.get('/does-not-exist')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+
+    text = response.get_data(as_text=True)
+    assert '# TYPE http_requests_total counter' in text
+    assert 'http_requests_total{endpoint="kursleitung",method="GET",status="2xx"}' in text
+    assert 'http_requests_total{endpoint="unmatched",method="GET",status="4xx"}' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="kursleitung",status="2xx",le="+Inf"}' in text
+    assert 'app_cache_hit_ratio' in text
+    assert 'app_info{app_name="it-kurs-webapp"' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert 'latency_seconds_count 4' in text
+    assert 'latency_seconds_sum 4.25' in text
+
+
+def test_multiprocess_aggregation(tmp_path):
+    """Counts written by several worker processes are summed at scrape time."""
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_worker, args=(str(tmp_path), n)) for n in (2, 3)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+
+    registry = Registry()
+    registry.counter("jobs_total", "Jobs", ("kind",))
+    registry.gauge("jobs_in_progress", "Jobs in progress")
+    registry.histogram("job_seconds", "Job latency", buckets=(0.1, 1.0))
+    registry.enable_multiprocess(str(tmp_path))
+
+    text = registry.render()
+    assert 'jobs_total{kind="a"} 5' in text
+    assert 'job_seconds_count 5' in text
+    # Workers have exited: their gauges no longer count, counters do
+    assert '\njobs_in_progress ' not in text
+
+
+def test_unknown_http_methods_share_one_label(client):
+    """Client-chosen verbs do not create new label values."""
+    client.open('/kursleitung', method='BREW')
+    client.open('/kursleitung', method='XYZZY')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'method="other"' in text
+    assert 'BREW' not in text and 'XYZZY' not in text
+
+
+def test_idle_process_publishes_last_increments(tmp_path):
+    """Values changed after the last throttled flush are written without another request."""
+    registry = Registry()
+    counter = registry.counter("jobs_total", "Jobs")
+    registry.flush_interval = 0.05
+    registry.enable_multiprocess(str(tmp_path))
+    registry.flush(force=True)
+    counter.inc()
+    registry.flush()  # gedrosselt: schreibt nicht
+
+    reader = Registry()
+    reader.counter("jobs_total", "Jobs")
+    reader._directory = tmp_path
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and reader.collect()["jobs_total"].get((), 0) != 1:
+        time.sleep(0.02)
+    assert reader.collect()["jobs_total"] == {(): 1.0}
+
+
+def test_dead_workers_are_folded_into_aggregate(tmp_path):
+    """Files of exited workers are merged once; the totals stay the same."""
+    ctx = multiprocessing.get_context("fork")
+    for n in (2, 3):
+        p = ctx.Process(target=_worker, args=(str(tmp_path), n))
+        p.start()
+        p.join()
+
+    registry = Registry()
+    registry.counter("jobs_total", "Jobs", ("kind",))
+    registry.gauge("jobs_in_progress", "Jobs in progress")
+    registry.histogram("job_seconds", "Job latency", buckets=(0.1, 1.0))
+    registry.enable_multiprocess(str(tmp_path))
+    before = registry.render()
+
+    assert len(registry.merge_dead_processes()) == 2
+    # Übrig: das Aggregat und die Datei dieses (lebenden) Prozesses
+    assert {p.name for p in tmp_path.glob("metrics_*.json")} == {"metrics_aggregate.json", registry._file.name}
+    assert registry.render() == before
+    assert registry.merge_dead_processes() == []
+
+    # Ein weiterer recycelter Worker kommt zum Aggregat dazu
+    p = ctx.Process(target=_worker, args=(str(tmp_path), 4))
+    p.start()
+    p.join()
+    registry.merge_dead_processes()
+    text = registry.render()
+    assert 'jobs_total{kind="a"} 9' in text
+    assert 'job_seconds_count 9' in text
+    assert '\njobs_in_progress ' not in text
+
+
+def test_server_timing_header(client, caplog):
+    """Test the Server-Timing breakdown and the slow-request log line."""
+    from unittest.mock import patch
+    from app import timing
+    from app.cache import cache
+
+    cache.clear()  # Lektion nicht aus dem Render-Cache
+    timing.set_enabled(True)
+    try:
+        with patch('app.config.Config.SLOW_REQUEST_MS', 0):
+            response = client.get('/unterlagen/grundkurs-2025-10-02-di/L01')
+    finally:
+        timing.set_enabled(False)
+
+    assert response.status_code == 200
+    header = response.headers['Server-Timing']
+    for name in ('load_courses', 'render_lesson', 'rewrite_relative_urls', 'template', 'total'):
+        assert f'{name};dur=' in header
+    assert any('"event": "slow_request"' in r.message for r in caplog.records)
+
+
+def test_server_timing_disabled_by_default(client):
+    """Without SERVER_TIMING no header is sent and phase() is a shared no-op."""
+    from app import timing
+
+    assert timing.phase('x') is timing.phase('y')
+    response = client.get('/kursleitung')
+    assert 'Server-Timing' not in response.headers
+
+
+def _profiling_app():
+    from unittest.mock import patch
+    from flask import Flask
+    from app.profiler import register_profiler
+
+    app = Flask(__name__)
+    app.secret_key = 'test-secret-key'
+    with patch('app.config.Config.PROFILING_ENABLED', True):
+        register_profiler(app)
+
+    @app.route('/busy')
+    def busy():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+        return 'done'
+
+    return app
+
+
+def test_profile_single_request():
+    """?_profile=1 replaces the response with collapsed stacks (admins only)."""
+    from unittest.mock import patch
+
+    client = _profiling_app().test_client()
+    with patch('app.config.Config.ADMIN_TOKEN', 'secret'):
+        anonymous = client.get('/busy?_profile=1')
+        profiled = client.get('/busy?_profile=1&interval=1', headers={'X-Admin-Token': 'secret'})
+
+    assert anonymous.get_data(as_text=True) == 'done'
+    assert profiled.status_code == 200
+    assert 'attachment' in profiled.headers['Content-Disposition']
+    assert int(profiled.headers['X-Profile-Samples']) > 0
+    assert 'busy (test_monitoring.py:' in profiled.get_data(as_text=True)
+
+
+def test_profile_window_and_concurrency():
+    """The window endpoint requires admin rights and only one profile runs at a time."""
+    from unittest.mock import patch
+    from app import profiler
+
+    client = _profiling_app().test_client()
+    headers = {'X-Admin-Token': 'secret'}
+    with patch('app.config.Config.ADMIN_TOKEN', 'secret'):
+        assert client.post('/_admin/profile?seconds=0.1').status_code == 403
+        assert client.post('/_admin/profile?seconds=0.1', headers=headers).status_code == 200
+
+        profiler._profile_lock.acquire()
+        try:
+            assert client.post('/_admin/profile?seconds=0.1', headers=headers).status_code == 409
+        finally:
+            profiler._profile_lock.release()
+
+
+def test_profiler_disabled_by_default(client):
+    """Without PROFILING_ENABLED neither hooks nor the endpoint exist."""
+    response = client.get('/kursleitung?_profile=1', headers={'X-Admin-Token': 'test-token'})
+    assert 'X-Profile-Samples' not in response.headers
+    assert client.post('/_admin/profile').status_code == 404
+
+
+def test_memory_report(client):
+    """The memory endpoint reports RSS, GC counters and app structure sizes."""
+    from unittest.mock import patch
+
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        assert client.get('/_admin/memory').status_code == 403
+        response = client.get('/_admin/memory', headers={'X-Admin-Token': 'test-token'})
+
+    data = response.get_json()
+    assert data['rss_bytes'] > 0
+    assert len(data['gc']['counts']) == 3
+    assert set(data['app']) == {'cache_entries', 'rate_limiter_keys', 'mx_cache_entries',
+                                'compressed_variants', 'compressed_variant_bytes', 'optimized_pages'}
+    assert data['tracemalloc']['tracing'] is False
+
+
+def test_tracemalloc_snapshot_diff(client):
+    """Two snapshots can be diffed; the growth between them shows up by line."""
+    from unittest.mock import patch
+
+    headers = {'X-Admin-Token': 'test-token'}
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        assert client.post('/_admin/memory/snapshot', headers=headers).status_code == 409
+        client.post('/_admin/memory/tracemalloc/start', headers=headers)
+        try:
+            first = client.post('/_admin/memory/snapshot', headers=headers).get_json()['id']
+            leak = [bytearray(1024) for _ in range(2000)]
+            second = client.post('/_admin/memory/snapshot', headers=headers).get_json()['id']
+            diff = client.get(f'/_admin/memory/diff?from={first}&to={second}', headers=headers)
+            missing = client.get(f'/_admin/memory/diff?from={first}&to=999', headers=headers)
+        finally:
+            client.post('/_admin/memory/tracemalloc/stop', headers=headers)
+
+    assert diff.status_code == 200
+    top = diff.get_json()['top'][0]
+    assert 'test_monitoring.py:' in top['where'][0]
+    assert top['size_diff_bytes'] >= 2000 * 1024
+    assert missing.status_code == 404
+    del leak
+
+
+
+def _health_app(check, **prober_options):
+    from flask import Flask
+    from app.health import HealthCheckMiddleware, HealthProber
+
+    app = Flask(__name__)
+    hooks = []
+    app.before_request(lambda: hooks.append(1))
+    prober = HealthProber({'database': check}, **prober_options)
+    app.wsgi_app = HealthCheckMiddleware(app.wsgi_app, prober)
+    return app, prober, hooks
+
+
+def test_readiness_reads_background_snapshot():
+    """Probes read the cached snapshot instead of checking the DB each time."""
+    calls = []
+
+    def check():
+        calls.append(1)
+        return {'status': 'healthy', 'available': True}
+
+    app, prober, hooks = _health_app(check, interval=60)
+    client = app.test_client()
+    try:
+        for _ in range(5):
+            response = client.get('/health/ready')
+    finally:
+        prober.stop()
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['status'] == 'ready'
+    assert data['stale'] is False
+    assert data['age_seconds'] >= 0
+    assert data['checks']['database']['available'] is True
+    assert len(calls) == 1
+    assert hooks == []  # Flask hooks are skipped
+    assert response.headers['Cache-Control'] == 'no-store'
+
+
+def test_readiness_stale_or_failing_snapshot():
+    """A failing check or an outdated snapshot makes the worker not ready."""
+    def failing():
+        raise RuntimeError('pool exhausted')
+
+    app, prober, _ = _health_app(failing, interval=60)
+    try:
+        response = app.test_client().get('/health/ready')
+    finally:
+        prober.stop()
+    assert response.status_code == 503
+    assert response.get_json()['checks']['database']['message'] == 'pool exhausted'
+
+    app, prober, _ = _health_app(lambda: {'available': True}, interval=60, max_age=0.01)
+    client = app.test_client()
+    try:
+        client.get('/health/ready')
+        time.sleep(0.02)
+        response = client.get('/health/ready')
+    finally:
+        prober.stop()
+    assert response.status_code == 503
+    assert response.get_json()['stale'] is True
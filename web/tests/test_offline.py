@@ -0,0 +1,66 @@
+"""
+Tests for the offline lesson reader: precache manifest and service worker.
+"""
+
+from unittest.mock import patch
+
+SLUG = 'grundkurs-2025-10-02-di'
+MANIFEST = f'/unterlagen/{SLUG}/offline.json'
+
+
+def test_manifest_lists_lessons_and_fingerprinted_media(client):
+    """The manifest covers the course page, every lesson and its media with ?v=."""
+    response = client.get(MANIFEST)
+    assert response.status_code == 200
+    manifest = response.get_json()
+
+    assert manifest['cache'] == f'unterlagen-{SLUG}'
+    urls = manifest['urls']
+    assert urls[0] == f'/unterlagen/{SLUG}'
+    for lesson in ('L01', 'L02', 'L03'):
+        assert f'/unterlagen/{SLUG}/{lesson}' in urls
+    media = [url for url in urls if '/media/' in url]
+    assert media and all('?v=' in url for url in media)
+    assert any(url.startswith('/static/css/style.css?v=') for url in urls)
+    assert manifest['bytes'] > 0
+
+
+def test_manifest_revalidates_by_version(client):
+    """The ETag is the content version: unchanged course -> 304, changed lesson -> new version."""
+    first = client.get(MANIFEST)
+    assert first.headers['ETag'] == f'"{first.get_json()["version"]}"'
+    assert 'no-cache' in first.headers['Cache-Control']
+    assert client.get(MANIFEST, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    with patch('app.offline.load_lesson', side_effect=lambda slug, lid: ({'title': lid}, f'<p>{lid} neu</p>')):
+        changed = client.get(MANIFEST).get_json()
+    assert changed['version'] != first.get_json()['version']
+
+
+def test_large_files_are_not_precached(client):
+    """Files above OFFLINE_MAX_FILE_BYTES stay online-only."""
+    with patch('app.config.Config.OFFLINE_MAX_FILE_BYTES', 0):
+        urls = client.get(MANIFEST).get_json()['urls']
+    assert not any('/media/' in url or '/static/' in url for url in urls)
+
+
+def test_service_worker_and_registration(client):
+    """Lesson pages load the registration script; the worker is served under /unterlagen/."""
+    html = client.get(f'/unterlagen/{SLUG}/L01').get_data(as_text=True)
+    assert 'src="/static/js/offline.js?v=' in html
+    assert 'data-worker="/unterlagen/sw.js"' in html
+    assert f'data-manifest="{MANIFEST}"' in html
+
+    worker = client.get('/unterlagen/sw.js')
+    assert worker.status_code == 200
+    assert worker.mimetype == 'text/javascript'
+    assert 'no-cache' in worker.headers['Cache-Control']
+    assert b'precache' in worker.data
+
+
+def test_offline_reader_can_be_disabled(client):
+    """OFFLINE_READER=0 removes script, worker and manifest."""
+    with patch('app.config.Config.OFFLINE_READER', False):
+        assert client.get('/unterlagen/sw.js').status_code == 404
+        assert client.get(MANIFEST).status_code == 404
+    assert client.get('/unterlagen/gibt-es-nicht/offline.json').status_code == 404
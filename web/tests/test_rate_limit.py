@@ -0,0 +1,192 @@
+"""
+Tests for the rate limiter and its storage backends.
+"""
+
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.security import RateLimiter
+from app.rate_limit_storage import (
+    MemoryStorage, SQLiteStorage, RedisStorage, create_storage,
+)
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Minimal RESP server: enough of Redis for the rate limit backend."""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def _reply(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(self._reply(v) for v in value)
+        if value == "OK" or value == "QUEUED" or value == "PONG":
+            return f"+{value}\r\n".encode()
+        data = str(value).encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def handle(self):
+        server = self.server
+        queued = None
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if server.delay:
+                time.sleep(server.delay)
+            name = args[0].upper()
+            if name == "MULTI":
+                queued = []
+                self.wfile.write(self._reply("OK"))
+            elif name == "EXEC":
+                with server.lock:
+                    results = [server.run(cmd) for cmd in queued]
+                queued = None
+                self.wfile.write(self._reply(results))
+            elif queued is not None:
+                queued.append(args)
+                self.wfile.write(self._reply("QUEUED"))
+            else:
+                with server.lock:
+                    self.wfile.write(self._reply(server.run(args)))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), _FakeRedisHandler)
+        self.data = {}
+        self.ttl = {}
+        self.lock = threading.Lock()
+        self.delay = delay
+
+    def run(self, args):
+        name = args[0].upper()
+        if name == "PING":
+            return "PONG"
+        if name in ("AUTH", "SELECT"):
+            return "OK"
+        if name == "INCR":
+            self.data[args[1]] = int(self.data.get(args[1], 0)) + 1
+            return self.data[args[1]]
+        if name == "EXPIRE":
+            self.ttl[args[1]] = int(args[2])
+            return 1
+        if name == "GET":
+            value = self.data.get(args[1])
+            return None if value is None else str(value)
+        raise ValueError(name)
+
+
+@pytest.fixture
+def fake_redis():
+    server = FakeRedisServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_create_storage_from_url(tmp_path):
+    assert isinstance(create_storage(None), MemoryStorage)
+    assert isinstance(create_storage(f"sqlite:///{tmp_path}/rl.db"), SQLiteStorage)
+    redis = create_storage("redis://:secret@cache:6380/2")
+    assert isinstance(redis, RedisStorage)
+    assert (redis.host, redis.port, redis.db, redis.password) == ("cache", 6380, 2, "secret")
+    with pytest.raises(ValueError):
+        create_storage("ftp://nope")
+
+
+def test_sqlite_storage_shared_between_workers(tmp_path):
+    """Two storage instances on the same file behave like two workers."""
+    path = str(tmp_path / "rl.db")
+    worker_a = RateLimiter(SQLiteStorage(path, timeout=1.0))
+    worker_b = RateLimiter(SQLiteStorage(path, timeout=1.0))
+
+    results = [
+        (worker_a if i % 2 else worker_b).is_allowed("ip", limit=5, window=300)
+        for i in range(8)
+    ]
+    assert results.count(True) == 5
+    assert results[5:] == [False, False, False]
+
+
+def test_sqlite_storage_concurrent_hits_are_atomic(tmp_path):
+    path = str(tmp_path / "rl.db")
+    storage = SQLiteStorage(path, timeout=5.0)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: storage.hit("ip", 20, 300), range(40)))
+    assert results.count(True) == 20
+
+
+def test_sqlite_cleanup_keeps_live_counters_of_other_windows(tmp_path):
+    """A cleanup triggered by a short-window limiter keeps longer windows' buckets."""
+    storage = SQLiteStorage(str(tmp_path / "rl.db"), timeout=1.0)
+    for _ in range(10):
+        assert storage.hit("admin_login:ip", 10, 300) is True
+
+    storage._hits_since_cleanup = 499  # nächster Hit räumt auf
+    assert storage.hit("kursliste:ip", 100, 60) is True
+    assert storage._hits_since_cleanup == 0
+    assert storage.hit("admin_login:ip", 10, 300) is False
+
+
+def test_sqlite_upgrades_old_table(tmp_path):
+    """A database from before the expiry column keeps working."""
+    import sqlite3
+
+    path = str(tmp_path / "rl.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE rate_limit (key TEXT NOT NULL, bucket INTEGER NOT NULL,"
+                     " hits INTEGER NOT NULL, PRIMARY KEY (key, bucket))")
+    assert SQLiteStorage(path, timeout=1.0).hit("ip", 5, 300) is True
+
+
+def test_redis_storage_against_stand_in(fake_redis):
+    port = fake_redis.server_address[1]
+    limiter = RateLimiter(RedisStorage(port=port, timeout=1.0))
+
+    for _ in range(5):
+        assert limiter.is_allowed("ip", limit=5, window=300) is True
+    assert limiter.is_allowed("ip", limit=5, window=300) is False
+
+    # Counter keys are bucketed and get an expiry
+    assert len(fake_redis.ttl) == 1
+    assert next(iter(fake_redis.ttl.values())) == 600
+
+
+def test_limiter_fails_open_when_store_is_slow(fake_redis):
+    fake_redis.delay = 0.5
+    port = fake_redis.server_address[1]
+    limiter = RateLimiter(RedisStorage(port=port, timeout=0.05), retry_after=60)
+
+    started = time.monotonic()
+    for _ in range(10):
+        assert limiter.is_allowed("ip", limit=1, window=300) is True
+    # Only the first call waits for the timeout, the rest skip the store
+    assert time.monotonic() - started < 0.5
+
+
+def test_limiter_fails_open_when_store_is_down():
+    with socketserver.TCPServer(("127.0.0.1", 0), socketserver.BaseRequestHandler) as s:
+        port = s.server_address[1]
+    limiter = RateLimiter(RedisStorage(port=port, timeout=0.05))
+    assert limiter.is_allowed("ip", limit=1, window=60) is True
@@ -0,0 +1,153 @@
+"""
+Tests for the full-text search: German analysis, BM25, persistence and the endpoint.
+"""
+
+import json
+
+import pytest
+
+from app.search import SearchIndex, SearchService, analyze, normalize, search_service, snippet
+
+SLUG = 'grundkurs-2025-10-02-di'
+
+
+def _doc(key, title, text, slug=SLUG):
+    return {'key': key, 'slug': slug, 'kind': 'lesson', 'name': key, 'title': title,
+            'text': text, 'signature': key}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """The global search service on a fresh index file."""
+    monkeypatch.setattr(search_service, 'path', str(tmp_path / 'index.json'))
+    monkeypatch.setattr(search_service, 'index', None)
+    monkeypatch.setattr(search_service, '_worker', None)
+    return search_service
+
+
+def test_german_analysis_folds_umlauts_and_stems():
+    """Umlauts, ß, plural and case endings map to the same term; stop words drop out."""
+    assert normalize('Netzwerke') == normalize('Netzwerk') == normalize('NETZWERKEN')
+    assert normalize('Straße') == normalize('Strasse')
+    assert normalize('Dateien') == normalize('Datei')
+    assert normalize('Übung') == 'ubung'
+    assert analyze('Die Dateien und der Ordner') == ['datei', 'ordn']
+    assert normalize('2025') == '2025'
+
+
+def test_bm25_ranks_by_term_frequency_and_rarity():
+    """A rare term weighs more; removed documents no longer match."""
+    index = SearchIndex()
+    index.add(_doc('a', 'Router', 'Router verteilen Pakete im Netzwerk. Router, Router.'))
+    index.add(_doc('b', 'Passwort', 'Ein Passwort schützt das Netzwerk.'))
+    index.add(_doc('c', 'Dateien', 'Dateien im Ordner speichern.'))
+
+    assert [doc['key'] for _, doc in index.search('router netzwerk')] == ['a', 'b']
+    assert [doc['key'] for _, doc in index.search('Passwörter')] == ['b']
+    assert index.search('Netzwerk', slug='anderer-kurs') == []
+
+    index.remove('a')
+    assert [doc['key'] for _, doc in index.search('router netzwerk')] == ['b']
+    compacted = index.compacted()
+    assert len(compacted.docs) == compacted.live_count == 2
+    assert [doc['key'] for _, doc in compacted.search('netzwerk')] == ['b']
+
+
+def test_index_round_trip_keeps_tombstones():
+    """Serialized arrays and tombstones survive a save/load."""
+    index = SearchIndex()
+    index.add(_doc('a', 'Router', 'Router und Netzwerk'))
+    index.add(_doc('b', 'Switch', 'Switch im Netzwerk'))
+    index.remove('a')
+
+    loaded = SearchIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+    assert loaded.live_count == 1 and loaded.total_length == index.total_length
+    assert [doc['key'] for _, doc in loaded.search('netzwerk')] == ['b']
+
+
+def test_snippet_highlights_and_escapes():
+    """Matches are wrapped in <mark>; the surrounding text is HTML-escaped."""
+    text = 'Vorwort <script>. ' + 'Füllwort ' * 40 + 'Hier steht das Netzwerk mit Netzwerken.'
+    result = str(snippet(text, 'netzwerk'))
+    assert '<mark>Netzwerk</mark>' in result and '<mark>Netzwerken</mark>' in result
+    assert result.startswith('… ') and '<script>' not in result
+    assert '&lt;script&gt;' in str(snippet('a <script> Netzwerk', 'netzwerk'))
+
+
+def test_service_updates_incrementally_and_persists(service, tmp_path):
+    """Only documents whose source changed are re-indexed; the index is persisted."""
+    changed = service.update(force=True)
+    assert f'lesson:{SLUG}:L01' in changed
+    assert service.update(force=True) == []
+
+    key = f'lesson:{SLUG}:L02'
+    doc_id = service.index.by_key[key]
+    service.index.docs[doc_id]['signature'] = 'veraltet'
+    assert service.update(force=True) == [key]
+
+    reloaded = SearchService(service.path)
+    assert reloaded.update(force=True) == []
+    assert reloaded.index.live_count == service.index.live_count
+
+
+def test_edited_lesson_is_reindexed_with_new_text(service):
+    """An edit is indexed with the new text even while the render cache holds the old one."""
+    from app.utils.markdown_loader import DURCHFUEHRUNGEN_DIR, load_lesson
+
+    source = DURCHFUEHRUNGEN_DIR / SLUG / 'L02' / 'index.md'
+    original = source.read_bytes()
+    service.update(force=True)
+    load_lesson(SLUG, 'L02')  # alter Inhalt im Render-Cache
+    try:
+        source.write_bytes(original + '\n\nZebrafantastisch\n'.encode())
+        assert service.update(force=True) == [f'lesson:{SLUG}:L02']
+        assert [hit['name'] for hit in service.search('Zebrafantastisch')] == ['L02']
+    finally:
+        source.write_bytes(original)
+    assert service.update(force=True) == [f'lesson:{SLUG}:L02']
+    assert service.search('Zebrafantastisch') == []
+
+
+def test_concurrent_add_keeps_postings_readable():
+    """Every posting a reader can reach points to an existing document."""
+    index = SearchIndex()
+    original_append = list.append
+
+    class CheckingList(list):
+        def append(self, doc):
+            # Vor dem Dokument darf noch kein Term auf die neue ID zeigen
+            for term_id in index.terms.values():
+                assert all(d < len(self) for d in index.doc_ids[term_id])
+            original_append(self, doc)
+
+    index.docs = CheckingList()
+    index.add(_doc('a', 'Router', 'Router im Netzwerk'))
+    index.add(_doc('b', 'Switch', 'Switch im Netzwerk'))
+    assert [doc['key'] for _, doc in index.search('netzwerk switch')] == ['b', 'a']
+
+
+def test_search_endpoint_shows_highlighted_snippets(client, service):
+    """The course search page lists lessons with highlighted snippets."""
+    service.update(force=True)
+    response = client.get(f'/unterlagen/{SLUG}/suche?q=Netzwerke')
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert f'/unterlagen/{SLUG}/L' in html
+    assert '<mark>' in html
+
+    assert client.get(f'/unterlagen/{SLUG}/suche').status_code == 200
+    assert client.get('/unterlagen/gibt-es-nicht/suche?q=test').status_code == 404
+
+
+def test_cold_start_builds_index_in_background(client, service):
+    """Without a saved index the first query does not wait: 503 until the build is done."""
+    response = client.get(f'/unterlagen/{SLUG}/suche?q=Netzwerke')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert 'wird gerade aufgebaut' in response.get_data(as_text=True)
+
+    service._worker.join(timeout=30)
+    assert '<mark>' in client.get(f'/unterlagen/{SLUG}/suche?q=Netzwerke').get_data(as_text=True)
+
+    # Gespeicherter Index: ein neuer Prozess antwortet sofort
+    assert SearchService(service.path).search('Netzwerke', slug=SLUG)
@@ -0,0 +1,78 @@
+"""
+Tests for startup cost: deferred imports, import-time budget and the boot timeline.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+WEB_DIR = Path(__file__).resolve().parent.parent
+
+# Kalter Start (frischer Interpreter) von import + create_app(); über
+# STARTUP_BUDGET_MS für langsame CI-Maschinen anpassbar
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))
+
+BOOT = """
+import json, sys, time
+started = time.perf_counter()
+from app.app import create_app
+create_app()
+elapsed = (time.perf_counter() - started) * 1000
+from app.startup import DEFERRED_MODULES
+print(json.dumps({"ms": elapsed, "loaded": [m for m in DEFERRED_MODULES if m in sys.modules]}))
+"""
+
+
+def _boot() -> dict:
+    output = subprocess.run([sys.executable, "-c", BOOT], cwd=WEB_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_heavy_dependencies_are_deferred():
+    """Booting the app must not import YAML, Markdown, requests or WTForms."""
+    assert _boot()["loaded"] == []
+
+
+def test_cold_import_within_budget():
+    """Best of three cold boots stays below STARTUP_BUDGET_MS."""
+    best = min(_boot()["ms"] for _ in range(3))
+    assert best < STARTUP_BUDGET_MS, f"Start dauert {best:.0f} ms (Budget {STARTUP_BUDGET_MS:.0f} ms)"
+
+
+def test_startup_report(client):
+    """Admins get the boot phases and the slowest imports of the worker."""
+    with patch('app.config.Config.ADMIN_TOKEN', 'test-token'):
+        assert client.get('/_admin/startup').status_code == 403
+        response = client.get('/_admin/startup?limit=5', headers={'X-Admin-Token': 'test-token'})
+
+    data = response.get_json()
+    phases = [p['name'] for p in data['phases']]
+    assert 'create_app' in phases
+    assert 'register_monitoring_endpoints' in phases
+    assert len(data['slowest_imports']) <= 5
+
+
+def test_import_hook_only_for_wsgi_boot():
+    """Importing app modules leaves sys.meta_path alone; the WSGI boot records and removes the hook."""
+    code = """
+import json, sys
+import app.app, app.search
+from app.startup import timeline
+hooked = timeline.imports in sys.meta_path
+import app.wsgi
+print(json.dumps({"hooked": hooked, "after_wsgi": timeline.imports in sys.meta_path,
+                  "recorded": any(e["module"] == "app.app" for e in timeline.imports.entries)}))
+"""
+    output = subprocess.run([sys.executable, "-c", code], cwd=WEB_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result == {"hooked": False, "after_wsgi": False, "recorded": False}
+
+    output = subprocess.run([sys.executable, "-c", "import app.wsgi\nfrom app.startup import timeline\n"
+                             "print(len(timeline.imports.entries))"],
+                            cwd=WEB_DIR, check=True, capture_output=True, text=True).stdout
+    assert int(output.strip().splitlines()[-1]) > 0
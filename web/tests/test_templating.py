@@ -0,0 +1,85 @@
+"""
+Tests for the Jinja setup: fragment cache tag, data versions, bytecode cache.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from jinja2 import FileSystemBytecodeCache
+
+from app.app import app
+from app.cache import cache
+from app.templating import FRAGMENT_PREFIX, data_version, fragment_key, lesson_index_version
+
+SLUG = 'grundkurs-2025-10-02-di'
+
+
+def render(source, **context):
+    return app.jinja_env.from_string(source).render(**context)
+
+
+def test_fragment_is_rendered_once(client):
+    """The second render comes from the cache, not from the template body."""
+    cache.clear()
+    calls = []
+    source = '{% cache ("test", "frag") %}<b>{{ count() }}</b>{% endcache %}'
+    count = lambda: calls.append(1) or len(calls)
+    assert render(source, count=count) == '<b>1</b>'
+    assert render(source, count=count) == '<b>1</b>'
+    assert calls == [1]
+    assert cache.get(f'{FRAGMENT_PREFIX}test:frag') == (None, '<b>1</b>')
+
+
+def test_changed_version_replaces_entry(client):
+    """A new data version re-renders the fragment and replaces its single entry."""
+    cache.clear()
+    source = '{% cache "liste", version=items|version %}{{ items|join(",") }}{% endcache %}'
+    assert render(source, items=['a', 'b']) == 'a,b'
+    assert render(source, items=['a', 'b', 'c']) == 'a,b,c'
+    assert render(source, items=['a', 'b', 'c']) == 'a,b,c'
+    assert [key for key in cache.keys() if key.startswith(FRAGMENT_PREFIX)] == [f'{FRAGMENT_PREFIX}liste']
+
+
+def test_ttl_argument(client):
+    """The optional second argument is the TTL of the entry (also with a version)."""
+    cache.clear()
+    source = '{% cache "kurz", 1, version="v1" %}{{ value }}{% endcache %}'
+    assert render(source, value='alt') == 'alt'
+    assert render(source, value='neu') == 'alt'
+    with patch('app.cache.time.time', return_value=cache._timestamps[fragment_key('kurz')] + 2):
+        assert render(source, value='neu') == 'neu'
+
+
+def test_unknown_argument_is_a_syntax_error():
+    from jinja2 import TemplateSyntaxError
+
+    with pytest.raises(TemplateSyntaxError):
+        app.jinja_env.from_string('{% cache "x", versoin=1 %}{% endcache %}')
+
+
+def test_data_version_is_stable():
+    """Equal content gives equal versions; the result is memoized per object."""
+    data = [{'id': 'L01', 'title': 'Einstieg'}]
+    assert data_version(data) == data_version([{'title': 'Einstieg', 'id': 'L01'}])
+    assert data_version(data) != data_version([{'id': 'L02', 'title': 'Einstieg'}])
+    version = data_version(data)
+    data.append({'id': 'L02'})  # dasselbe Objekt: Version bleibt (Daten im Cache sind unveränderlich)
+    assert data_version(data) == version
+
+
+def test_lesson_list_fragment(client):
+    """The course page caches its lesson list under the lesson index version."""
+    cache.clear()
+    response = client.get(f'/unterlagen/{SLUG}')
+    assert response.status_code == 200
+    version, _ = cache.get(f'{FRAGMENT_PREFIX}unterlagen:lektionen:{SLUG}')
+    assert version == lesson_index_version(SLUG)
+    assert client.get(f'/unterlagen/{SLUG}').data == response.data
+
+
+def test_production_template_settings():
+    """Outside debug mode templates are not reloaded and bytecode is cached."""
+    assert app.jinja_env.auto_reload is False
+    assert isinstance(app.jinja_env.bytecode_cache, FileSystemBytecodeCache)
+    assert 'cache' in app.jinja_env.extensions['app.templating.FragmentCacheExtension'].tags